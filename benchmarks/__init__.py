@@ -0,0 +1,15 @@
+import os
+
+# The benchmarks only exercise the transcription pipeline, but importing it loads the
+# application settings, which require connection parameters. Nothing connects to them.
+for _name, _value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "benchmark",
+    "DB_USER": "benchmark",
+    "DB_PASSWORD": "benchmark",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(_name, _value)
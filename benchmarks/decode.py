@@ -0,0 +1,200 @@
+"""
+Benchmark of the audio decoders on long files.
+
+Decodes every file of a corpus (synthetic long recordings by default, WAV and MP3 at 44.1 kHz
+stereo) to 16 kHz mono float32 with every decoder, each run in a fresh process, and reports
+wall time, speed (audio seconds per second) and peak RSS of the process and of its ffmpeg
+children as JSON:
+
+- ``av``: PyAV in process, in chunks into a preallocated array (``decode_audio``).
+- ``av-file``: PyAV in process, streamed to a raw PCM file (``decode_audio_to_file``).
+- ``ffmpeg``: ffmpeg subprocess read in chunks (the fallback of ``decode_audio``).
+- ``ffmpeg-legacy``: ffmpeg subprocess read whole and converted from 16-bit PCM, as
+  ``whisperx.audio.load_audio`` does.
+
+The corpus needs PyAV (the ``worker`` extra) to encode MP3; the ffmpeg decoders need ffmpeg.
+
+Example::
+
+    python -m benchmarks.decode --seconds 600 3600 --format wav mp3 --repeat 3
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.media import SAMPLE_RATE, decode_audio, decode_audio_to_file
+from src.utils.synthetic import speech_like
+
+DECODERS = ("av", "av-file", "ffmpeg", "ffmpeg-legacy")
+CORPUS_RATE = 44100
+# Synthesized at once when writing the corpus, to bound its memory
+_BLOCK_SECONDS = 60
+
+
+def _blocks(seconds: float, seed: int):
+    for i, start in enumerate(np.arange(0, seconds, _BLOCK_SECONDS)):
+        block = speech_like(min(_BLOCK_SECONDS, seconds - start), CORPUS_RATE, seed + i, 2)
+        yield (np.clip(block, -1, 1) * 32767).astype("<i2")
+
+
+def _write_wav(path: Path, seconds: float, seed: int) -> None:
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(CORPUS_RATE)
+        for block in _blocks(seconds, seed):
+            w.writeframes(block.tobytes())
+
+
+def _write_mp3(path: Path, seconds: float, seed: int) -> None:
+    import av
+
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mp3", rate=CORPUS_RATE, layout="stereo")
+        for block in _blocks(seconds, seed):
+            frame = av.AudioFrame.from_ndarray(block.reshape(1, -1), format="s16", layout="stereo")
+            frame.sample_rate = CORPUS_RATE
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+
+def build_corpus(directory: Path, durations: list[float], formats: list[str]) -> list[str]:
+    """
+    Writes (or reuses) one synthetic stereo recording per duration and format.
+    """
+    writers = {"wav": _write_wav, "mp3": _write_mp3}
+    directory.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i, seconds in enumerate(durations):
+        for fmt in formats:
+            path = directory / f"long_{seconds:g}s_seed{i}.{fmt}"
+            if not path.exists():
+                print(f"Writing {path}", file=sys.stderr)
+                tmp = path.with_name(f".{path.name}")
+                writers[fmt](tmp, seconds, seed=i)
+                tmp.rename(path)
+            files.append(str(path))
+    return files
+
+
+def _decode_legacy(path: str) -> np.ndarray:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads",
+        "0",
+        "-i",
+        path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-",
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def run_decoder(decoder: str, path: str, repeat: int) -> dict:
+    """
+    Decodes a file ``repeat`` times in the current (fresh) process.
+    """
+    walls, samples = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if decoder == "ffmpeg-legacy":
+            samples = len(_decode_legacy(path))
+        elif decoder == "av-file":
+            with tempfile.NamedTemporaryFile(suffix=".f32") as tmp:
+                samples = decode_audio_to_file(path, tmp.name, decoder="av")
+        else:
+            samples = len(decode_audio(path, decoder=decoder))
+        walls.append(time.perf_counter() - start)
+
+    audio_s = samples / SAMPLE_RATE
+    wall_s = float(np.median(walls))
+    return {
+        "audio_s": round(audio_s, 3),
+        "wall_s": round(wall_s, 3),
+        "speed_x": round(audio_s / wall_s, 1) if wall_s else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--decoder", nargs="+", choices=DECODERS, default=list(DECODERS))
+    parser.add_argument(
+        "--seconds", nargs="+", type=float, default=[600, 3600], help="Synthetic durations"
+    )
+    parser.add_argument("--format", nargs="+", choices=["wav", "mp3"], default=["wav", "mp3"])
+    parser.add_argument("--corpus-dir", type=Path, help="Use the audio files of a directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write the report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if args.corpus_dir:
+        files = sorted(str(p) for p in args.corpus_dir.iterdir() if p.is_file())
+    else:
+        directory = Path(tempfile.gettempdir()) / "speech-api-benchmark"
+        files = build_corpus(directory, args.seconds, args.format)
+
+    results = []
+    for path in files:
+        for decoder in args.decoder:
+            key = f"{Path(path).name}/{decoder}"
+            print(f"Running {key}", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                try:
+                    metrics = pool.submit(run_decoder, decoder, path, args.repeat).result()
+                except (RuntimeError, OSError, subprocess.CalledProcessError) as e:
+                    # E.g. no ffmpeg installed
+                    metrics = {"error": str(e)}
+            results.append({"key": key, "file": path, "decoder": decoder, "metrics": metrics})
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "host": platform.node(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
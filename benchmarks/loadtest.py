@@ -0,0 +1,436 @@
+"""
+Load test and traffic replay harness for the API.
+
+Replays a request mix against the FastAPI app in process, with local stand-ins for its
+dependencies: SQLite (or any database URL, e.g. a local Postgres), an in-memory Celery broker
+and a stub worker that completes tasks after a simulated processing time. Reports p50/p99
+latency, throughput and database queries per request for task submission, task polling and
+API key authentication as JSON.
+
+The mix is either generated from a profile (number of keys, submission rate, upload sizes,
+poll interval) or replayed from a recorded trace, one JSON object per line::
+
+    {"t": 0.42, "key": 3, "audio_s": 60.0, "poll_interval": 2.0, "invalid_auth": false}
+
+Examples::
+
+    python -m benchmarks.loadtest --keys 50 --rate 20 --duration 60
+    python -m benchmarks.loadtest --record trace.jsonl --duration 300
+    python -m benchmarks.loadtest --trace trace.jsonl --db-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import secrets
+import sys
+import tempfile
+import time
+import wave
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Database queries issued on behalf of the request being measured
+_queries: ContextVar[list[int] | None] = ContextVar("queries", default=None)
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    keys: int
+    duration_s: float
+    rate: float
+    audio_seconds: tuple[float, ...]
+    poll_interval: float
+    invalid_auth_ratio: float
+    seed: int
+
+
+def generate_trace(profile: LoadProfile) -> list[dict]:
+    """
+    Generates submissions with Poisson arrivals, uniformly spread over the API keys.
+    """
+    rng = np.random.default_rng(profile.seed)
+    trace, t = [], 0.0
+    while True:
+        t += rng.exponential(1 / profile.rate)
+        if t >= profile.duration_s:
+            return trace
+        trace.append(
+            {
+                "t": round(t, 4),
+                "key": int(rng.integers(profile.keys)),
+                "audio_s": float(rng.choice(profile.audio_seconds)),
+                "poll_interval": profile.poll_interval,
+                "invalid_auth": bool(rng.random() < profile.invalid_auth_ratio),
+            }
+        )
+
+
+def wav_bytes(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(bytes(int(seconds * SAMPLE_RATE) * 2))
+    return buffer.getvalue()
+
+
+class Stats:
+    def __init__(self):
+        self._samples: dict[str, list[tuple[float, int | None, int]]] = {}
+
+    def record(self, op: str, latency: float, status: int | None, queries: int) -> None:
+        self._samples.setdefault(op, []).append((latency, status, queries))
+
+    def report(self, wall_s: float) -> dict:
+        report = {}
+        for op, samples in sorted(self._samples.items()):
+            latencies = np.array([s[0] for s in samples])
+            queries = np.array([s[2] for s in samples])
+            statuses: dict[str, int] = {}
+            for _, status, _ in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            report[op] = {
+                "count": len(samples),
+                "throughput_rps": round(len(samples) / wall_s, 2),
+                "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+                "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+                "latency_mean_ms": round(float(latencies.mean()) * 1000, 2),
+                "db_queries_mean": round(float(queries.mean()), 2),
+                "db_queries_max": int(queries.max()),
+                "statuses": statuses,
+            }
+        return report
+
+
+class Harness:
+    """
+    Wires the API to the stand-ins and drives the traffic.
+    """
+
+    def __init__(self, db_url: str, worker_rtf: float, stats: Stats):
+        from advanced_alchemy.config import EngineConfig
+        from advanced_alchemy.extensions.fastapi import AsyncSessionConfig, SQLAlchemyAsyncConfig
+        from sqlalchemy.pool import NullPool
+
+        self._db_config = SQLAlchemyAsyncConfig(
+            connection_string=db_url,
+            session_config=AsyncSessionConfig(expire_on_commit=False),
+            # A file database has no connection limit worth modelling with a pool
+            engine_config=EngineConfig(poolclass=NullPool)
+            if db_url.startswith("sqlite")
+            else EngineConfig(),
+        )
+        self._worker_rtf = worker_rtf
+        self._stats = stats
+        self._keys: list[str] = []
+        self._stop = asyncio.Event()
+        self._pending: set[asyncio.Task] = set()
+
+    async def setup(self, keys: int) -> None:
+        from advanced_alchemy.base import UUIDAuditBase
+        from sqlalchemy import event
+
+        import src.database.models  # noqa
+        from src.api_keys.models import ApiKeyModel
+        from src.security.hash import hash_key
+        from src.users.models import UserModel
+
+        engine = self._db_config.get_engine()
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(*_):
+            counter = _queries.get()
+            if counter is not None:
+                counter[0] += 1
+
+        if engine.dialect.name == "sqlite":
+            # Readers do not block on the writer, closer to Postgres under concurrency
+            @event.listens_for(engine.sync_engine, "connect")
+            def _wal(dbapi_connection, _):
+                dbapi_connection.execute("PRAGMA journal_mode=WAL")
+                dbapi_connection.execute("PRAGMA busy_timeout=30000")
+
+        async with engine.begin() as connection:
+            await connection.run_sync(UUIDAuditBase.metadata.create_all)
+
+        async with self._db_config.get_session() as session:
+            user = UserModel(company_name="loadtest")
+            session.add(user)
+            await session.flush()
+            for _ in range(keys):
+                key = secrets.token_urlsafe(24)
+                session.add(
+                    ApiKeyModel(key_hash=hash_key(key), key_prefix=key[:8], user_id=user.id)
+                )
+                self._keys.append(key)
+            await session.commit()
+
+    def build_app(self):
+        from fastapi import Header
+
+        from src.api_keys.dependencies import ApiKeyServiceDep, provide_api_key_service
+        from src.api_keys.models import ApiKeyModel
+        from src.api_keys.services import ApiKeyService
+        from src.config import settings
+        from src.main import app
+        from src.security.dependencies import get_api_key
+        from src.transcription.dependencies import provide_transcription_task_service
+        from src.transcription.services import TranscriptionTaskService
+        from src.workers.app import celery_app
+
+        celery_app.conf.broker_url = "memory://"
+        celery_app.conf.result_backend = "cache+memory://"
+        # No Redis to look up warm workers in
+        settings.MODEL_ROUTING = False
+        settings.STORAGE_BACKEND = "local"
+        settings.STORAGE_DIR = tempfile.mkdtemp(prefix="speech-loadtest-blobs-")
+
+        async def api_key_service():
+            async with ApiKeyService.new(config=self._db_config) as service:
+                yield service
+
+        async def transcription_task_service():
+            async with TranscriptionTaskService.new(config=self._db_config) as service:
+                yield service
+
+        async def timed_get_api_key(
+            api_key_service: ApiKeyServiceDep, authorization: str = Header(...)
+        ) -> ApiKeyModel:
+            counter = _queries.get() or [0]
+            queries_before, start, status = counter[0], time.perf_counter(), 200
+            try:
+                return await get_api_key(api_key_service, authorization)
+            except Exception as e:
+                status = getattr(e, "status_code", 500)
+                raise
+            finally:
+                self._stats.record(
+                    "auth", time.perf_counter() - start, status, counter[0] - queries_before
+                )
+
+        app.dependency_overrides[provide_api_key_service] = api_key_service
+        app.dependency_overrides[provide_transcription_task_service] = transcription_task_service
+        app.dependency_overrides[get_api_key] = timed_get_api_key
+        return app
+
+    async def stub_worker(self) -> None:
+        """
+        Consumes the in-memory broker queue and completes tasks after ``audio_s * rtf``.
+        """
+        from kombu import Connection
+
+        from src.workers.app import celery_app
+
+        with Connection("memory://") as connection:
+            queue = connection.SimpleQueue(celery_app.conf.task_default_queue)
+            while not self._stop.is_set():
+                try:
+                    message = queue.get(block=False)
+                except queue.Empty:
+                    await asyncio.sleep(0.01)
+                    continue
+                message.ack()
+                _, kwargs, _ = message.decode()
+                task = asyncio.create_task(self._complete(message.headers["id"], kwargs))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+    async def _complete(self, task_id: str, kwargs: dict) -> None:
+        from datetime import datetime, timezone
+
+        from sqlalchemy import update
+
+        from src.storage import get_store
+        from src.transcription.models import (
+            Status,
+            TranscriptionResultModel,
+            TranscriptionTaskModel,
+        )
+        from src.utils.media import get_duration_seconds
+
+        # Blobs are shared by identical uploads, left to the temporary directory
+        audio_file = get_store().local_path(kwargs["audio_key"])
+        audio_seconds = get_duration_seconds(str(audio_file)) or 0
+        try:
+            await asyncio.wait_for(self._stop.wait(), audio_seconds * self._worker_rtf)
+            return
+        except asyncio.TimeoutError:
+            pass
+
+        async with self._db_config.get_session() as session:
+            session.add(
+                TranscriptionResultModel(
+                    task_id=UUID(task_id),
+                    transcription_result=[
+                        {"number": 1, "content": "stub", "start": 0.0, "end": audio_seconds}
+                    ],
+                )
+            )
+            await session.execute(
+                update(TranscriptionTaskModel)
+                .where(TranscriptionTaskModel.id == UUID(task_id))
+                .values(status=Status.COMPLETED, completed_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+
+    async def _request(self, op: str, send):
+        counter = [0]
+        token = _queries.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await send()
+            status = response.status_code
+        except Exception:
+            response, status = None, None
+        finally:
+            _queries.reset(token)
+        self._stats.record(op, time.perf_counter() - start, status, counter[0])
+        return response
+
+    async def session(self, client, entry: dict, uploads: dict[float, bytes]) -> None:
+        """
+        One client: submits an upload at its trace offset, then polls until completion.
+        """
+        key = "invalid" if entry["invalid_auth"] else self._keys[entry["key"] % len(self._keys)]
+        headers = {"Authorization": f"Bearer {key}"}
+
+        response = await self._request(
+            "submit",
+            lambda: client.post(
+                "/transcribe",
+                headers=headers,
+                files={"file": ("audio.wav", uploads[entry["audio_s"]], "audio/wav")},
+            ),
+        )
+        if response is None or response.status_code >= 400:
+            return
+
+        task_id = response.json()["task_id"]
+        while not self._stop.is_set():
+            await asyncio.sleep(entry["poll_interval"])
+            response = await self._request(
+                "poll", lambda: client.get(f"/transcribe/{task_id}", headers=headers)
+            )
+            if response is None or response.json().get("status") in ("COMPLETED", "FAILED"):
+                return
+
+    async def run(self, trace: list[dict], drain_s: float) -> float:
+        import httpx
+
+        from src.transcription.outbox import start_relay, stop_relay
+
+        app = self.build_app()
+        # The app lifespan (which starts the relay on the real database) does not run here
+        start_relay(self._db_config)
+        uploads = {seconds: wav_bytes(seconds) for seconds in {e["audio_s"] for e in trace}}
+        worker = asyncio.create_task(self.stub_worker())
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            start = time.perf_counter()
+
+            async def delayed(entry):
+                await asyncio.sleep(max(entry["t"] - (time.perf_counter() - start), 0))
+                if not self._stop.is_set():
+                    await self.session(client, entry, uploads)
+
+            sessions = [asyncio.create_task(delayed(entry)) for entry in trace]
+            last = trace[-1]["t"] if trace else 0
+            _, not_done = await asyncio.wait(sessions, timeout=last + drain_s)
+            wall_s = time.perf_counter() - start
+
+            # Let in-flight requests finish: cancelling them would leak their DB connections
+            self._stop.set()
+            await asyncio.gather(*not_done, *self._pending, worker, return_exceptions=True)
+
+        await stop_relay()
+        await self._db_config.get_engine().dispose()
+        return wall_s
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    profile = parser.add_argument_group("profile")
+    profile.add_argument("--keys", type=int, default=10, help="Number of API keys")
+    profile.add_argument("--duration", type=float, default=30, help="Seconds of submissions")
+    profile.add_argument("--rate", type=float, default=2, help="Submissions per second")
+    profile.add_argument(
+        "--audio-seconds", nargs="+", type=float, default=[10, 60, 300], help="Upload sizes"
+    )
+    profile.add_argument("--poll-interval", type=float, default=1.0)
+    profile.add_argument("--invalid-auth-ratio", type=float, default=0.0)
+    profile.add_argument("--seed", type=int, default=0)
+
+    parser.add_argument("--trace", type=Path, help="Replay this trace instead of a profile")
+    parser.add_argument("--record", type=Path, help="Write the generated trace and exit")
+    parser.add_argument("--db-url", help="Database to use (default: a temporary SQLite file)")
+    parser.add_argument(
+        "--worker-rtf", type=float, default=0.01, help="Stub worker time per audio second"
+    )
+    parser.add_argument(
+        "--drain", type=float, default=30, help="Seconds to wait for sessions after the last"
+    )
+    parser.add_argument("--output", type=Path, help="Write the report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if args.trace:
+        trace = [json.loads(line) for line in args.trace.read_text().splitlines() if line]
+    else:
+        trace = generate_trace(
+            LoadProfile(
+                keys=args.keys,
+                duration_s=args.duration,
+                rate=args.rate,
+                audio_seconds=tuple(args.audio_seconds),
+                poll_interval=args.poll_interval,
+                invalid_auth_ratio=args.invalid_auth_ratio,
+                seed=args.seed,
+            )
+        )
+    if args.record:
+        args.record.write_text("".join(json.dumps(entry) + "\n" for entry in trace))
+        return 0
+
+    db_url = args.db_url
+    if db_url is None:
+        db_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='speech-loadtest-')}/db.sqlite"
+
+    stats = Stats()
+    harness = Harness(db_url=db_url, worker_rtf=args.worker_rtf, stats=stats)
+    keys = max((entry["key"] for entry in trace), default=0) + 1
+
+    async def run() -> float:
+        await harness.setup(keys=max(keys, args.keys))
+        return await harness.run(trace, drain_s=args.drain)
+
+    wall_s = asyncio.run(run())
+    report = {
+        "sessions": len(trace),
+        "wall_s": round(wall_s, 2),
+        "db_url": db_url.split("@")[-1],
+        "operations": stats.report(wall_s),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Stand-ins for the WhisperX models, so the pipeline overhead of SpeechTranscriber (audio
+decoding, stage orchestration, bookkeeping) can be measured without downloading or running
+real models. The simulated inference cost is proportional to the audio duration.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+
+from src.utils.synthetic import SAMPLE_RATE
+
+
+class StubWhisperModel:
+    """
+    Mimics the CTranslate2 model: runs up to ``num_workers`` batches at once.
+    """
+
+    def __init__(self, *_, num_workers: int = 1, **__):
+        self.slots = threading.Semaphore(num_workers)
+
+
+class StubAsrPipeline:
+    """
+    Mimics FasterWhisperPipeline.transcribe: one segment per chunk, batches of chunks cost
+    ``rtf * chunk_size`` seconds each and run on one of the slots of the model. Batches of
+    more than ``oom_above_batch`` chunks raise the error PyTorch raises when running out of
+    CUDA memory.
+    """
+
+    def __init__(
+        self,
+        rtf: float,
+        oom_above_batch: int | None = None,
+        model: StubWhisperModel | None = None,
+    ):
+        self._rtf = rtf
+        self._oom_above_batch = oom_above_batch
+        self._model = model or StubWhisperModel()
+
+    def transcribe(
+        self, audio: np.ndarray, language=None, batch_size=None, chunk_size=30, **_
+    ) -> dict:
+        duration = len(audio) / SAMPLE_RATE
+        chunks = max(math.ceil(duration / chunk_size), 1)
+        batch_size = min(batch_size or 1, chunks)
+        if self._oom_above_batch is not None and batch_size > self._oom_above_batch:
+            raise RuntimeError(
+                f"CUDA out of memory. Tried to allocate {batch_size * 256} MiB (simulated)"
+            )
+        for _ in range(math.ceil(chunks / batch_size)):
+            with self._model.slots:
+                time.sleep(chunk_size * self._rtf)
+
+        segments = [
+            {
+                "text": f" stub segment {i}",
+                "start": round(i * chunk_size, 3),
+                "end": round(min((i + 1) * chunk_size, duration), 3),
+            }
+            for i in range(chunks)
+        ]
+        return {"segments": segments, "language": language or "en"}
+
+    def detect_language(self, audio: np.ndarray) -> str:
+        return "en"
+
+
+class StubDiarizationPipeline:
+    def __init__(self, rtf: float, **_):
+        self._rtf = rtf
+
+    def __call__(self, audio: np.ndarray, num_speakers=None, **_) -> list[tuple]:
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * self._rtf)
+        speakers = num_speakers or 2
+        return [
+            (start, min(start + 5, duration), start // 5 % speakers)
+            for start in range(0, math.ceil(duration), 5)
+        ]
+
+
+def install(
+    asr_rtf: float = 0.0,
+    align_rtf: float = 0.0,
+    diarize_rtf: float = 0.0,
+    load_seconds: float = 0.0,
+    oom_above_batch: int | None = None,
+) -> None:
+    """
+    Replaces the WhisperX entry points used by SpeechTranscriber with stubs.
+
+    :param asr_rtf: Simulated ASR cost per second of audio (in a batch of one chunk).
+    :param align_rtf: Simulated alignment cost per second of audio.
+    :param diarize_rtf: Simulated diarization cost per second of audio.
+    :param load_seconds: Simulated time to load any model.
+    :param oom_above_batch: Simulate out of memory errors for ASR batches larger than this.
+    """
+    import src.workers.speech_transcriber as speech_transcriber
+
+    def load_model(*_, model=None, **__):
+        time.sleep(load_seconds)
+        return StubAsrPipeline(asr_rtf, oom_above_batch, model)
+
+    def load_align_model(language_code, *_, **__):
+        time.sleep(load_seconds)
+        return object(), {"language": language_code}
+
+    def diarization_pipeline(*_, **__):
+        time.sleep(load_seconds)
+        return StubDiarizationPipeline(diarize_rtf)
+
+    def align(segments, model, metadata, audio, *_, **__):
+        time.sleep(len(audio) / SAMPLE_RATE * align_rtf)
+        return {"segments": [dict(segment, words=[]) for segment in segments]}
+
+    def assign_word_speakers(diarization, result):
+        for segment in result["segments"]:
+            middle = (segment["start"] + segment["end"]) / 2
+            speaker = next((spk for start, end, spk in diarization if start <= middle < end), 0)
+            segment["speaker"] = f"SPEAKER_{speaker:02d}"
+        return result
+
+    speech_transcriber.WhisperModel = StubWhisperModel
+    speech_transcriber.load_model = load_model
+    speech_transcriber.load_align_model = load_align_model
+    speech_transcriber.DiarizationPipeline = diarization_pipeline
+    speech_transcriber.align = align
+    speech_transcriber.assign_word_speakers = assign_word_speakers
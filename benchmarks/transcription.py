@@ -0,0 +1,381 @@
+"""
+Offline benchmark of the transcription pipeline.
+
+Runs SpeechTranscriber end to end over a fixed corpus for every combination of the swept
+parameters, each combination in a fresh process (so model load time and peak RSS are not
+shared between runs), and reports real-time factor, throughput, latency percentiles, peak
+RSS and model load time as JSON. Results can be compared against a stored baseline.
+
+With ``--concurrency N``, N transcriptions run at once in threads sharing one transcriber,
+as in a worker started with ``--pool threads --concurrency N``.
+
+Examples::
+
+    # Pipeline overhead only, no models needed
+    python -m benchmarks.transcription --stub
+
+    # Real models on CPU, compared against a baseline
+    python -m benchmarks.transcription --model small --compute-type int8 float32 \\
+        --batch-size 1 4 --baseline benchmarks/baseline.json --output results.json
+
+    # Throughput against the number of concurrent transcriptions
+    python -m benchmarks.transcription --model small --concurrency 1 2 4 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.synthetic import speech_like, write_wav
+
+# Lower is better for all of them
+COMPARED_METRICS = ("rtf", "latency_p50_s", "latency_p95_s", "peak_rss_mb", "model_load_s")
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    model: str
+    compute_type: str
+    batch_size: int
+    chunk_size: int
+    align: bool
+    diarize: bool
+    device: str = "cpu"
+    vad: bool = False
+    concurrency: int = 1
+
+    @property
+    def key(self) -> str:
+        key = (
+            f"{self.model}/{self.compute_type}/b{self.batch_size}/c{self.chunk_size}"
+            f"/align={int(self.align)}/diarize={int(self.diarize)}/{self.device}"
+        )
+        # Only when not the default, so keys of older baselines still match
+        if self.vad:
+            key = f"{key}/vad"
+        if self.concurrency > 1:
+            key = f"{key}/n{self.concurrency}"
+        return key
+
+
+@dataclass(frozen=True)
+class StubOptions:
+    asr_rtf: float
+    align_rtf: float
+    diarize_rtf: float
+    load_seconds: float
+    oom_above_batch: int | None = None
+
+
+def build_corpus(directory: Path, durations: list[float], seed: int) -> list[str]:
+    """
+    Writes (or reuses) the synthetic corpus: one file per duration, deterministic per seed.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i, seconds in enumerate(durations):
+        path = directory / f"synthetic_{seconds:g}s_seed{seed + i}.wav"
+        if not path.exists():
+            write_wav(str(path), speech_like(seconds, seed=seed + i))
+        files.append(str(path))
+    return files
+
+
+def run_config(
+    config: BenchmarkConfig,
+    files: list[str],
+    repeat: int,
+    warmup: int,
+    language: str,
+    download_root: str,
+    hf_token: str | None,
+    stub: StubOptions | None,
+) -> dict:
+    """
+    Benchmarks one configuration. Runs in a dedicated process.
+    """
+    from src.logging import configure as configure_logging
+
+    configure_logging()
+
+    if stub is not None:
+        from benchmarks import stubs
+
+        stubs.install(**asdict(stub))
+
+    from src.transcription.enums import Language, Model
+    from src.workers.speech_transcriber import SpeechTranscriber
+
+    start = time.perf_counter()
+    transcriber = SpeechTranscriber(
+        device=config.device,
+        compute_type=config.compute_type,
+        download_root=download_root,
+        batch_size=config.batch_size,
+        chunk_size=config.chunk_size,
+        init_asr_models=[Model(config.model)],
+        hf_token=hf_token,
+        init_align_languages=[Language(language)] if config.align else [],
+        init_diarization=config.diarize,
+        vad_filter=config.vad,
+        # Threads as in a worker running `concurrency` tasks at once
+        cpu_threads=max((os.cpu_count() or 1) // config.concurrency, 1),
+        asr_workers=config.concurrency,
+        concurrent_tasks=config.concurrency,
+    )
+    model_load_s = time.perf_counter() - start
+
+    def transcribe(audio_file: str):
+        timings = transcriber.new_timings()
+        start = time.perf_counter()
+        transcriber.transcribe(
+            audio_file=audio_file,
+            model=Model(config.model),
+            language=Language(language),
+            recognition_mode=config.diarize,
+            num_speakers=None,
+            align_mode=config.align,
+            timings=timings,
+        )
+        return time.perf_counter() - start, timings.as_dict()
+
+    for _ in range(warmup):
+        transcribe(files[0])
+
+    latencies, audio_seconds, batch_sizes, skipped_seconds = [], [], [], []
+    stages: dict[str, list[float]] = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.concurrency) as pool:
+        runs = list(pool.map(transcribe, files * repeat))
+    wall_s = time.perf_counter() - start
+    for latency, timings in runs:
+        latencies.append(latency)
+        audio_seconds.append(timings["load_audio"]["audio_s"])
+        batch_sizes.append(timings.get("asr", {}).get("batch"))
+        skipped_seconds.append(timings.get("vad", {}).get("skipped_s", 0.0))
+        for stage, values in timings.items():
+            if stage != "total" and "wall_s" in values:
+                stages.setdefault(stage, []).append(values["wall_s"])
+
+    return {
+        "runs": len(latencies),
+        "audio_s": round(sum(audio_seconds), 3),
+        "rtf": round(sum(latencies) / sum(audio_seconds), 4),
+        # Seconds of audio transcribed per second, higher is better
+        "throughput": round(sum(audio_seconds) / wall_s, 3),
+        "latency_p50_s": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p95_s": round(float(np.percentile(latencies, 95)), 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "model_load_s": round(model_load_s, 3),
+        "skipped_s": round(sum(skipped_seconds), 3),
+        # Batch sizes actually used, lower than configured after out of memory errors
+        "asr_batch_sizes": sorted({size for size in batch_sizes if size is not None}),
+        "stages_mean_s": {stage: round(float(np.mean(v)), 4) for stage, v in stages.items()},
+    }
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Compares results with a baseline report; returns one row per metric of every
+    configuration present in both, flagged as a regression when worse by more than
+    ``tolerance`` (relative).
+    """
+    baseline_by_key = {item["key"]: item["metrics"] for item in baseline.get("results", [])}
+    rows = []
+    for item in results:
+        base = baseline_by_key.get(item["key"])
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in base or metric not in item["metrics"]:
+                continue
+            before, after = base[metric], item["metrics"][metric]
+            change = (after - before) / before if before else 0.0
+            rows.append(
+                {
+                    "key": item["key"],
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4),
+                    "regression": change > tolerance,
+                }
+            )
+    return rows
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    sweep = parser.add_argument_group("sweep")
+    sweep.add_argument("--model", nargs="+", default=["small"])
+    sweep.add_argument("--compute-type", nargs="+", default=["int8"])
+    sweep.add_argument("--batch-size", nargs="+", type=int, default=[4])
+    sweep.add_argument("--chunk-size", nargs="+", type=int, default=[10])
+    sweep.add_argument("--align", nargs="+", choices=["off", "on"], default=["off"])
+    sweep.add_argument("--diarize", nargs="+", choices=["off", "on"], default=["off"])
+    sweep.add_argument("--vad", nargs="+", choices=["off", "on"], default=["off"])
+    sweep.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1], help="Transcriptions run at once"
+    )
+    sweep.add_argument("--device", default="cpu")
+
+    corpus = parser.add_argument_group("corpus")
+    corpus.add_argument(
+        "--corpus-seconds", nargs="+", type=float, default=[30, 120], help="Synthetic files"
+    )
+    corpus.add_argument("--corpus-dir", type=Path, help="Use the audio files of a directory")
+    corpus.add_argument("--seed", type=int, default=0)
+    corpus.add_argument("--language", default="en")
+    corpus.add_argument("--repeat", type=int, default=3)
+    corpus.add_argument("--warmup", type=int, default=1)
+
+    stub = parser.add_argument_group("stub models")
+    stub.add_argument("--stub", action="store_true", help="Replace models with stubs")
+    stub.add_argument("--stub-asr-rtf", type=float, default=0.0)
+    stub.add_argument("--stub-align-rtf", type=float, default=0.0)
+    stub.add_argument("--stub-diarize-rtf", type=float, default=0.0)
+    stub.add_argument("--stub-load-seconds", type=float, default=0.0)
+    stub.add_argument(
+        "--stub-oom-above-batch", type=int, help="Simulate OOM errors for larger ASR batches"
+    )
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", type=Path, help="Write the report here instead of stdout")
+    output.add_argument("--baseline", type=Path, help="Compare against this report")
+    output.add_argument("--save-baseline", type=Path, help="Also store the report as baseline")
+    output.add_argument("--tolerance", type=float, default=0.1)
+    output.add_argument(
+        "--fail-on-regression", action="store_true", help="Exit with 1 on any regression"
+    )
+
+    parser.add_argument("--download-root", default="models")
+    parser.add_argument("--hf-token", default=os.getenv("HF_TOKEN"))
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if args.corpus_dir:
+        files = sorted(str(p) for p in args.corpus_dir.iterdir() if p.is_file())
+    else:
+        directory = Path(tempfile.gettempdir()) / "speech-api-benchmark"
+        files = build_corpus(directory, args.corpus_seconds, args.seed)
+
+    stub = (
+        StubOptions(
+            asr_rtf=args.stub_asr_rtf,
+            align_rtf=args.stub_align_rtf,
+            diarize_rtf=args.stub_diarize_rtf,
+            load_seconds=args.stub_load_seconds,
+            oom_above_batch=args.stub_oom_above_batch,
+        )
+        if args.stub
+        else None
+    )
+
+    configs = [
+        BenchmarkConfig(
+            model=model,
+            compute_type=compute_type,
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+            align=align == "on",
+            diarize=diarize == "on",
+            device=args.device,
+            vad=vad == "on",
+            concurrency=concurrency,
+        )
+        for (
+            model,
+            compute_type,
+            batch_size,
+            chunk_size,
+            align,
+            diarize,
+            vad,
+            concurrency,
+        ) in itertools.product(
+            args.model,
+            args.compute_type,
+            args.batch_size,
+            args.chunk_size,
+            args.align,
+            args.diarize,
+            args.vad,
+            args.concurrency,
+        )
+    ]
+
+    results = []
+    for config in configs:
+        print(f"Running {config.key}", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            metrics = pool.submit(
+                run_config,
+                config,
+                files,
+                args.repeat,
+                args.warmup,
+                args.language,
+                args.download_root,
+                # The diarization stub needs no token
+                args.hf_token or ("stub" if stub else None),
+                stub,
+            ).result()
+        results.append({"key": config.key, "config": asdict(config), "metrics": metrics})
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "host": platform.node(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "stub": asdict(stub) if stub else None,
+            "files": files,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        comparison = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        report["comparison"] = comparison
+        regressions = [row for row in comparison if row["regression"]]
+        for row in regressions:
+            print(
+                f"REGRESSION {row['key']} {row['metric']}: "
+                f"{row['baseline']} -> {row['current']} ({row['change']:+.1%})",
+                file=sys.stderr,
+            )
+        if regressions and args.fail_on_regression:
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        args.save_baseline.write_text(
+            json.dumps({"meta": report["meta"], "results": results}, indent=2)
+        )
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
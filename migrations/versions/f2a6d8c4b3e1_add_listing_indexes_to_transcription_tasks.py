@@ -0,0 +1,55 @@
+"""Add listing indexes to transcription_tasks table
+
+Revision ID: f2a6d8c4b3e1
+Revises: c5f9a3e7d2b8
+Create Date: 2026-10-19 19:41:12.604839
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a6d8c4b3e1"
+down_revision: Union[str, Sequence[str], None] = "c5f9a3e7d2b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built without locking writes to the table, which needs to be outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transcription_tasks_api_key_id_created_at",
+            "transcription_tasks",
+            ["api_key_id", "created_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_transcription_tasks_api_key_id_status_created_at",
+            "transcription_tasks",
+            ["api_key_id", "status", "created_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transcription_tasks_api_key_id_status_created_at",
+            table_name="transcription_tasks",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_transcription_tasks_api_key_id_created_at",
+            table_name="transcription_tasks",
+            postgresql_concurrently=True,
+        )
@@ -25,6 +25,9 @@ class ApiKeyModel(SoftDeleteMixin, UUIDAuditBase):
     is_active: Mapped[bool] = mapped_column(default=True)
     last_used_at: Mapped[datetime | None]
     name: Mapped[str | None] = mapped_column(String(255))
+    # Rate limits (tier) of the key, the defaults of the settings when None
+    audio_seconds_per_hour: Mapped[int | None]
+    max_concurrent_tasks: Mapped[int | None]
 
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id"), index=True)
     user: Mapped[UserModel] = relationship(back_populates="api_keys")
@@ -20,12 +20,86 @@ class Settings(BaseSettings):
 
     TASK_TIME_LIMIT: int = 600
     TASK_RESULT_EXPIRES: int = 3600
+    TASK_MAX_RETRIES: int = 3
+    TASK_RETRY_BACKOFF: float = 30.0  # base delay (seconds) of task retries, doubled every retry
+    TASK_RETRY_BACKOFF_MAX: float = 600.0
+
+    CHECKPOINT_DIR: str = "/tmp/transcribe/checkpoints"  # outputs of completed stages per task
+    CHECKPOINT_MAX_AGE: int = 86400  # seconds before checkpoints of abandoned tasks are purged
+
+    STORAGE_BACKEND: str = "local"  # blob store of the uploads: "local" or "s3"
+    STORAGE_DIR: str = "/tmp/transcribe/blobs"  # local backend, shared by the API and workers
+    STORAGE_MAX_AGE: int = 86400  # seconds after their last upload before blobs are purged
+    STORAGE_CACHE_DIR: str = "/tmp/transcribe/cache"  # worker cache of downloaded blobs
+    STORAGE_CACHE_MAX_BYTES: int = 10 * 2**30
+    S3_BUCKET: str | None = None
+    S3_PREFIX: str = ""  # prepended to the keys of the blobs
+    S3_ENDPOINT_URL: str | None = None  # S3-compatible stores (MinIO...), None for AWS
+    S3_REGION: str | None = None
+    S3_ACCESS_KEY_ID: str | None = None  # None uses the default credential chain of boto3
+    S3_SECRET_ACCESS_KEY: str | None = None
+
+    UPLOAD_DIR: str = "/tmp/transcribe/uploads"  # partial resumable uploads, shared by the API
+    UPLOAD_MAX_BYTES: int = 4 * 2**30  # largest resumable upload
+    UPLOAD_EXPIRES: int = 86400  # seconds after the last chunk before a partial upload is removed
+
+    URL_ALLOWED_HOSTS: list[str] = []  # hosts of POST /transcribe/url, "*" wildcards; empty: none
+    URL_MAX_BYTES: int = 4 * 2**30  # largest audio downloaded from a URL
+    URL_TIMEOUT: float = 30.0  # seconds to connect, and between reads, when downloading
+    URL_DOWNLOADS: int = 4  # downloads at once per worker host
+
+    IDEMPOTENCY_KEY_TTL: int = 86400  # seconds a submission is replayed for its Idempotency-Key
+    IDEMPOTENCY_KEY_LEASE: int = 600  # seconds an unfinished submission holds its key
+
+    RATE_LIMIT_AUDIO_SECONDS_PER_HOUR: int | None = None  # default of the API keys, None: none
+    RATE_LIMIT_CONCURRENT_TASKS: int | None = None  # unfinished tasks per API key, None: no limit
+    RATE_LIMIT_TASK_TTL: int = 86400  # seconds a task counts as unfinished, should its end be lost
+
+    REAPER_INTERVAL: float = 300.0  # seconds between scans for expired uploads and keys
+
+    OUTBOX_BATCH_SIZE: int = 100  # tasks published to the broker per transaction
+    OUTBOX_POLL_INTERVAL: float = 1.0  # seconds between outbox scans when idle
+    OUTBOX_RETRY_BACKOFF: float = 1.0  # base delay (seconds) of failed publishes, doubled
+    OUTBOX_RETRY_BACKOFF_MAX: float = 60.0
+
+    DB_WRITER_BATCH_SIZE: int = 50
+    DB_WRITER_FLUSH_INTERVAL: float = 0.2  # seconds to wait for more writes before flushing
+    DB_WRITER_MAX_RETRIES: int = 5
+    DB_WRITER_RETRY_BACKOFF: float = 0.5  # base delay (seconds), doubled on every retry
+    DB_WRITER_SHUTDOWN_TIMEOUT: float = 30.0
+
+    WORKER_METRICS_PORT: int | None = 9100  # Prometheus exporter of the worker, None disables
+
+    WORKER_ROLE: str = "asr"  # "asr" transcribes, "preprocess" decodes uploads to PCM for it
+    PREPROCESS_AUDIO: bool = False  # decode uploads on preprocessing workers before ASR
+    PREPROCESS_QUEUE: str = "preprocess"  # consumed by the preprocessing workers
+
+    WORKER_MODELS: list[str] = ["turbo"]  # ASR models preloaded, with their queues consumed
+    MODEL_ROUTING: bool = True  # send tasks to the queue of their model when a worker has it
+    WORKER_HEARTBEAT_INTERVAL: float = 15.0  # seconds between model advertisements
+    WORKER_HEARTBEAT_TTL: float = 45.0  # seconds before a silent worker is considered gone
+    ROUTING_CACHE_TTL: float = 5.0  # seconds the producer reuses a warm worker lookup
+    SHARE_MODELS: bool = False  # load models once before forking the pool (CPU only)
+    ASR_INTRA_THREADS: int | None = None  # threads per ASR batch, None splits the cores
+    ASR_INTER_THREADS: int | None = None  # parallel ASR batches, None: one per pool thread
+    RUNTIME_PROFILE: str | None = None  # profile written by src.workers.calibrate, applied on start
+    CALIBRATE_ON_START: bool = False  # calibrate when the profile is missing or from another host
+    WORKER_WARMUP: bool = True  # run every model once before taking tasks
+    WORKER_READY_FILE: str | None = "/tmp/speech-worker.ready"  # exists while a worker is warm
+    WORKER_STARTUP_TIMEOUT: float = 600.0  # seconds a pool process may take to load and warm up
 
     DEVICE: str = "cpu"
     COMPUTE_TYPE: str = "float16"
     DOWNLOAD_ROOT: str = "models"
-    BATCH_SIZE: int = 4
+    BATCH_SIZE: int = 4  # initial and largest batch size, reduced on out of memory errors
+    BATCH_SIZE_MIN: int = 1
+    BATCH_SIZE_PROBE_AFTER: int = 20  # successes in a row before trying a larger batch size
     CHUNK_SIZE: int = 10
+    AUDIO_DECODER: str = "auto"  # "av" (PyAV, in process), "ffmpeg" (subprocess) or "auto"
+    VAD_FILTER: bool = False  # remove silence before ASR, alignment and diarization
+    LANGUAGE_DETECTION_MODEL: str | None = None  # e.g. "small", preloaded; None: the ASR model
+    LANGUAGE_DETECTION_WINDOWS: int = 3
+    LANGUAGE_DETECTION_WINDOW_SECONDS: float = 30.0  # the input length of Whisper
 
     HF_TOKEN: str | None = None  # Hugging Face token for diarization models
 
@@ -1,12 +1,21 @@
 from src.admins.models import AdminModel
 from src.api_keys.models import ApiKeyModel
-from src.transcription.models import TranscriptionResultModel, TranscriptionTaskModel
+from src.transcription.models import (
+    IdempotencyKeyModel,
+    TaskOutboxModel,
+    TranscriptionResultModel,
+    TranscriptionTaskModel,
+)
+from src.uploads.models import UploadSessionModel
 from src.users.models import UserModel
 
 __all__ = [
     "ApiKeyModel",
     "TranscriptionTaskModel",
     "TranscriptionResultModel",
+    "TaskOutboxModel",
+    "IdempotencyKeyModel",
+    "UploadSessionModel",
     "UserModel",
     "AdminModel",
 ]
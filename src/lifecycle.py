@@ -3,10 +3,21 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from src import log
+from src.database.config import sqlalchemy_config
+from src.ratelimit import get_rate_limiter
+from src.reaper import start_reaper, stop_reaper
+from src.transcription.outbox import start_relay, stop_relay
+from src.workers.routing import get_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log.info("Starting application...")
+    start_relay(sqlalchemy_config)
+    start_reaper(sqlalchemy_config)
     yield
+    await stop_reaper()
+    await stop_relay()
+    await get_router().close()
+    await get_rate_limiter().close()
     log.info("Application shut down")
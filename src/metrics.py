@@ -0,0 +1,215 @@
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from src import log
+from src.config import settings
+
+# Set by prometheus_client users to share metrics between processes (prefork workers,
+# multiple uvicorn workers). Must be set before the first metric is created.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+REQUEST_LATENCY = Histogram(
+    "speech_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+)
+
+OUTBOX_PUBLISHES = Counter(
+    "speech_outbox_publishes",
+    "Tasks published from the outbox to the broker by outcome (published or failed).",
+    ["outcome"],
+)
+
+OUTBOX_DELAY = Histogram(
+    "speech_outbox_delay_seconds",
+    "Time between a task being created and its publication to the broker.",
+    buckets=STAGE_BUCKETS,
+)
+
+TASK_WAIT = Histogram(
+    "speech_task_queue_wait_seconds",
+    "Time between a task being enqueued and a worker starting it.",
+    buckets=STAGE_BUCKETS,
+)
+
+STAGE_DURATION = Histogram(
+    "speech_stage_duration_seconds",
+    "Duration of transcription pipeline stages.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+REAL_TIME_FACTOR = Histogram(
+    "speech_real_time_factor",
+    "Processing time divided by audio duration.",
+    ["model"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+MODEL_CACHE = Counter(
+    "speech_model_cache_requests",
+    "Model cache lookups by model kind and outcome (hit or miss).",
+    ["kind", "outcome"],
+)
+
+MODEL_LOADS = Counter(
+    "speech_model_loads",
+    "Models loaded into memory.",
+    ["kind", "model"],
+)
+
+STAGE_RETRIES = Counter(
+    "speech_stage_retries",
+    "Retried attempts of pipeline stages.",
+    ["stage"],
+)
+
+OOM_ERRORS = Counter(
+    "speech_oom_errors",
+    "Out of memory errors raised by pipeline stages.",
+    ["stage"],
+)
+
+BATCH_SIZE_CHANGES = Counter(
+    "speech_batch_size_changes",
+    "Adjustments of the adaptive ASR batch size by direction (down or up).",
+    ["direction"],
+)
+
+VAD_SKIPPED_SECONDS = Counter(
+    "speech_vad_skipped_audio_seconds",
+    "Seconds of silence removed before ASR by voice activity detection.",
+)
+
+COLD_STARTS = Counter(
+    "speech_model_cold_starts",
+    "Models loaded on demand by a task because the worker did not have them warm.",
+    ["kind", "model"],
+)
+
+BLOB_CACHE = Counter(
+    "speech_blob_cache_requests",
+    "Lookups of uploads in the blob cache of workers by outcome (hit or miss).",
+    ["outcome"],
+)
+
+TASK_ROUTES = Counter(
+    "speech_task_routes",
+    "Enqueued tasks by route: the queue of a warm model, or the default queue as fallback.",
+    ["route"],
+)
+
+WARMUP_DURATION = Histogram(
+    "speech_worker_warmup_seconds",
+    "Duration of the warm-up inference of worker processes by stage and model.",
+    ["stage", "model"],
+    buckets=STAGE_BUCKETS,
+)
+
+PROCESS_MEMORY = Gauge(
+    "speech_worker_memory_bytes",
+    "Memory of worker processes by role (main or child) and kind (rss, pss or shared).",
+    ["role", "kind"],
+    # One series per live process (pid label) in multiprocess mode
+    multiprocess_mode="liveall",
+)
+
+TASKS = Counter(
+    "speech_tasks",
+    "Finished transcription tasks by status.",
+    ["status"],
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Measures the wall time of a pipeline stage.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - start)
+
+
+class QueueDepthCollector:
+    """
+    Reports the number of messages waiting in the broker queues at scrape time.
+    """
+
+    def __init__(self, queues: list[str]):
+        self._queues = queues
+
+    @staticmethod
+    def _family() -> GaugeMetricFamily:
+        return GaugeMetricFamily(
+            "speech_queue_depth", "Messages waiting in the broker queue.", labels=["queue"]
+        )
+
+    def describe(self):
+        # Keeps the registry from calling collect() (and Redis) at registration time
+        yield self._family()
+
+    def collect(self):
+        from redis import Redis, RedisError
+
+        family = self._family()
+        try:
+            with Redis.from_url(settings.REDIS_URL, socket_timeout=1) as client:
+                for queue in self._queues:
+                    family.add_metric([queue], client.llen(queue))
+        except RedisError as e:
+            log.warning("Failed to read queue depth", error=str(e))
+            return
+        yield family
+
+
+def build_registry(queues: list[str] | None = None) -> CollectorRegistry:
+    """
+    Returns the registry to expose: metrics of every process when running in multiprocess
+    mode, the default registry otherwise.
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    if queues:
+        registry.register(QueueDepthCollector(queues))
+    return registry
+
+
+def render(registry: CollectorRegistry) -> tuple[bytes, str]:
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def clear_multiproc_dir() -> None:
+    """
+    Removes metric files left by previous runs. Call once, before any child process starts.
+    """
+    if MULTIPROC_DIR:
+        for path in Path(MULTIPROC_DIR).glob("*.db"):
+            path.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -5,6 +5,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from src import log
 from src.logging import generate_correlation_id
+from src.metrics import REQUEST_LATENCY
 
 
 class LogMiddleware(BaseHTTPMiddleware):
@@ -30,10 +31,19 @@ class LogMiddleware(BaseHTTPMiddleware):
             log.exception("Unhandled exception during request")
             raise
         finally:
-            duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            duration = time.perf_counter() - start
+            duration_ms = round(duration * 1000, 2)
             status = getattr(response, "status_code", None)
             log.info("Request completed", status_code=status, duration_ms=duration_ms)
 
+            # Label by route template to keep the number of series bounded
+            route = request.scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status or 500,
+            ).observe(duration)
+
             try:
                 if response is not None:
                     response.headers.setdefault("X-Request-Id", correlation_id)
@@ -0,0 +1,315 @@
+"""
+Rate limits of the API keys, counted in audio seconds and in tasks in flight.
+
+Every API key has a token bucket in Redis holding up to an hour of its audio allowance
+(``audio_seconds_per_hour``), refilled continuously, and a sorted set of its unfinished tasks
+(at most ``max_concurrent_tasks``). Both are checked and updated at once by a Lua script when
+a task is submitted, after the upload is probed and before it is stored. The audio of a task
+whose duration is unknown at submission (audio submitted by URL) is charged by the worker once
+decoded; the bucket may then go below zero, holding back the next submissions until it
+refills. Workers release the task when it ends.
+
+Limits are an admission control, not an accounting: when Redis is unavailable, tasks are
+admitted.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from redis import Redis, RedisError
+from redis.asyncio import Redis as AsyncRedis
+
+from src import log
+from src.config import settings
+
+if TYPE_CHECKING:
+    from src.api_keys.models import ApiKeyModel
+
+_KEY_PREFIX = "speech:ratelimit"
+
+# KEYS: bucket, tasks, task; ARGV: now, capacity (-1: none), refill per second, cost,
+# max tasks (-1: none), task id, API key id, task TTL
+# Returns: the limit reached ('' when admitted), tokens, retry after (-1: unknown)
+_ACQUIRE = """
+local now, capacity, rate = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local cost, max_tasks, ttl = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[8])
+
+local tokens = capacity
+if capacity >= 0 then
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    if state[1] then
+        local elapsed = math.max(0, now - tonumber(state[2]))
+        tokens = math.min(capacity, tonumber(state[1]) + elapsed * rate)
+    end
+end
+
+if max_tasks >= 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    if redis.call('ZCARD', KEYS[2]) >= max_tasks then
+        return {'tasks', tostring(tokens), '-1'}
+    end
+end
+if capacity >= 0 then
+    -- Audio longer than the whole bucket goes through once the bucket is full
+    local needed = math.min(cost, capacity)
+    if tokens < needed then
+        local retry_after = -1
+        if rate > 0 then
+            retry_after = (needed - tokens) / rate
+        end
+        return {'audio', tostring(tokens), tostring(retry_after)}
+    end
+    tokens = tokens - cost
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    if rate > 0 then
+        redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+    end
+end
+
+redis.call('ZADD', KEYS[2], now + ttl, ARGV[6])
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('HSET', KEYS[3], 'api_key', ARGV[7], 'charged', cost > 0 and '1' or '0',
+    'capacity', tostring(capacity), 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[3], ttl)
+return {'', tostring(tokens), '-1'}
+"""
+
+# KEYS: bucket, task; ARGV: now, cost. Charges a task once, even below zero.
+_CHARGE = """
+local task = redis.call('HMGET', KEYS[2], 'charged', 'capacity', 'rate')
+if task[1] ~= '0' then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'charged', '1')
+local capacity, rate = tonumber(task[2]), tonumber(task[3])
+if capacity < 0 then
+    return 0
+end
+local now = tonumber(ARGV[1])
+local tokens = capacity
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+if state[1] then
+    local elapsed = math.max(0, now - tonumber(state[2]))
+    tokens = math.min(capacity, tonumber(state[1]) + elapsed * rate)
+end
+tokens = tokens - tonumber(ARGV[2])
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+if rate > 0 then
+    redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+end
+return 1
+"""
+
+
+def _bucket_key(api_key_id: str) -> str:
+    return f"{_KEY_PREFIX}:audio:{api_key_id}"
+
+
+def _tasks_key(api_key_id: str) -> str:
+    return f"{_KEY_PREFIX}:tasks:{api_key_id}"
+
+
+def _task_key(task_id: str) -> str:
+    return f"{_KEY_PREFIX}:task:{task_id}"
+
+
+@dataclass(frozen=True)
+class Limits:
+    audio_seconds_per_hour: int | None
+    max_concurrent_tasks: int | None
+
+    @classmethod
+    def of(cls, api_key: ApiKeyModel) -> Limits:
+        """
+        Returns the limits of an API key, the defaults of the settings where it has none.
+        """
+        return cls(
+            audio_seconds_per_hour=settings.RATE_LIMIT_AUDIO_SECONDS_PER_HOUR
+            if api_key.audio_seconds_per_hour is None
+            else api_key.audio_seconds_per_hour,
+            max_concurrent_tasks=settings.RATE_LIMIT_CONCURRENT_TASKS
+            if api_key.max_concurrent_tasks is None
+            else api_key.max_concurrent_tasks,
+        )
+
+    @property
+    def unlimited(self) -> bool:
+        return self.audio_seconds_per_hour is None and self.max_concurrent_tasks is None
+
+
+@dataclass(frozen=True)
+class Admission:
+    limits: Limits
+    exceeded: str | None  # "audio" or "tasks" when a limit is reached
+    tokens: float | None
+    retry_after: float | None
+
+    def headers(self) -> dict[str, str]:
+        """
+        Returns the ``RateLimit-*`` headers of the audio allowance: audio seconds per hour,
+        seconds of audio left and seconds until the allowance is whole again.
+        """
+        headers = {}
+        capacity = self.limits.audio_seconds_per_hour
+        if capacity is not None and self.tokens is not None:
+            reset = (capacity - self.tokens) / (capacity / 3600) if capacity > 0 else 0
+            headers = {
+                "RateLimit-Limit": str(capacity),
+                "RateLimit-Remaining": str(max(0, math.floor(self.tokens))),
+                "RateLimit-Reset": str(max(0, math.ceil(reset))),
+            }
+        if self.exceeded and self.retry_after is not None:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimiter:
+    """
+    Admits the tasks of the API keys on the API side.
+    """
+
+    def __init__(self, task_ttl: float):
+        """
+        :param task_ttl: Seconds after which a task no longer counts as in flight, should its
+            end be missed (e.g. a worker killed).
+        """
+        self._task_ttl = task_ttl
+        self._client: AsyncRedis | None = None
+        self._acquire = None
+
+    def _connect(self) -> AsyncRedis:
+        if self._client is None:
+            self._client = AsyncRedis.from_url(settings.REDIS_URL, socket_timeout=1)
+            self._acquire = self._client.register_script(_ACQUIRE)
+        return self._client
+
+    async def acquire(
+        self, api_key_id: UUID, limits: Limits, task_id: UUID, audio_seconds: float | None
+    ) -> Admission | None:
+        """
+        Takes the audio of a task out of the bucket of its API key and counts it in flight,
+        unless either limit is reached.
+
+        :param audio_seconds: Duration of the audio, None when only known by the worker.
+        :return: The outcome, None when the limits could not be checked.
+        """
+        capacity = limits.audio_seconds_per_hour
+        try:
+            self._connect()
+            exceeded, tokens, retry_after = await self._acquire(
+                keys=[
+                    _bucket_key(str(api_key_id)),
+                    _tasks_key(str(api_key_id)),
+                    _task_key(str(task_id)),
+                ],
+                args=[
+                    time.time(),
+                    -1 if capacity is None else capacity,
+                    0 if capacity is None else capacity / 3600,
+                    audio_seconds or 0,
+                    -1 if limits.max_concurrent_tasks is None else limits.max_concurrent_tasks,
+                    str(task_id),
+                    str(api_key_id),
+                    int(self._task_ttl),
+                ],
+            )
+        except RedisError as e:
+            log.warning("Failed to check the rate limits", api_key_id=str(api_key_id), error=str(e))
+            return None
+        return Admission(
+            limits=limits,
+            exceeded=exceeded.decode() or None,
+            tokens=None if capacity is None else float(tokens),
+            retry_after=None if float(retry_after) < 0 else float(retry_after),
+        )
+
+    async def release(self, api_key_id: UUID, task_id: UUID) -> None:
+        """
+        Stops counting a task that was not created after all.
+        """
+        try:
+            async with self._connect().pipeline() as pipe:
+                pipe.zrem(_tasks_key(str(api_key_id)), str(task_id))
+                pipe.delete(_task_key(str(task_id)))
+                await pipe.execute()
+        except RedisError as e:
+            log.warning("Failed to release a task", task_id=str(task_id), error=str(e))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_LIMITER: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = RateLimiter(task_ttl=settings.RATE_LIMIT_TASK_TTL)
+    return _LIMITER
+
+
+class TaskQuota:
+    """
+    The rate limits of the tasks on the worker side.
+    """
+
+    def __init__(self):
+        self._client: Redis | None = None
+        self._charge = None
+
+    def _connect(self) -> Redis:
+        if self._client is None:
+            self._client = Redis.from_url(settings.REDIS_URL, socket_timeout=2)
+            self._charge = self._client.register_script(_CHARGE)
+        return self._client
+
+    def charge(self, task_id: str, audio_seconds: float) -> None:
+        """
+        Charges the audio of a task to its API key, unless it was charged at submission.
+        """
+        try:
+            client = self._connect()
+            api_key_id = client.hget(_task_key(task_id), "api_key")
+            if api_key_id is None:
+                # Not rate limited, or charged and released already
+                return
+            self._charge(
+                keys=[_bucket_key(api_key_id.decode()), _task_key(task_id)],
+                args=[time.time(), audio_seconds],
+            )
+        except RedisError as e:
+            log.warning("Failed to charge the audio of a task", task_id=task_id, error=str(e))
+
+    def release(self, task_id: str) -> None:
+        """
+        Stops counting an ended task in flight.
+        """
+        try:
+            client = self._connect()
+            api_key_id = client.hget(_task_key(task_id), "api_key")
+            if api_key_id is None:
+                return
+            with client.pipeline() as pipe:
+                pipe.zrem(_tasks_key(api_key_id.decode()), task_id)
+                pipe.delete(_task_key(task_id))
+                pipe.execute()
+        except RedisError as e:
+            log.warning("Failed to release a task", task_id=task_id, error=str(e))
+
+
+_QUOTA: TaskQuota | None = None
+
+
+def get_task_quota() -> TaskQuota:
+    global _QUOTA
+    if _QUOTA is None:
+        _QUOTA = TaskQuota()
+    return _QUOTA
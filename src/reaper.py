@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import UUID
+
+from advanced_alchemy.extensions.fastapi import SQLAlchemyAsyncConfig
+from sqlalchemy import delete
+
+from src import log
+from src.config import settings
+from src.transcription.models import IdempotencyKeyModel
+from src.uploads.models import UploadSessionModel
+from src.uploads.services import forget_upload, upload_path
+
+
+class Reaper:
+    """
+    Removes expired API state in the background:
+
+    - resumable uploads not resumed for ``UPLOAD_EXPIRES`` seconds: their sessions, and the
+      files of ``UPLOAD_DIR`` not written to for as long (including the files left without a
+      session);
+    - idempotency keys of task submissions past their TTL.
+    """
+
+    def __init__(self, config: SQLAlchemyAsyncConfig, interval: float):
+        """
+        :param config: Database of the API.
+        :param interval: Seconds between scans.
+        """
+        self._config = config
+        self._interval = interval
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="reaper")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                uploads, keys = await self.reap_once()
+                if uploads or keys:
+                    log.info("Removed expired state", uploads=uploads, idempotency_keys=keys)
+            except Exception as e:
+                log.error("Reaper failed", error=str(e))
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stop.wait(), self._interval)
+
+    async def reap_once(self) -> tuple[int, int]:
+        """
+        Removes the expired state. Returns the number of removed upload files and keys.
+        """
+        now = datetime.now(timezone.utc)
+        async with self._config.get_session() as session:
+            result = await session.execute(
+                delete(UploadSessionModel)
+                .where(UploadSessionModel.expires_at <= now)
+                .returning(UploadSessionModel.id)
+            )
+            expired = list(result.scalars().all())
+            result = await session.execute(
+                delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at <= now)
+            )
+            keys = result.rowcount
+            await session.commit()
+        for upload_id in expired:
+            forget_upload(upload_id)
+        return await asyncio.to_thread(self._remove_files, expired), keys
+
+    @staticmethod
+    def _remove_files(expired: list[UUID]) -> int:
+        removed = 0
+        for upload_id in expired:
+            with suppress(FileNotFoundError):
+                upload_path(upload_id).unlink()
+                removed += 1
+        cutoff = time.time() - settings.UPLOAD_EXPIRES
+        for path in Path(settings.UPLOAD_DIR).glob("*.part"):
+            with suppress(OSError):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+
+_REAPER: Reaper | None = None
+
+
+def start_reaper(config: SQLAlchemyAsyncConfig) -> Reaper:
+    global _REAPER
+    _REAPER = Reaper(config, interval=settings.REAPER_INTERVAL)
+    _REAPER.start()
+    return _REAPER
+
+
+async def stop_reaper() -> None:
+    global _REAPER
+    if _REAPER is not None:
+        await _REAPER.stop()
+        _REAPER = None
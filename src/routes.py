@@ -1,13 +1,25 @@
-from fastapi import APIRouter, FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request, Response
 from fastapi.responses import RedirectResponse
 from scalar_fastapi import get_scalar_api_reference
 
 from src.config import settings
+from src.metrics import build_registry, render
 from src.schemas import HealthCheck
+from src.transcription.enums import Model
 from src.transcription.routes import router as speech_recognition_router
+from src.uploads.routes import router as uploads_router
+from src.workers.app import celery_app
+from src.workers.routing import model_queue
 
 router = APIRouter(tags=["Monitoring"])
 
+metrics_registry = build_registry(
+    queues=[
+        celery_app.conf.task_default_queue,
+        *(model_queue(celery_app.conf.task_default_queue, model) for model in Model.values()),
+    ]
+)
+
 
 @router.get(
     "/healthcheck",
@@ -25,6 +37,12 @@ async def healthcheck() -> HealthCheck:
     return HealthCheck()
 
 
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    content, media_type = render(metrics_registry)
+    return Response(content=content, media_type=media_type)
+
+
 @router.get("/docs", include_in_schema=False)
 async def scalar_html():
     return get_scalar_api_reference(
@@ -42,3 +60,4 @@ async def redirect_to_docs(request: Request):
 def routes_register(app: FastAPI) -> None:
     app.include_router(router=router)
     app.include_router(router=speech_recognition_router)
+    app.include_router(router=uploads_router)
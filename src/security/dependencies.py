@@ -4,11 +4,12 @@ from uuid import UUID
 from fastapi import Depends, Header, HTTPException, status
 
 from src.api_keys.dependencies import ApiKeyServiceDep
+from src.api_keys.models import ApiKeyModel
 
 
-async def verify_api_key(
+async def get_api_key(
     api_key_service: ApiKeyServiceDep, authorization: str = Header(...)
-) -> UUID:
+) -> ApiKeyModel:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -17,8 +18,13 @@ async def verify_api_key(
         )
     api_key_value = authorization.removeprefix("Bearer ").strip()
 
-    api_key = await api_key_service.validate_api_key(api_key_value)
+    return await api_key_service.validate_api_key(api_key_value)
 
+
+ApiKeyDep: TypeAlias = Annotated[ApiKeyModel, Depends(get_api_key)]
+
+
+async def verify_api_key(api_key: ApiKeyDep) -> UUID:
     return api_key.id
 
 
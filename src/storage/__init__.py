@@ -0,0 +1,61 @@
+"""
+Blob store of the uploaded audio handed over from the API to the workers.
+
+The API stores every upload under the SHA-256 of its content and enqueues the key; workers
+read it in place (``local`` backend, a shared volume) or download it into a local read-through
+cache (``s3`` backend, any S3-compatible store). Blobs are purged ``STORAGE_MAX_AGE`` seconds
+after their last upload.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from src.config import settings
+from src.storage.base import BlobNotFoundError, BlobStore, StorageError, content_key
+
+__all__ = ["BlobNotFoundError", "BlobStore", "StorageError", "content_key", "get_store"]
+
+_STORE: BlobStore | None = None
+_LOCK = threading.Lock()
+
+
+def get_store() -> BlobStore:
+    global _STORE
+    if _STORE is None:
+        with _LOCK:
+            if _STORE is None:
+                _STORE = _create_store()
+    return _STORE
+
+
+def _forget_store() -> None:
+    global _STORE, _LOCK
+    # Connections of the parent are not safe to share: forked processes open their own
+    _STORE = None
+    _LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_store)
+
+
+def _create_store() -> BlobStore:
+    if settings.STORAGE_BACKEND == "local":
+        from src.storage.local import LocalBlobStore
+
+        return LocalBlobStore(settings.STORAGE_DIR)
+    if settings.STORAGE_BACKEND == "s3":
+        from src.storage.s3 import S3BlobStore
+
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET is required by the s3 storage backend")
+        return S3BlobStore(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
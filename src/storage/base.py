@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from src.utils.retry import FatalError
+
+# Part size of uploads and range size of downloads
+CHUNK_SIZE = 8 * 2**20
+
+
+class StorageError(OSError):
+    """
+    The blob store could not be reached or failed; retrying may succeed.
+    """
+
+
+class BlobNotFoundError(FatalError):
+    """
+    No blob is stored under the key, e.g. it was purged before the task ran.
+    """
+
+
+# Namespaces of the keys: uploads (see ``content_key``) and their decoded PCM (see
+# ``src.workers.preprocess.pcm_key``)
+KEY_PREFIXES = ("audio/", "pcm/")
+
+
+def content_key(digest: str, suffix: str = "") -> str:
+    """
+    Returns the key of a blob from the SHA-256 of its content: the same audio is stored once,
+    however many times it is uploaded, and a key never changes content.
+    """
+    return f"audio/{digest[:2]}/{digest}{suffix}"
+
+
+class BlobStore(ABC):
+    """
+    Storage of the uploaded audio handed over from the API to the workers.
+
+    Keys are content addressed (see ``content_key``). Methods are blocking; call them from a
+    thread in async code.
+    """
+
+    @abstractmethod
+    def put_file(self, key: str, path: str | Path) -> None:
+        """
+        Stores the content of a local file under the key, streamed in parts. A key already
+        stored holds the same content, so it is only touched to restart its retention.
+        """
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """
+        Returns the size of a blob in bytes; raises ``BlobNotFoundError`` if it is missing.
+        """
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        """
+        Reads ``length`` bytes of a blob from offset ``start``.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def purge(self, max_age: float) -> int:
+        """
+        Removes the blobs stored or touched more than ``max_age`` seconds ago. Returns the
+        number of removed blobs.
+        """
+
+    def local_path(self, key: str) -> Path | None:
+        """
+        Returns the path of a blob when it can be read in place, None when it must be
+        downloaded.
+        """
+        return None
+
+    def download(self, key: str, destination: Path, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Downloads a blob in ranged reads of ``chunk_size`` bytes, appended to
+        ``destination``: the partial file left by an interrupted download is resumed.
+        """
+        size = self.size(key)
+        with destination.open("ab") as f:
+            position = f.tell()
+            if position > size:
+                # Not a prefix of this blob
+                f.truncate(0)
+                position = 0
+            while position < size:
+                data = self.read_range(key, position, min(chunk_size, size - position))
+                if not data:
+                    raise StorageError(f"Unexpected end of blob {key} at {position} of {size}")
+                f.write(data)
+                position += len(data)
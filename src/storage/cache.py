@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Iterator
+
+from src.config import settings
+from src.metrics import BLOB_CACHE
+from src.storage import get_store
+from src.storage.base import BlobNotFoundError, BlobStore
+
+
+class BlobCache:
+    """
+    Read-through cache of blobs on the local disk of a worker.
+
+    Keys are content addressed, so a cached blob never goes stale: it is kept for retries and
+    duplicate uploads until evicted, least recently used first, above ``max_bytes``, unless in
+    use. Concurrent fetches of a key, from threads or pool processes, download it once.
+    """
+
+    def __init__(self, store: BlobStore, root: str | Path, max_bytes: int):
+        self._store = store
+        self._root = Path(root)
+        self._max_bytes = max_bytes
+
+    @contextmanager
+    def fetch(self, key: str) -> Iterator[Path]:
+        """
+        Yields a local path of the blob, downloading it on a miss. The blob is not evicted
+        while in use.
+        """
+        local = self._store.local_path(key)
+        if local is not None:
+            if not local.exists():
+                raise BlobNotFoundError(f"Blob not found: {key}")
+            yield local
+            return
+
+        path = self._root / key
+        downloaded = False
+        while True:
+            with self._locked(path, shared=True):
+                if self._touch(path):
+                    if not downloaded:
+                        BLOB_CACHE.labels("hit").inc()
+                    yield path
+                    return
+            with self._locked(path):
+                # Downloaded by another process while waiting for the lock
+                if not path.exists():
+                    BLOB_CACHE.labels("miss").inc()
+                    partial = path.with_name(f".{path.name}.part")
+                    self._store.download(key, partial)
+                    os.replace(partial, path)
+                    downloaded = True
+            if downloaded:
+                self.evict(keep=path)
+            # Locked again as shared, unless evicted in between (then downloaded again)
+
+    def put(self, key: str, path: str | Path) -> Path:
+        """
+        Stores a local file as a blob and keeps it in the cache, moving it there (on the same
+        file system). Returns the local path of the blob.
+        """
+        self._store.put_file(key, path)
+        local = self._store.local_path(key)
+        if local is not None:
+            return local
+        cached = self._root / key
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, cached)
+        self.evict(keep=cached)
+        return cached
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    @contextmanager
+    def _locked(path: Path, blocking: bool = True, shared: bool = False) -> Iterator[bool]:
+        """
+        Locks a cached blob with a lock file next to it: shared while the blob is read,
+        exclusive while it is downloaded or evicted. Yields False when ``blocking`` is False
+        and the lock is held elsewhere.
+        """
+        lock_path = path.with_name(f".{path.name}.lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        while True:
+            lock = open(lock_path, "a")
+            try:
+                fcntl.flock(lock, operation)
+            except BlockingIOError:
+                lock.close()
+                yield False
+                return
+            try:
+                current = os.stat(lock_path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(lock.fileno()).st_ino:
+                break
+            # Removed by an eviction while waiting: lock the new file instead
+            lock.close()
+        try:
+            yield True
+        finally:
+            lock.close()
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        Removes the least recently used blobs until the cache fits in ``max_bytes``.
+        Returns the number of removed blobs.
+        """
+        blobs = []
+        for path in self._root.rglob("*"):
+            if path.name.startswith("."):
+                continue
+            with suppress(OSError):
+                stat = path.stat()
+                if path.is_file():
+                    blobs.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        for _, size, path in sorted(blobs):
+            if total <= self._max_bytes:
+                break
+            if path == keep:
+                continue
+            with self._locked(path, blocking=False) as locked:
+                if not locked:
+                    # Being downloaded or read
+                    continue
+                path.unlink(missing_ok=True)
+                path.with_name(f".{path.name}.lock").unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+_CACHE: BlobCache | None = None
+_LOCK = threading.Lock()
+
+
+def get_blob_cache() -> BlobCache:
+    global _CACHE
+    if _CACHE is None:
+        with _LOCK:
+            if _CACHE is None:
+                _CACHE = BlobCache(
+                    get_store(), settings.STORAGE_CACHE_DIR, settings.STORAGE_CACHE_MAX_BYTES
+                )
+    return _CACHE
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from src.storage.base import BlobNotFoundError, BlobStore
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs stored as files under a directory, e.g. a volume shared by the API and the workers.
+    Workers read them in place.
+    """
+
+    def __init__(self, root: str | Path):
+        self._root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self._root / key
+
+    def put_file(self, key: str, path: str | Path) -> None:
+        target = self._path(key)
+        if target.exists():
+            os.utime(target)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            try:
+                # Free on the same filesystem, the caller removes its own link
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def size(self, key: str) -> int:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(f"Blob not found: {key}") from e
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        try:
+            with self._path(key).open("rb") as f:
+                f.seek(start)
+                return f.read(length)
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(f"Blob not found: {key}") from e
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def purge(self, max_age: float) -> int:
+        if not self._root.is_dir():
+            return 0
+        removed = 0
+        deadline = time.time() - max_age
+        for path in self._root.rglob("*"):
+            try:
+                if path.is_file() and path.stat().st_mtime < deadline:
+                    path.unlink()
+                    # Temporary files are left behind by interrupted uploads
+                    if not path.name.endswith(".tmp"):
+                        removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
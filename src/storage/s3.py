@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from src.storage.base import (
+    CHUNK_SIZE,
+    KEY_PREFIXES,
+    BlobNotFoundError,
+    BlobStore,
+    StorageError,
+)
+
+_NOT_FOUND = {"404", "NoSuchKey", "NotFound"}
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs stored in an S3 bucket or an S3-compatible store (MinIO, Ceph, R2, ...).
+
+    Uploads are multipart, downloads are ranged reads. Requires ``boto3`` (the ``s3`` extra).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+    ):
+        """
+        :param bucket: Bucket of the blobs.
+        :param prefix: Prepended to every key, to share a bucket.
+        :param endpoint_url: Endpoint of an S3-compatible store, None for AWS.
+        :param access_key_id: Credentials, None uses the default credential chain of boto3.
+        """
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError as e:
+            raise RuntimeError("The s3 storage backend requires boto3 (the s3 extra)") from e
+
+        self._bucket = bucket
+        self._prefix = prefix
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                retries={"max_attempts": 5, "mode": "standard"},
+                # Buckets of S3-compatible stores are rarely resolvable as subdomains
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+        self._transfer = TransferConfig(
+            multipart_threshold=CHUNK_SIZE, multipart_chunksize=CHUNK_SIZE
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    @contextmanager
+    def _errors(self, key: str) -> Iterator[None]:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            yield
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in _NOT_FOUND:
+                raise BlobNotFoundError(f"Blob not found: {key}") from e
+            raise StorageError(f"S3 request failed for {key}: {e}") from e
+        except BotoCoreError as e:
+            raise StorageError(f"S3 request failed for {key}: {e}") from e
+
+    def put_file(self, key: str, path: str | Path) -> None:
+        try:
+            self.size(key)
+        except BlobNotFoundError:
+            with self._errors(key):
+                self._client.upload_file(
+                    str(path), self._bucket, self._key(key), Config=self._transfer
+                )
+            return
+        # Copying an object onto itself renews its last modified time
+        with self._errors(key):
+            self._client.copy_object(
+                Bucket=self._bucket,
+                Key=self._key(key),
+                CopySource={"Bucket": self._bucket, "Key": self._key(key)},
+                MetadataDirective="REPLACE",
+            )
+
+    def size(self, key: str) -> int:
+        with self._errors(key):
+            return self._client.head_object(Bucket=self._bucket, Key=self._key(key))[
+                "ContentLength"
+            ]
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        with self._errors(key):
+            response = self._client.get_object(
+                Bucket=self._bucket, Key=self._key(key), Range=f"bytes={start}-{start + length - 1}"
+            )
+            return response["Body"].read()
+
+    def delete(self, key: str) -> None:
+        with self._errors(key):
+            self._client.delete_object(Bucket=self._bucket, Key=self._key(key))
+
+    def purge(self, max_age: float) -> int:
+        """
+        Removes the expired uploads and PCM artifacts under the prefix. A lifecycle rule of
+        the bucket does the same without listing it.
+        """
+        deadline = time.time() - max_age
+        removed = 0
+        with self._errors(self._prefix):
+            paginator = self._client.get_paginator("list_objects_v2")
+            for prefix in KEY_PREFIXES:
+                for page in paginator.paginate(Bucket=self._bucket, Prefix=self._key(prefix)):
+                    expired = [
+                        {"Key": item["Key"]}
+                        for item in page.get("Contents", ())
+                        if item["LastModified"].timestamp() < deadline
+                    ]
+                    if expired:
+                        # At most 1000 keys per page, the limit of a batch delete
+                        self._client.delete_objects(
+                            Bucket=self._bucket, Delete={"Objects": expired, "Quiet": True}
+                        )
+                        removed += len(expired)
+        return removed
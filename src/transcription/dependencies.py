@@ -1,8 +1,13 @@
-from typing import Annotated, AsyncGenerator, TypeAlias
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncGenerator, AsyncIterator, TypeAlias
+from uuid import UUID
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Response, status
 
+from src import log
 from src.database.config import sqlalchemy_config
+from src.ratelimit import Limits, get_rate_limiter
+from src.security.dependencies import ApiKeyDep
 from src.transcription.services import TranscriptionTaskService
 
 
@@ -14,3 +19,60 @@ async def provide_transcription_task_service() -> AsyncGenerator[TranscriptionTa
 TranscriptionTaskServiceDep: TypeAlias = Annotated[
     TranscriptionTaskService, Depends(provide_transcription_task_service)
 ]
+
+
+class RateLimit:
+    """
+    Rate limits of the API key of a request, reported in the ``RateLimit-*`` headers of the
+    response.
+    """
+
+    def __init__(self, api_key_id: UUID, limits: Limits, response: Response):
+        self.api_key_id = api_key_id
+        self.limits = limits
+        self._response = response
+
+    @asynccontextmanager
+    async def admit(self, task_id: UUID, audio_seconds: float | None) -> AsyncIterator[None]:
+        """
+        Admits a task created in the enclosed block, or raises 429 when a limit of the API key
+        is reached. The task is released if the block fails.
+
+        :param audio_seconds: Duration of the audio, None when unknown before the worker.
+        """
+        if self.limits.unlimited:
+            yield
+            return
+        limiter = get_rate_limiter()
+        admission = await limiter.acquire(self.api_key_id, self.limits, task_id, audio_seconds)
+        if admission is None:
+            # Redis unavailable
+            yield
+            return
+        if admission.exceeded:
+            log.info(
+                "Rate limit reached",
+                api_key_id=str(self.api_key_id),
+                limit=admission.exceeded,
+                audio_seconds=audio_seconds,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Audio allowance exceeded"
+                if admission.exceeded == "audio"
+                else "Too many tasks in progress",
+                headers=admission.headers(),
+            )
+        try:
+            yield
+        except BaseException:
+            await limiter.release(self.api_key_id, task_id)
+            raise
+        self._response.headers.update(admission.headers())
+
+
+async def provide_rate_limit(api_key: ApiKeyDep, response: Response) -> RateLimit:
+    return RateLimit(api_key.id, Limits.of(api_key), response)
+
+
+RateLimitDep: TypeAlias = Annotated[RateLimit, Depends(provide_rate_limit)]
@@ -5,10 +5,9 @@ from typing import TYPE_CHECKING
 from uuid import UUID
 
 from advanced_alchemy.base import UUIDAuditBase
-from advanced_alchemy.types import DateTimeUTC
+from advanced_alchemy.types import DateTimeUTC, JsonB
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database.soft_delete_mixin import SoftDeleteMixin
@@ -31,6 +30,24 @@ class TranscriptionTaskModel(SoftDeleteMixin, UUIDAuditBase):
     """Transcription Task model."""
 
     __tablename__ = "transcription_tasks"
+    __table_args__ = (
+        # Listing of the tasks of an API key, newest first, by keyset pagination
+        Index(
+            "ix_transcription_tasks_api_key_id_created_at",
+            "api_key_id",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_transcription_tasks_api_key_id_status_created_at",
+            "api_key_id",
+            "status",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     status: Mapped[Status] = mapped_column(
         SQLEnum(Status, name="task_status"), default=Status.PENDING, nullable=False
@@ -44,6 +61,7 @@ class TranscriptionTaskModel(SoftDeleteMixin, UUIDAuditBase):
     recognition_mode: Mapped[bool] = mapped_column(default=False)
     num_speakers: Mapped[int | None]
     align_mode: Mapped[bool | None] = mapped_column(default=False)
+    channel_split: Mapped[bool] = mapped_column(default=False, server_default="false")
 
     started_at: Mapped[datetime | None] = mapped_column(DateTimeUTC(timezone=True))
     completed_at: Mapped[datetime | None] = mapped_column(DateTimeUTC(timezone=True))
@@ -51,6 +69,9 @@ class TranscriptionTaskModel(SoftDeleteMixin, UUIDAuditBase):
     duration_seconds: Mapped[float | None]
     file_size_bytes: Mapped[int | None]
 
+    # Per-stage wall time and peak memory, e.g. {"asr": {"wall_s": 12.3, "peak_rss_mb": 2048}}
+    timings: Mapped[dict | None] = mapped_column(JsonB)
+
     api_key_id: Mapped[UUID] = mapped_column(ForeignKey("api_keys.id"))
     api_key: Mapped[ApiKeyModel] = relationship(back_populates="transcription_tasks")
 
@@ -68,6 +89,42 @@ class TranscriptionResultModel(UUIDAuditBase):
         ForeignKey("transcription_tasks.id", ondelete="CASCADE"), unique=True, nullable=False
     )
 
-    transcription_result: Mapped[dict] = mapped_column(JSONB(), nullable=False)
+    transcription_result: Mapped[dict] = mapped_column(JsonB, nullable=False)
 
     task: Mapped[TranscriptionTaskModel] = relationship(back_populates="result")
+
+
+class TaskOutboxModel(UUIDAuditBase):
+    """Transcription tasks waiting to be published to the broker (transactional outbox)."""
+
+    __tablename__ = "task_outbox"
+
+    task_id: Mapped[UUID] = mapped_column(
+        ForeignKey("transcription_tasks.id", ondelete="CASCADE"), unique=True, nullable=False
+    )
+
+    # Keyword arguments of the Celery task
+    payload: Mapped[dict] = mapped_column(JsonB, nullable=False)
+
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    available_at: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True), index=True)
+    last_error: Mapped[str | None]
+
+
+class IdempotencyKeyModel(UUIDAuditBase):
+    """Idempotency-Key of a task submission, so that retried submissions create no new task."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("api_key_id", "key"),)
+
+    api_key_id: Mapped[UUID] = mapped_column(ForeignKey("api_keys.id", ondelete="CASCADE"))
+    key: Mapped[str] = mapped_column(String(255))
+    # SHA-256 of the submission, to reject a key reused for another request
+    fingerprint: Mapped[str] = mapped_column(String(64))
+
+    # None while the first submission is in progress
+    task_id: Mapped[UUID | None] = mapped_column(
+        ForeignKey("transcription_tasks.id", ondelete="CASCADE")
+    )
+
+    expires_at: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True), index=True)
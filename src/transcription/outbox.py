@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from advanced_alchemy.extensions.fastapi import SQLAlchemyAsyncConfig
+from sqlalchemy import delete, select
+
+from src import log
+from src.config import settings
+from src.metrics import OUTBOX_DELAY, OUTBOX_PUBLISHES
+from src.transcription.models import TaskOutboxModel
+from src.utils.retry import backoff_delay
+from src.workers.app import celery_app
+from src.workers.routing import get_router
+
+
+class OutboxRelay:
+    """
+    Publishes the tasks of the outbox table to the broker in the background.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED``, so the relays of several API processes
+    share the work, and deleted once published; failed publishes are retried with backoff.
+    Delivery is at least once: a task published right before a failed commit is published
+    again.
+    """
+
+    def __init__(self, config: SQLAlchemyAsyncConfig, batch_size: int, poll_interval: float):
+        """
+        :param config: Database of the outbox table.
+        :param batch_size: Rows claimed and published per transaction.
+        :param poll_interval: Seconds between scans of the table when idle. New rows written
+            by this process wake the relay up at once (see ``notify``).
+        """
+        self._config = config
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+
+    async def _run(self) -> None:
+        log.debug("Outbox relay started")
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                published = await self.relay_once()
+            except Exception as e:
+                log.error("Outbox relay failed", error=str(e))
+                published = 0
+            if published < self._batch_size:
+                # Drained: wait for new rows
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), self._poll_interval)
+        log.debug("Outbox relay stopped")
+
+    async def relay_once(self) -> int:
+        """
+        Publishes one batch of due rows. Returns the number of published tasks.
+        """
+        now = datetime.now(timezone.utc)
+        async with self._config.get_session() as session:
+            statement = (
+                select(TaskOutboxModel)
+                .where(TaskOutboxModel.available_at <= now)
+                .order_by(TaskOutboxModel.created_at)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = (await session.execute(statement)).scalars().all()
+            if not rows:
+                return 0
+
+            queues = {}
+            for row in rows:
+                queues[row.task_id] = celery_app.conf.task_default_queue
+                if settings.MODEL_ROUTING:
+                    queues[row.task_id] = await get_router().queue_for(row.payload["model"])
+            # Kombu is blocking: publish from a thread, on one pooled broker connection
+            errors = await asyncio.to_thread(self._publish, rows, queues)
+
+            published = []
+            for row in rows:
+                error = errors.get(row.task_id)
+                if error is None:
+                    published.append(row.id)
+                    OUTBOX_PUBLISHES.labels("published").inc()
+                    OUTBOX_DELAY.observe((now - row.created_at).total_seconds())
+                    continue
+                OUTBOX_PUBLISHES.labels("failed").inc()
+                delay = backoff_delay(
+                    row.attempts, settings.OUTBOX_RETRY_BACKOFF, settings.OUTBOX_RETRY_BACKOFF_MAX
+                )
+                row.attempts += 1
+                row.last_error = error
+                row.available_at = now + timedelta(seconds=delay)
+                log.warning(
+                    "Failed to publish task", task_id=str(row.task_id), attempts=row.attempts
+                )
+            if published:
+                await session.execute(
+                    delete(TaskOutboxModel).where(TaskOutboxModel.id.in_(published))
+                )
+            await session.commit()
+        return len(published)
+
+    @staticmethod
+    def _publish(rows: list[TaskOutboxModel], queues: dict[UUID, str]) -> dict[UUID, str]:
+        """
+        Sends the tasks to the broker. Returns the error of every task that failed.
+        """
+        errors = {}
+        try:
+            with celery_app.producer_or_acquire() as producer:
+                for row in rows:
+                    name, queue, kwargs = "transcribe_audio", queues[row.task_id], row.payload
+                    if settings.PREPROCESS_AUDIO and (
+                        "audio_key" in kwargs or "audio_url" in kwargs
+                    ):
+                        # Downloaded (URLs) and decoded on a preprocessing worker first,
+                        # which then enqueues the transcription on the chosen queue
+                        name, queue = "preprocess_audio", settings.PREPROCESS_QUEUE
+                        kwargs = {**kwargs, "asr_queue": queues[row.task_id]}
+                    try:
+                        celery_app.send_task(
+                            name,
+                            task_id=str(row.task_id),
+                            queue=queue,
+                            kwargs=kwargs,
+                            # Queue wait includes the time spent in the outbox
+                            headers={"enqueued_at": row.created_at.timestamp()},
+                            producer=producer,
+                        )
+                    except Exception as e:
+                        errors[row.task_id] = str(e)
+        except Exception as e:
+            # No broker connection
+            return {row.task_id: str(e) for row in rows}
+        return errors
+
+
+_RELAY: OutboxRelay | None = None
+
+
+def start_relay(config: SQLAlchemyAsyncConfig) -> OutboxRelay:
+    global _RELAY
+    _RELAY = OutboxRelay(
+        config,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    )
+    _RELAY.start()
+    return _RELAY
+
+
+def notify_relay() -> None:
+    if _RELAY is not None:
+        _RELAY.notify()
+
+
+async def stop_relay() -> None:
+    global _RELAY
+    if _RELAY is not None:
+        await _RELAY.stop()
+        _RELAY = None
@@ -1,8 +1,17 @@
+from datetime import datetime
+from uuid import UUID
+
 from advanced_alchemy.repository import SQLAlchemyAsyncRepository
-from sqlalchemy import select
+from sqlalchemy import Row, select, tuple_
 from sqlalchemy.orm import selectinload
 
-from .models import TranscriptionResultModel, TranscriptionTaskModel
+from .models import (
+    IdempotencyKeyModel,
+    Status,
+    TaskOutboxModel,
+    TranscriptionResultModel,
+    TranscriptionTaskModel,
+)
 
 
 class TranscriptionTaskRepository(SQLAlchemyAsyncRepository[TranscriptionTaskModel]):
@@ -20,8 +29,60 @@ class TranscriptionTaskRepository(SQLAlchemyAsyncRepository[TranscriptionTaskMod
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
+    async def list_page(
+        self,
+        api_key_id: UUID,
+        limit: int,
+        status: Status | None = None,
+        since: datetime | None = None,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> list[Row]:
+        """
+        Lists the tasks of an API key, newest first, without their result or timings.
+
+        :param after: ``(created_at, id)`` of the last task of the previous page.
+        """
+        task = self.model_type
+        statement = (
+            select(
+                task.id,
+                task.status,
+                task.message,
+                task.model,
+                task.language,
+                task.created_at,
+                task.started_at,
+                task.completed_at,
+                task.duration_seconds,
+                task.file_size_bytes,
+            )
+            .where(task.api_key_id == api_key_id, task.deleted_at.is_(None))
+            .order_by(task.created_at.desc(), task.id.desc())
+            .limit(limit)
+        )
+        if status is not None:
+            statement = statement.where(task.status == status)
+        if since is not None:
+            statement = statement.where(task.created_at >= since)
+        if after is not None:
+            statement = statement.where(tuple_(task.created_at, task.id) < after)
+        result = await self.session.execute(statement)
+        return list(result.all())
+
 
 class TranscriptionResultRepository(SQLAlchemyAsyncRepository[TranscriptionResultModel]):
     """Transcription result repository"""
 
     model_type = TranscriptionResultModel
+
+
+class TaskOutboxRepository(SQLAlchemyAsyncRepository[TaskOutboxModel]):
+    """Task outbox repository"""
+
+    model_type = TaskOutboxModel
+
+
+class IdempotencyKeyRepository(SQLAlchemyAsyncRepository[IdempotencyKeyModel]):
+    """Idempotency key repository"""
+
+    model_type = IdempotencyKeyModel
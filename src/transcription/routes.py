@@ -1,19 +1,33 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, File, Form, UploadFile, status
+from fastapi import APIRouter, File, Form, Header, Query, UploadFile, status
 
 from src.security.dependencies import ApiKeyIdDep
-from src.transcription.dependencies import TranscriptionTaskServiceDep
+from src.transcription.dependencies import RateLimitDep, TranscriptionTaskServiceDep
 from src.transcription.enums import Language, Model
+from src.transcription.models import Status
 from src.transcription.schemas import (
     LanguageList,
     ModelList,
+    TranscribeUrl,
     TranscriptionTask,
+    TranscriptionTaskList,
     TranscriptionTaskWithResult,
 )
 
 router = APIRouter(tags=["Speech Recognition"])
 
+IdempotencyKeyHeader = Annotated[
+    str | None,
+    Header(
+        min_length=1,
+        max_length=255,
+        description="Unique key of the submission: a retry with the same key returns the task "
+        "of the first submission instead of creating another one",
+    ),
+]
+
 
 @router.get(
     "/models",
@@ -47,7 +61,8 @@ async def get_languages() -> LanguageList:
     "/transcribe",
     summary="Transcribe Audio",
     description="""
-        Transcribe audio into text.
+        Transcribe audio into text. Retries with the same `Idempotency-Key` header return
+        the task of the first submission (409 while it is still being submitted).
     """,
     response_model_exclude_none=True,
     responses={
@@ -55,12 +70,18 @@ async def get_languages() -> LanguageList:
             "description": "Transcription job created successfully",
             "model": TranscriptionTask,
         },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Audio allowance or concurrent tasks of the API key exceeded",
+        },
     },
 )
 async def transcribe(
     api_key_id: ApiKeyIdDep,
     transcription_task_service: TranscriptionTaskServiceDep,
-    file: Annotated[UploadFile, File(..., description="Upload file (.mp3, .wav)")],
+    rate_limit: RateLimitDep,
+    file: Annotated[
+        UploadFile, File(..., description="Upload file (WAV, MP3, FLAC, Ogg Vorbis, Opus, M4A)")
+    ],
     language: Annotated[
         Language | None,
         Form(description="Language code for the audio (recommend, auto-detected if not provided)"),
@@ -73,6 +94,14 @@ async def transcribe(
         int | None, Form(ge=1, le=15, description="Number of speakers for diarization")
     ] = None,
     align_mode: Annotated[bool, Form(description="Enable word-level timestamp alignment")] = False,
+    channel_split: Annotated[
+        bool,
+        Form(
+            description="Transcribe the channels of a stereo recording separately, one speaker "
+            "per channel (e.g. call recordings); faster and more exact than speaker detection"
+        ),
+    ] = False,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> TranscriptionTask:
     transcription_task = await transcription_task_service.create_transcription_task(
         api_key_id=api_key_id,
@@ -82,10 +111,77 @@ async def transcribe(
         recognition_mode=recognition_mode,
         num_speakers=num_speakers,
         align_mode=align_mode,
+        channel_split=channel_split,
+        idempotency_key=idempotency_key,
+        rate_limit=rate_limit,
+    )
+    return transcription_task
+
+
+@router.post(
+    "/transcribe/url",
+    summary="Transcribe Audio from URL",
+    description="""
+        Transcribe an audio file downloaded by the worker from an HTTP(S) URL, on one of the
+        hosts allowed by the service. Takes the options of `POST /transcribe`.
+    """,
+    response_model_exclude_none=True,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "Transcription job created successfully",
+            "model": TranscriptionTask,
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Audio allowance or concurrent tasks of the API key exceeded",
+        },
+    },
+)
+async def transcribe_url(
+    body: TranscribeUrl,
+    api_key_id: ApiKeyIdDep,
+    transcription_task_service: TranscriptionTaskServiceDep,
+    rate_limit: RateLimitDep,
+    idempotency_key: IdempotencyKeyHeader = None,
+) -> TranscriptionTask:
+    transcription_task = await transcription_task_service.create_transcription_task_from_url(
+        api_key_id=api_key_id,
+        audio_url=body.url,
+        language=body.language,
+        model=body.model,
+        recognition_mode=body.recognition_mode,
+        num_speakers=body.num_speakers,
+        align_mode=body.align_mode,
+        channel_split=body.channel_split,
+        idempotency_key=idempotency_key,
+        rate_limit=rate_limit,
     )
     return transcription_task
 
 
+@router.get(
+    "/transcribe",
+    summary="List Transcription Tasks",
+    description="""
+        Lists the transcription tasks of the API key, newest first, without their results.
+        Pass the `next_cursor` of a page as `cursor` to get the next one.
+    """,
+    response_model_exclude_none=True,
+)
+async def list_transcription_tasks(
+    api_key_id: ApiKeyIdDep,
+    transcription_task_service: TranscriptionTaskServiceDep,
+    status: Annotated[Status | None, Query(description="Only the tasks in this status")] = None,
+    since: Annotated[
+        datetime | None, Query(description="Only the tasks created at or after this time")
+    ] = None,
+    cursor: Annotated[str | None, Query(max_length=256, description="Cursor of the page")] = None,
+    limit: Annotated[int, Query(ge=1, le=100, description="Tasks per page")] = 50,
+) -> TranscriptionTaskList:
+    return await transcription_task_service.list_transcription_tasks(
+        api_key_id, limit, task_status=status, since=since, cursor=cursor
+    )
+
+
 @router.get(
     "/transcribe/{task_id}",
     summary="Get Transcription Task Status",
@@ -102,8 +198,11 @@ async def get_transcription_task(
     task_id: str,
     api_key_id: ApiKeyIdDep,
     transcription_task_service: TranscriptionTaskServiceDep,
+    include_timings: Annotated[
+        bool, Query(description="Include the per-stage timing breakdown of the task")
+    ] = False,
 ) -> TranscriptionTaskWithResult:
     transcription_task = await transcription_task_service.get_transcription_task(
-        task_id, api_key_id
+        task_id, api_key_id, include_timings=include_timings
     )
     return transcription_task
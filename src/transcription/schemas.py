@@ -2,7 +2,10 @@ from datetime import datetime
 from typing import Self
 from uuid import UUID
 
+from pydantic import Field
+
 from src.schemas import BaseSchema
+from src.transcription.enums import Language, Model
 from src.transcription.models import Status, TranscriptionTaskModel
 
 
@@ -22,6 +25,31 @@ class TranscriptionSegment(BaseSchema):
     end: float
 
 
+class StageTiming(BaseSchema):
+    wall_s: float | None = None
+    peak_rss_mb: float | None = None
+    peak_gpu_mb: float | None = None
+    audio_s: float | None = None
+    rtf: float | None = None
+    batch: int | None = None
+    skipped_s: float | None = None
+
+
+class TranscriptionOptions(BaseSchema):
+    """Options of a transcription task, as the form fields of ``POST /transcribe``."""
+
+    language: Language | None = None
+    model: Model = Model.TURBO
+    recognition_mode: bool = False
+    num_speakers: int | None = Field(default=None, ge=1, le=15)
+    align_mode: bool = False
+    channel_split: bool = False
+
+
+class TranscribeUrl(TranscriptionOptions):
+    url: str = Field(max_length=2048, description="HTTP(S) URL of the audio file")
+
+
 class TranscriptionTask(BaseSchema):
     task_id: UUID
     status: Status
@@ -29,15 +57,33 @@ class TranscriptionTask(BaseSchema):
     message: str | None = None
 
 
+class TranscriptionTaskSummary(TranscriptionTask):
+    model: Model
+    language: Language | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+    duration_seconds: float | None = None
+    file_size_bytes: int | None = None
+
+
+class TranscriptionTaskList(BaseSchema):
+    tasks: list[TranscriptionTaskSummary]
+    next_cursor: str | None = Field(
+        default=None, description="Cursor of the next page, None on the last page"
+    )
+
+
 class TranscriptionTaskWithResult(TranscriptionTask):
     result: list[TranscriptionSegment] | None = None
     started_at: datetime | None = None
     completed_at: datetime | None = None
+    timings: dict[str, StageTiming] | None = None
 
     @classmethod
     def from_model(
         cls,
         model: TranscriptionTaskModel,
+        include_timings: bool = False,
     ) -> Self:
         return cls(
             task_id=model.id,
@@ -58,4 +104,5 @@ class TranscriptionTaskWithResult(TranscriptionTask):
             created_at=model.created_at,
             started_at=model.started_at,
             completed_at=model.completed_at,
+            timings=model.timings if include_timings else None,
         )
@@ -1,17 +1,71 @@
-from contextlib import suppress
-from uuid import UUID
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+from contextlib import nullcontext, suppress
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable
+from uuid import UUID, uuid4
 
 from advanced_alchemy.extensions.fastapi import service
 from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
 
 from .enums import Language, Model
-from .models import Status, TranscriptionTaskModel
-from .repositories import TranscriptionResultRepository, TranscriptionTaskRepository
-from .schemas import TranscriptionTask, TranscriptionTaskWithResult
+from .models import IdempotencyKeyModel, Status, TaskOutboxModel, TranscriptionTaskModel
+from .outbox import notify_relay
+from .repositories import (
+    IdempotencyKeyRepository,
+    TaskOutboxRepository,
+    TranscriptionResultRepository,
+    TranscriptionTaskRepository,
+)
+from .schemas import (
+    TranscriptionTask,
+    TranscriptionTaskList,
+    TranscriptionTaskSummary,
+    TranscriptionTaskWithResult,
+)
 from .. import log
+from ..config import settings
+from ..storage import content_key, get_store
+from ..utils.download import is_allowed_url
 from ..utils.files import save_upload_to_temp
-from ..utils.media import get_duration_seconds, get_filesize_bytes
-from ..workers.app import celery_app
+from ..utils.media import get_filesize_bytes, probe_audio
+
+if TYPE_CHECKING:
+    from .dependencies import RateLimit
+
+
+def _fingerprint(**request) -> str:
+    """
+    Returns the SHA-256 of the parameters of a submission.
+    """
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def _encode_cursor(created_at: datetime, task_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()},{task_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Returns the ``(created_at, id)`` of the last task of a page.
+
+    :raises ValueError: The cursor is not one of ``_encode_cursor``.
+    """
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(cursor).decode().split(",")
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        raise ValueError("Invalid cursor")
+    return created_at, UUID(task_id)
 
 
 class TranscriptionTaskService(
@@ -25,6 +79,8 @@ class TranscriptionTaskService(
         kwargs.setdefault("auto_commit", True)
         super().__init__(session=session, **kwargs)
         self.result_repository = TranscriptionResultRepository(session=session)
+        self.outbox_repository = TaskOutboxRepository(session=session)
+        self.idempotency_repository = IdempotencyKeyRepository(session=session)
 
     async def create_transcription_task(
         self,
@@ -35,31 +91,176 @@ class TranscriptionTaskService(
         recognition_mode: bool,
         num_speakers: int | None,
         align_mode: bool,
+        channel_split: bool = False,
+        idempotency_key: str | None = None,
+        rate_limit: "RateLimit | None" = None,
     ) -> TranscriptionTask:
-        try:
-            audio_path = await save_upload_to_temp(file)
-        except ValueError as e:
-            with suppress(Exception):
-                await file.close()
+        """
+        :param idempotency_key: Key of the submission: retries with the same key return the
+            task of the first submission, without storing or enqueuing the audio again.
+        :param rate_limit: Limits of the API key, checked before the audio is stored.
+        """
+
+        async def create() -> TranscriptionTask:
+            try:
+                audio_path, digest = await save_upload_to_temp(file)
+            except ValueError as e:
+                with suppress(Exception):
+                    await file.close()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid audio file",
+                ) from e
+            else:
+                with suppress(Exception):
+                    await file.close()
+            try:
+                return await self.create_transcription_task_from_file(
+                    api_key_id=api_key_id,
+                    audio_path=audio_path,
+                    digest=digest,
+                    model=model,
+                    language=language,
+                    recognition_mode=recognition_mode,
+                    num_speakers=num_speakers,
+                    align_mode=align_mode,
+                    channel_split=channel_split,
+                    idempotency_key=idempotency_key,
+                    rate_limit=rate_limit,
+                )
+            finally:
+                with suppress(FileNotFoundError):
+                    os.remove(audio_path)
+
+        # The content is not hashed before the key is checked: retries are told apart by the
+        # name and size of the file
+        fingerprint = _fingerprint(
+            file=file.filename,
+            size=file.size,
+            model=model,
+            language=language,
+            recognition_mode=recognition_mode,
+            num_speakers=num_speakers,
+            align_mode=align_mode,
+            channel_split=channel_split,
+        )
+        return await self._idempotent(api_key_id, idempotency_key, fingerprint, create)
+
+    async def create_transcription_task_from_file(
+        self,
+        api_key_id: UUID,
+        audio_path: str,
+        digest: str,
+        model: Model,
+        language: Language | None,
+        recognition_mode: bool,
+        num_speakers: int | None,
+        align_mode: bool,
+        channel_split: bool = False,
+        suffix: str | None = None,
+        idempotency_key: str | None = None,
+        rate_limit: "RateLimit | None" = None,
+    ) -> TranscriptionTask:
+        """
+        Creates a task from an audio file received in full, which is left in place.
+
+        :param digest: SHA-256 of the file.
+        :param suffix: Extension of the audio format, the one of ``audio_path`` by default.
+        :param idempotency_key: Key claimed by the submission, linked to the new task.
+        :param rate_limit: Limits of the API key, checked before the audio is stored.
+        """
+        duration_seconds, file_size_bytes = await self._probe_upload(audio_path, channel_split)
+
+        task_id = uuid4()
+        async with rate_limit.admit(task_id, duration_seconds) if rate_limit else nullcontext():
+            audio_key = await self._store_upload(
+                audio_path, digest, suffix or Path(audio_path).suffix
+            )
+            return await self._create_task(
+                task_id=task_id,
+                api_key_id=api_key_id,
+                source={"audio_key": audio_key},
+                model=model,
+                language=language,
+                recognition_mode=recognition_mode,
+                num_speakers=num_speakers,
+                align_mode=align_mode,
+                channel_split=channel_split,
+                duration_seconds=duration_seconds,
+                file_size_bytes=file_size_bytes,
+                idempotency_key=idempotency_key,
+            )
+
+    async def create_transcription_task_from_url(
+        self,
+        api_key_id: UUID,
+        audio_url: str,
+        model: Model,
+        language: Language | None,
+        recognition_mode: bool,
+        num_speakers: int | None,
+        align_mode: bool,
+        channel_split: bool = False,
+        idempotency_key: str | None = None,
+        rate_limit: "RateLimit | None" = None,
+    ) -> TranscriptionTask:
+        """
+        Creates a task from audio the worker downloads from ``audio_url``; its duration and
+        size are recorded by the worker.
+
+        :param idempotency_key: Key of the submission, as in ``create_transcription_task``.
+        :param rate_limit: Limits of the API key; the audio is charged by the worker.
+        """
+        if not is_allowed_url(audio_url):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid audio file",
-            ) from e
-        else:
-            with suppress(Exception):
-                await file.close()
-        try:
-            duration_seconds = get_duration_seconds(audio_path)
-        except Exception as e:
-            log.error("Failed to get audio duration", path=audio_path, error=str(e))
-            duration_seconds = None
-        try:
-            file_size_bytes = get_filesize_bytes(audio_path)
-        except Exception as e:
-            log.error("Failed to get file size", path=audio_path, error=str(e))
-            file_size_bytes = None
+                detail="URL not allowed",
+            )
+        options = {
+            "model": model,
+            "language": language,
+            "recognition_mode": recognition_mode,
+            "num_speakers": num_speakers,
+            "align_mode": align_mode,
+            "channel_split": channel_split,
+        }
 
+        async def create() -> TranscriptionTask:
+            task_id = uuid4()
+            async with rate_limit.admit(task_id, None) if rate_limit else nullcontext():
+                return await self._create_task(
+                    task_id=task_id,
+                    api_key_id=api_key_id,
+                    source={"audio_url": audio_url},
+                    idempotency_key=idempotency_key,
+                    **options,
+                )
+
+        fingerprint = _fingerprint(url=audio_url, **options)
+        return await self._idempotent(api_key_id, idempotency_key, fingerprint, create)
+
+    async def _create_task(
+        self,
+        task_id: UUID,
+        api_key_id: UUID,
+        source: dict,
+        model: Model,
+        language: Language | None,
+        recognition_mode: bool,
+        num_speakers: int | None,
+        align_mode: bool,
+        channel_split: bool,
+        duration_seconds: float | None = None,
+        file_size_bytes: int | None = None,
+        idempotency_key: str | None = None,
+    ) -> TranscriptionTask:
+        """
+        :param source: Where the worker reads the audio from (``audio_key`` or ``audio_url``).
+        :param idempotency_key: Key claimed by the submission, linked to the task in the same
+            transaction.
+        """
         transcription_task_model = TranscriptionTaskModel(
+            id=task_id,
             api_key_id=api_key_id,
             status=Status.PENDING,
             model=model,
@@ -67,25 +268,45 @@ class TranscriptionTaskService(
             align_mode=align_mode,
             recognition_mode=recognition_mode,
             num_speakers=num_speakers,
+            channel_split=channel_split,
             message="Task created and queued for processing.",
             duration_seconds=duration_seconds,
             file_size_bytes=file_size_bytes,
         )
 
-        transcription_task_model = await self.create(transcription_task_model)
-
-        celery_app.send_task(
-            "transcribe_audio",
-            task_id=str(transcription_task_model.id),
-            kwargs={
-                "audio_file": audio_path,
-                "model": model.value,
-                "language": language.value if language else None,
-                "recognition_mode": recognition_mode,
-                "num_speakers": num_speakers,
-                "align_mode": align_mode,
-            },
+        # The task is published to the broker by the outbox relay, never from the request
+        transcription_task_model = await self.create(transcription_task_model, auto_commit=False)
+        await self.outbox_repository.add(
+            TaskOutboxModel(
+                task_id=transcription_task_model.id,
+                payload={
+                    **source,
+                    "model": model.value,
+                    "language": language.value if language else None,
+                    "recognition_mode": recognition_mode,
+                    "num_speakers": num_speakers,
+                    "align_mode": align_mode,
+                    "channel_split": channel_split,
+                },
+                available_at=datetime.now(timezone.utc),
+            ),
+            auto_commit=False,
         )
+        if idempotency_key is not None:
+            await self.repository.session.execute(
+                update(IdempotencyKeyModel)
+                .where(
+                    IdempotencyKeyModel.api_key_id == api_key_id,
+                    IdempotencyKeyModel.key == idempotency_key,
+                )
+                .values(
+                    task_id=transcription_task_model.id,
+                    expires_at=datetime.now(timezone.utc)
+                    + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+            )
+        await self.repository.session.commit()
+        notify_relay()
 
         return TranscriptionTask(
             task_id=transcription_task_model.id,
@@ -94,10 +315,156 @@ class TranscriptionTaskService(
             message=transcription_task_model.message,
         )
 
+    async def _idempotent(
+        self,
+        api_key_id: UUID,
+        idempotency_key: str | None,
+        fingerprint: str,
+        create: Callable[[], Awaitable[TranscriptionTask]],
+    ) -> TranscriptionTask:
+        """
+        Creates a task with ``create`` once per Idempotency-Key of an API key; later
+        submissions with the key get that task back.
+        """
+        if idempotency_key is None:
+            return await create()
+        replayed = await self._claim_idempotency_key(api_key_id, idempotency_key, fingerprint)
+        if replayed is not None:
+            return replayed
+        try:
+            return await create()
+        except BaseException:
+            # No task: the client may retry with the same key
+            await self.repository.session.rollback()
+            await self.repository.session.execute(
+                delete(IdempotencyKeyModel).where(
+                    IdempotencyKeyModel.api_key_id == api_key_id,
+                    IdempotencyKeyModel.key == idempotency_key,
+                    IdempotencyKeyModel.task_id.is_(None),
+                )
+            )
+            await self.repository.session.commit()
+            raise
+
+    async def _claim_idempotency_key(
+        self, api_key_id: UUID, idempotency_key: str, fingerprint: str
+    ) -> TranscriptionTask | None:
+        """
+        Claims an Idempotency-Key for a new submission, or returns the task of the submission
+        that claimed it first.
+        """
+        session = self.repository.session
+        now = datetime.now(timezone.utc)
+        claim = await self.idempotency_repository.get_one_or_none(
+            api_key_id=api_key_id, key=idempotency_key
+        )
+        if claim is not None and claim.expires_at <= now:
+            # Past its TTL, or abandoned by a submission that did not finish
+            await self.idempotency_repository.delete(claim.id, auto_commit=False)
+            claim = None
+
+        if claim is None:
+            try:
+                # The unique constraint lets one of concurrent duplicates through
+                async with session.begin_nested():
+                    session.add(
+                        IdempotencyKeyModel(
+                            api_key_id=api_key_id,
+                            key=idempotency_key,
+                            fingerprint=fingerprint,
+                            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE),
+                        )
+                    )
+            except IntegrityError:
+                claim = await self.idempotency_repository.get_one(
+                    api_key_id=api_key_id, key=idempotency_key
+                )
+            else:
+                await session.commit()
+                return None
+
+        if claim.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key already used for another request",
+            )
+        if claim.task_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is in progress",
+                headers={"Retry-After": "1"},
+            )
+        task = await self.get(claim.task_id)
+        await session.commit()
+        return TranscriptionTask(
+            task_id=task.id,
+            status=task.status,
+            created_at=task.created_at,
+            message=task.message,
+        )
+
+    @staticmethod
+    async def _probe_upload(audio_path: str, channel_split: bool) -> tuple[float, int | None]:
+        """
+        Probes the temporary copy of an upload; audio that cannot be read is rejected.
+
+        :return: The duration and size of the audio.
+        """
+        try:
+            # Headers only, but still file I/O: off the event loop
+            info = await asyncio.to_thread(probe_audio, audio_path)
+        except Exception as e:
+            log.warning("Failed to probe audio", path=audio_path, error=str(e))
+            info = None
+        if info is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid audio file",
+            )
+        duration_seconds = info.duration_seconds
+        log.debug(
+            "Probed upload",
+            path=audio_path,
+            duration_seconds=duration_seconds,
+            sample_rate=info.sample_rate,
+            channels=info.channels,
+        )
+        try:
+            file_size_bytes = get_filesize_bytes(audio_path)
+        except Exception as e:
+            log.error("Failed to get file size", path=audio_path, error=str(e))
+            file_size_bytes = None
+
+        if channel_split and info.channels != 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Channel split requires a stereo (two-channel) recording",
+            )
+        return duration_seconds, file_size_bytes
+
+    @staticmethod
+    async def _store_upload(audio_path: str, digest: str, suffix: str) -> str:
+        """
+        Stores the temporary copy of an upload in the blob store.
+
+        :return: The key of the audio in the blob store.
+        """
+        audio_key = content_key(digest, suffix)
+        try:
+            await asyncio.to_thread(get_store().put_file, audio_key, audio_path)
+        except OSError as e:
+            log.error("Failed to store the upload", key=audio_key, error=str(e))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Audio storage unavailable",
+            ) from e
+        return audio_key
+
     async def get_transcription_task(
         self,
         task_id: str,
         api_key_id: UUID,
+        include_timings: bool = False,
     ) -> TranscriptionTaskWithResult:
         try:
             task_uuid = UUID(task_id)
@@ -115,4 +482,58 @@ class TranscriptionTaskService(
                 detail="Transcription task not found",
             )
 
-        return TranscriptionTaskWithResult.from_model(transcription_task)
+        return TranscriptionTaskWithResult.from_model(
+            transcription_task, include_timings=include_timings
+        )
+
+    async def list_transcription_tasks(
+        self,
+        api_key_id: UUID,
+        limit: int,
+        task_status: Status | None = None,
+        since: datetime | None = None,
+        cursor: str | None = None,
+    ) -> TranscriptionTaskList:
+        """
+        Lists the tasks of an API key, newest first, by keyset pagination on
+        ``(created_at, id)``: pages stay stable while tasks are created.
+
+        :param since: Only the tasks created at or after this time.
+        :param cursor: ``next_cursor`` of the previous page.
+        """
+        try:
+            after = _decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Invalid cursor",
+            ) from e
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        # One more row tells whether there is a next page
+        rows = await self.repository.list_page(
+            api_key_id, limit + 1, status=task_status, since=since, after=after
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+        return TranscriptionTaskList(
+            tasks=[
+                TranscriptionTaskSummary(
+                    task_id=row.id,
+                    status=row.status,
+                    message=row.message,
+                    created_at=row.created_at,
+                    model=row.model,
+                    language=row.language,
+                    started_at=row.started_at,
+                    completed_at=row.completed_at,
+                    duration_seconds=row.duration_seconds,
+                    file_size_bytes=row.file_size_bytes,
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
@@ -0,0 +1,16 @@
+from typing import Annotated, AsyncGenerator, TypeAlias
+
+from fastapi import Depends
+
+from src.database.config import sqlalchemy_config
+from src.uploads.services import UploadSessionService
+
+
+async def provide_upload_session_service() -> AsyncGenerator[UploadSessionService, None]:
+    async with UploadSessionService.new(config=sqlalchemy_config) as service:
+        yield service
+
+
+UploadSessionServiceDep: TypeAlias = Annotated[
+    UploadSessionService, Depends(provide_upload_session_service)
+]
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID
+
+from advanced_alchemy.base import UUIDAuditBase
+from advanced_alchemy.types import DateTimeUTC
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class UploadSessionModel(UUIDAuditBase):
+    """Resumable upload in progress; its content is a file of ``UPLOAD_DIR``."""
+
+    __tablename__ = "upload_sessions"
+
+    api_key_id: Mapped[UUID] = mapped_column(
+        ForeignKey("api_keys.id", ondelete="CASCADE"), index=True
+    )
+    filename: Mapped[str | None]
+
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    # Bytes received so far, the offset of the next chunk
+    received_bytes: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+
+    expires_at: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True), index=True)
@@ -0,0 +1,9 @@
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+
+from .models import UploadSessionModel
+
+
+class UploadSessionRepository(SQLAlchemyAsyncRepository[UploadSessionModel]):
+    """Upload session repository"""
+
+    model_type = UploadSessionModel
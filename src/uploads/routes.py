@@ -0,0 +1,135 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Header, Request, status
+
+from src.security.dependencies import ApiKeyIdDep
+from src.transcription.dependencies import RateLimitDep, TranscriptionTaskServiceDep
+from src.transcription.schemas import TranscriptionTask
+from src.uploads.dependencies import UploadSessionServiceDep
+from src.uploads.schemas import CompleteUpload, CreateUpload, Upload
+
+router = APIRouter(tags=["Resumable Uploads"])
+
+
+@router.post(
+    "/uploads",
+    summary="Create Upload",
+    description="""
+        Starts a resumable upload of a file of the given size. The file is then sent in chunks
+        with `PUT /uploads/{upload_id}` and transcribed with `POST /uploads/{upload_id}/transcribe`.
+        Uploads not resumed for a day are removed.
+    """,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload(
+    body: CreateUpload,
+    api_key_id: ApiKeyIdDep,
+    upload_service: UploadSessionServiceDep,
+) -> Upload:
+    return await upload_service.create_upload(api_key_id, body.size, body.filename)
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    summary="Get Upload",
+    description="Returns the offset of an upload, where to resume it.",
+)
+async def get_upload(
+    upload_id: UUID,
+    api_key_id: ApiKeyIdDep,
+    upload_service: UploadSessionServiceDep,
+) -> Upload:
+    return await upload_service.get_upload(upload_id, api_key_id)
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    summary="Upload Chunk",
+    description="""
+        Appends the request body to an upload. `Upload-Offset` must be the offset of the
+        upload (the bytes received so far), or the chunk is rejected with 409 and the current
+        offset in the `Upload-Offset` response header. After a failure, resume from the offset
+        returned by `GET /uploads/{upload_id}`.
+    """,
+    responses={
+        status.HTTP_409_CONFLICT: {"description": "Wrong offset or concurrent chunk"},
+        status.HTTP_413_CONTENT_TOO_LARGE: {"description": "Chunk past the size of the upload"},
+    },
+)
+async def upload_chunk(
+    upload_id: UUID,
+    request: Request,
+    api_key_id: ApiKeyIdDep,
+    upload_service: UploadSessionServiceDep,
+    upload_offset: Annotated[int, Header(ge=0, description="Offset of the chunk")],
+    content_length: Annotated[int | None, Header(ge=0)] = None,
+) -> Upload:
+    return await upload_service.write_chunk(
+        upload_id,
+        api_key_id,
+        offset=upload_offset,
+        chunks=request.stream(),
+        content_length=content_length,
+    )
+
+
+@router.post(
+    "/uploads/{upload_id}/transcribe",
+    summary="Transcribe Upload",
+    description="""
+        Creates a transcription task from a complete upload, which is then removed. Takes the
+        options of `POST /transcribe`.
+    """,
+    response_model_exclude_none=True,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "Transcription job created successfully",
+            "model": TranscriptionTask,
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Audio allowance or concurrent tasks of the API key exceeded",
+        },
+        status.HTTP_409_CONFLICT: {"description": "Upload incomplete"},
+    },
+)
+async def transcribe_upload(
+    upload_id: UUID,
+    body: CompleteUpload,
+    api_key_id: ApiKeyIdDep,
+    upload_service: UploadSessionServiceDep,
+    transcription_task_service: TranscriptionTaskServiceDep,
+    rate_limit: RateLimitDep,
+) -> TranscriptionTask:
+    async with upload_service.complete_upload(upload_id, api_key_id) as (
+        audio_path,
+        digest,
+        suffix,
+    ):
+        return await transcription_task_service.create_transcription_task_from_file(
+            api_key_id=api_key_id,
+            audio_path=audio_path,
+            digest=digest,
+            suffix=suffix,
+            model=body.model,
+            language=body.language,
+            recognition_mode=body.recognition_mode,
+            num_speakers=body.num_speakers,
+            align_mode=body.align_mode,
+            channel_split=body.channel_split,
+            rate_limit=rate_limit,
+        )
+
+
+@router.delete(
+    "/uploads/{upload_id}",
+    summary="Delete Upload",
+    description="Abandons an upload and removes what was received.",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_upload(
+    upload_id: UUID,
+    api_key_id: ApiKeyIdDep,
+    upload_service: UploadSessionServiceDep,
+) -> None:
+    await upload_service.delete_upload(upload_id, api_key_id)
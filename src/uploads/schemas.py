@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Self
+from uuid import UUID
+
+from pydantic import Field
+
+from src.config import settings
+from src.schemas import BaseSchema
+from src.transcription.schemas import TranscriptionOptions
+from src.uploads.models import UploadSessionModel
+
+
+class CreateUpload(BaseSchema):
+    size: int = Field(gt=0, le=settings.UPLOAD_MAX_BYTES, description="Size of the file in bytes")
+    filename: str | None = Field(default=None, max_length=255)
+
+
+class Upload(BaseSchema):
+    upload_id: UUID
+    size: int
+    offset: int = Field(description="Bytes received so far, the offset of the next chunk")
+    expires_at: datetime
+
+    @classmethod
+    def from_model(cls, model: UploadSessionModel) -> Self:
+        return cls(
+            upload_id=model.id,
+            size=model.size_bytes,
+            offset=model.received_bytes,
+            expires_at=model.expires_at,
+        )
+
+
+class CompleteUpload(TranscriptionOptions):
+    """Options of the transcription task of a completed upload."""
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import hashlib
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator
+from uuid import UUID
+
+from advanced_alchemy.extensions.fastapi import service
+from fastapi import HTTPException, status
+from sqlalchemy import delete, update
+from starlette.requests import ClientDisconnect
+
+from .. import log
+from ..config import settings
+from ..utils.media import SNIFF_BYTES, sniff_format
+from .models import UploadSessionModel
+from .repositories import UploadSessionRepository
+from .schemas import Upload
+
+# Chunks are written to disk and hashed in blocks of this size, off the event loop
+WRITE_BLOCK = 2**20
+
+
+def upload_path(upload_id: UUID) -> Path:
+    return Path(settings.UPLOAD_DIR) / f"{upload_id}.part"
+
+
+class _Digests:
+    """
+    SHA-256 of the received part of the uploads, updated as the chunks arrive, so completing
+    an upload does not read it again. Kept per process: after a chunk received by another
+    process (or a restart), the received part is hashed again from the file.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self._entries: OrderedDict[UUID, tuple[int, hashlib._Hash]] = OrderedDict()
+        self._max_entries = max_entries
+
+    def pop(self, upload_id: UUID, offset: int) -> hashlib._Hash | None:
+        """
+        Takes the digest of the first ``offset`` bytes of an upload, if known.
+        """
+        entry = self._entries.pop(upload_id, None)
+        if entry is None or entry[0] != offset:
+            return None
+        return entry[1]
+
+    def put(self, upload_id: UUID, offset: int, digest: hashlib._Hash) -> None:
+        self._entries[upload_id] = (offset, digest)
+        self._entries.move_to_end(upload_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, upload_id: UUID) -> None:
+        self._entries.pop(upload_id, None)
+
+
+_DIGESTS = _Digests()
+
+
+def forget_upload(upload_id: UUID) -> None:
+    """
+    Drops what this process keeps of a removed upload.
+    """
+    _DIGESTS.discard(upload_id)
+
+
+def _hash_prefix(f: BinaryIO, length: int) -> hashlib._Hash:
+    digest = hashlib.sha256()
+    f.seek(0)
+    while length > 0:
+        block = f.read(min(WRITE_BLOCK, length))
+        if not block:
+            raise RuntimeError("Upload file shorter than the received bytes")
+        digest.update(block)
+        length -= len(block)
+    return digest
+
+
+def _write(f: BinaryIO, digest: hashlib._Hash, block: bytes) -> None:
+    f.write(block)
+    digest.update(block)
+
+
+async def _blocks(chunks: AsyncIterator[bytes], size: int) -> AsyncIterator[bytes]:
+    """
+    Regroups the pieces of a request body into blocks of at least ``size`` bytes.
+    """
+    block = bytearray()
+    async for data in chunks:
+        block += data
+        if len(block) >= size:
+            yield bytes(block)
+            block.clear()
+    if block:
+        yield bytes(block)
+
+
+class UploadSessionService(
+    service.SQLAlchemyAsyncRepositoryService[UploadSessionModel, UploadSessionRepository]
+):
+    """
+    Resumable uploads: a session is created with the size of the file, which is then sent in
+    chunks, each at the offset where the previous one stopped, straight into a file of
+    ``UPLOAD_DIR``. Once complete, the upload becomes a transcription task.
+    """
+
+    repository_type = UploadSessionRepository
+
+    def __init__(self, session, **kwargs):
+        kwargs.setdefault("auto_commit", True)
+        super().__init__(session=session, **kwargs)
+
+    async def create_upload(self, api_key_id: UUID, size: int, filename: str | None) -> Upload:
+        upload = await self.create(
+            UploadSessionModel(
+                api_key_id=api_key_id,
+                filename=filename,
+                size_bytes=size,
+                received_bytes=0,
+                expires_at=self._expires_at(),
+            )
+        )
+        return Upload.from_model(upload)
+
+    async def get_upload(self, upload_id: UUID, api_key_id: UUID) -> Upload:
+        return Upload.from_model(await self._get_owned(upload_id, api_key_id))
+
+    async def write_chunk(
+        self,
+        upload_id: UUID,
+        api_key_id: UUID,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        content_length: int | None = None,
+    ) -> Upload:
+        """
+        Writes a chunk at ``offset``, which must be the number of bytes received so far.
+
+        Bytes received before the client disconnects are kept, so the next chunk starts after
+        them.
+        """
+        upload = await self._get_owned(upload_id, api_key_id)
+        size, received = upload.size_bytes, upload.received_bytes
+        # Do not hold a transaction (and a pooled connection) while the chunk streams in
+        await self.repository.session.commit()
+        if offset != received:
+            raise self._offset_conflict("Offset does not match the received bytes", received)
+        if content_length is not None and offset + content_length > size:
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail="Chunk exceeds the size of the upload",
+            )
+
+        written, expires_at = 0, self._expires_at()
+        with self._locked_file(upload_id) as f:
+            digest = _DIGESTS.pop(upload_id, offset)
+            if digest is None:
+                digest = await asyncio.to_thread(_hash_prefix, f, offset)
+            f.seek(offset)
+            try:
+                async for block in _blocks(chunks, WRITE_BLOCK):
+                    if offset + written + len(block) > size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail="Chunk exceeds the size of the upload",
+                        )
+                    await asyncio.to_thread(_write, f, digest, block)
+                    written += len(block)
+            except ClientDisconnect:
+                log.info("Upload interrupted", upload_id=str(upload_id), offset=offset + written)
+            finally:
+                # Drops what a failed chunk wrote past the received bytes
+                await asyncio.to_thread(f.truncate, offset + written)
+                advanced = await self._advance(upload_id, offset, offset + written, expires_at)
+                if advanced:
+                    _DIGESTS.put(upload_id, offset + written, digest)
+
+        if not advanced:
+            # Completed, deleted or expired meanwhile
+            raise self._offset_conflict("Upload changed during the chunk", offset)
+        return Upload(
+            upload_id=upload_id,
+            size=size,
+            offset=offset + written,
+            expires_at=expires_at,
+        )
+
+    @asynccontextmanager
+    async def complete_upload(
+        self, upload_id: UUID, api_key_id: UUID
+    ) -> AsyncIterator[tuple[str, str, str]]:
+        """
+        Claims a complete upload and identifies its format, for a transcription task created
+        in the enclosed block. The upload is removed once the block succeeds, and can be
+        completed again if it fails.
+
+        The session is deleted first, so concurrent completions (and chunks) of the upload
+        find it gone: a single task is created.
+
+        :return: The path of the file, its SHA-256 and the extension of its format.
+        """
+        upload = await self._claim_complete(upload_id, api_key_id)
+        size = upload.size_bytes
+        try:
+            with self._locked_file(upload_id, create=False) as f:
+                digest = _DIGESTS.pop(upload_id, size)
+                if digest is None:
+                    digest = await asyncio.to_thread(_hash_prefix, f, size)
+                f.seek(0)
+                head = f.read(SNIFF_BYTES)
+        except FileNotFoundError as e:
+            # Removed with an expired session: nothing left to complete
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found",
+            ) from e
+        except BaseException:
+            await self._restore(upload)
+            raise
+
+        try:
+            suffix = sniff_format(head)
+            if suffix is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid audio file",
+                )
+            yield str(upload_path(upload_id)), digest.hexdigest(), suffix
+        except BaseException:
+            # Kept for the next completion
+            _DIGESTS.put(upload_id, size, digest)
+            await self._restore(upload)
+            raise
+        forget_upload(upload_id)
+        await asyncio.to_thread(upload_path(upload_id).unlink, missing_ok=True)
+
+    async def delete_upload(self, upload_id: UUID, api_key_id: UUID) -> None:
+        await self._get_owned(upload_id, api_key_id)
+        await self.delete(upload_id)
+        forget_upload(upload_id)
+        await asyncio.to_thread(upload_path(upload_id).unlink, missing_ok=True)
+
+    async def _claim_complete(self, upload_id: UUID, api_key_id: UUID) -> UploadSessionModel:
+        """
+        Deletes the session of a complete upload, returning it, unless another completion
+        claimed it first.
+        """
+        session = self.repository.session
+        result = await session.execute(
+            delete(UploadSessionModel)
+            .where(
+                UploadSessionModel.id == upload_id,
+                UploadSessionModel.api_key_id == api_key_id,
+                UploadSessionModel.received_bytes == UploadSessionModel.size_bytes,
+            )
+            .returning(
+                UploadSessionModel.id,
+                UploadSessionModel.api_key_id,
+                UploadSessionModel.filename,
+                UploadSessionModel.size_bytes,
+                UploadSessionModel.received_bytes,
+                UploadSessionModel.expires_at,
+                UploadSessionModel.created_at,
+            )
+        )
+        row = result.one_or_none()
+        await session.commit()
+        if row is None:
+            upload = await self._get_owned(upload_id, api_key_id)
+            raise self._offset_conflict("Upload incomplete", upload.received_bytes)
+        return UploadSessionModel(**row._asdict())
+
+    async def _restore(self, upload: UploadSessionModel) -> None:
+        """
+        Puts back the session of an upload whose completion failed.
+        """
+        session = self.repository.session
+        await session.rollback()
+        session.add(upload)
+        await session.commit()
+
+    async def _get_owned(self, upload_id: UUID, api_key_id: UUID) -> UploadSessionModel:
+        upload = await self.get_one_or_none(id=upload_id)
+        if upload is None or upload.api_key_id != api_key_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found",
+            )
+        return upload
+
+    async def _advance(
+        self, upload_id: UUID, offset: int, new_offset: int, expires_at: datetime
+    ) -> bool:
+        """
+        Records the received bytes, unless another chunk or a deletion got there first.
+        """
+        result = await self.repository.session.execute(
+            update(UploadSessionModel)
+            .where(
+                UploadSessionModel.id == upload_id,
+                UploadSessionModel.received_bytes == offset,
+            )
+            .values(received_bytes=new_offset, expires_at=expires_at)
+        )
+        await self.repository.session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    @contextmanager
+    def _locked_file(upload_id: UUID, create: bool = True) -> Iterator[BinaryIO]:
+        """
+        Opens the file of an upload, locked against concurrent chunks.
+
+        :param create: Create the file if missing, else raise ``FileNotFoundError``.
+        """
+        path = upload_path(upload_id)
+        flags = os.O_RDWR
+        if create:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            flags |= os.O_CREAT
+        f = open(os.open(path, flags, 0o600), "r+b")
+        try:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Another chunk of the upload is in progress",
+                ) from e
+            yield f
+        finally:
+            f.close()
+
+    @staticmethod
+    def _offset_conflict(detail: str, offset: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail,
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    @staticmethod
+    def _expires_at() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_EXPIRES)
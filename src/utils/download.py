@@ -0,0 +1,131 @@
+"""
+Streaming downloads of the audio submitted by URL (``POST /transcribe/url``), run by the
+workers so that the API handles no audio bytes.
+
+Only the hosts of ``URL_ALLOWED_HOSTS`` are reached, redirects included. Downloads are
+bounded in size (``URL_MAX_BYTES``), time between reads (``URL_TIMEOUT``) and number at once
+per host (``URL_DOWNLOADS``, shared by the worker processes).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import http.client
+import os
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from src.config import settings
+from src.utils.media import SNIFF_BYTES, sniff_format
+from src.utils.retry import FatalError
+
+CHUNK = 2**20
+# Statuses of transient failures, retried with the task; other errors are final
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def is_allowed_url(url: str) -> bool:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    return any(fnmatch(parts.hostname, host.lower()) for host in settings.URL_ALLOWED_HOSTS)
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_allowed_url(newurl):
+            raise FatalError(f"Redirected to a URL not allowed: {newurl}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_OPENER = urllib.request.build_opener(_RedirectHandler)
+
+
+def download(url: str, directory: str | Path) -> tuple[Path, str, str]:
+    """
+    Streams the file at ``url`` to a new temporary file in ``directory``, hashing it on the
+    way. Network errors and transient HTTP errors are raised as ``OSError`` (retryable),
+    anything else as ``FatalError``.
+
+    :return: The path of the file, its SHA-256 and the extension of its audio format.
+    """
+    if not is_allowed_url(url):
+        raise FatalError(f"URL not allowed: {url}")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with _download_slot(directory):
+        try:
+            response = _OPENER.open(
+                urllib.request.Request(url, headers={"User-Agent": "speech-api"}),
+                timeout=settings.URL_TIMEOUT,
+            )
+        except HTTPError as e:
+            if e.code in RETRYABLE_STATUS:
+                raise
+            raise FatalError(f"Download failed with HTTP {e.code}: {url}") from e
+
+        # Hidden from the eviction of the blob cache, which may hold the directory
+        fd, path = tempfile.mkstemp(prefix=".download_", dir=directory)
+        try:
+            with response, os.fdopen(fd, "wb") as f:
+                length = response.headers.get("Content-Length")
+                if length is not None and int(length) > settings.URL_MAX_BYTES:
+                    raise FatalError(f"Audio larger than {settings.URL_MAX_BYTES} bytes: {url}")
+                digest, size, head = hashlib.sha256(), 0, b""
+                while chunk := _read(response):
+                    size += len(chunk)
+                    if size > settings.URL_MAX_BYTES:
+                        raise FatalError(f"Audio larger than {settings.URL_MAX_BYTES} bytes: {url}")
+                    if len(head) < SNIFF_BYTES:
+                        head += chunk[: SNIFF_BYTES - len(head)]
+                    digest.update(chunk)
+                    f.write(chunk)
+                if length is not None and size != int(length):
+                    # Connection closed before the end of the body
+                    raise ConnectionError(f"Download interrupted at {size}/{length} bytes: {url}")
+            suffix = sniff_format(head)
+            if suffix is None:
+                raise FatalError(f"Unsupported audio format: {url}")
+        except BaseException:
+            os.remove(path)
+            raise
+    return Path(path), digest.hexdigest(), suffix
+
+
+def _read(response: http.client.HTTPResponse) -> bytes:
+    try:
+        return response.read(CHUNK)
+    except http.client.HTTPException as e:
+        # E.g. malformed chunked encoding
+        raise ConnectionError(f"Download interrupted: {e!r}") from e
+
+
+@contextmanager
+def _download_slot(directory: Path) -> Iterator[None]:
+    """
+    Holds one of the ``URL_DOWNLOADS`` download slots of the host, lock files shared by the
+    worker processes, waiting for one to be free.
+    """
+    while True:
+        for slot in range(settings.URL_DOWNLOADS):
+            lock = open(directory / f".download-slot-{slot}.lock", "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                continue
+            try:
+                yield
+            finally:
+                lock.close()
+            return
+        time.sleep(0.2)
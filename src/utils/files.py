@@ -1,11 +1,16 @@
+import asyncio
+import hashlib
 import os
 import re
 import tempfile
 from pathlib import Path
+from typing import BinaryIO
 
 from fastapi import UploadFile
 
-ALLOWED_EXT = {".wav", ".mp3"}
+from src.utils.media import AUDIO_FORMATS, SNIFF_BYTES, sniff_format
+
+ALLOWED_EXT = set(AUDIO_FORMATS)
 
 BASE_TMP_DIR = Path(os.getenv("TRANSCRIBE_TMP_DIR", "/tmp/transcribe"))
 BASE_TMP_DIR.mkdir(parents=True, exist_ok=True)
@@ -20,22 +25,34 @@ def _sanitize(name: str) -> str:
     return name[:128]
 
 
-async def save_upload_to_temp(file: UploadFile) -> str:
-    orig = _sanitize(file.filename or "audio")
-    ext = Path(orig).suffix.lower()
+async def save_upload_to_temp(file: UploadFile) -> tuple[str, str]:
+    """
+    Streams an upload to a temporary file. Returns its path and the SHA-256 of its content,
+    the key of the upload in the blob store.
+
+    The format is identified by the magic bytes of the content, whatever the extension of the
+    file name: the temporary file gets the extension of the detected format.
+    """
+    # Spooled uploads are on disk beyond a size: copy them off the event loop
+    return await asyncio.to_thread(_copy_upload, file.file, _sanitize(file.filename or "audio"))
+
+
+def _copy_upload(src: BinaryIO, name: str) -> tuple[str, str]:
+    src.seek(0)
+    chunk = src.read(CHUNK)
+    ext = sniff_format(chunk[:SNIFF_BYTES])
     if ext not in ALLOWED_EXT:
         raise ValueError(
-            f"Unsupported file type: {ext or 'no extension'} (allowed: {', '.join(ALLOWED_EXT)})"
+            f"Unsupported audio format: {name} (allowed: {', '.join(sorted(ALLOWED_EXT))})"
         )
 
     with tempfile.NamedTemporaryFile(
         mode="wb", prefix="stt_", suffix=ext, dir=BASE_TMP_DIR, delete=False
     ) as tmp:
         tmp_path = Path(tmp.name)
-        file.file.seek(0)
-        while True:
-            chunk = file.file.read(CHUNK)
-            if not chunk:
-                break
+        digest = hashlib.sha256()
+        while chunk:
+            digest.update(chunk)
             tmp.write(chunk)
-    return str(tmp_path.resolve())
+            chunk = src.read(CHUNK)
+    return str(tmp_path.resolve()), digest.hexdigest()
@@ -1,28 +1,267 @@
-import wave
+from __future__ import annotations
+
+import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from src import log
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SAMPLE_RATE = 16000
+DECODERS = ("auto", "av", "ffmpeg")
+
+# Bytes read from ffmpeg at once by the subprocess decoder
+_PIPE_CHUNK = 2**20
 
 
 def get_filesize_bytes(path: str) -> int:
     return Path(path).stat().st_size
 
 
-def wav_duration_seconds(path: str) -> float:
-    with wave.open(path, "rb") as w:
-        frames = w.getnframes()
-        rate = w.getframerate()
-        return frames / float(rate)
+# Extensions of the accepted formats, by their magic bytes (see ``sniff_format``)
+AUDIO_FORMATS = (".wav", ".mp3", ".flac", ".ogg", ".opus", ".m4a")
+# Bytes needed by ``sniff_format``
+SNIFF_BYTES = 64
+# Major brands of the MP4 files holding audio; other ISO media files (HEIF images, QuickTime
+# and 3GP videos, ...) share the ``ftyp`` box but not these brands
+_MP4_AUDIO_BRANDS = {b"M4A ", b"M4B ", b"mp41", b"mp42", b"isom", b"iso2", b"iso5", b"dash"}
 
 
-def mp3_duration_seconds(path: str) -> float | None:
-    from mutagen.mp3 import MP3
+@dataclass(frozen=True)
+class AudioInfo:
+    duration_seconds: float
+    sample_rate: int | None
+    channels: int | None
 
-    return float(MP3(path).info.length)
 
+def sniff_format(head: bytes) -> str | None:
+    """
+    Identifies an audio file by its first bytes.
 
-def get_duration_seconds(path: str) -> float | None:
-    suffix = Path(path).suffix.lower()
-    if suffix == ".wav":
-        return wav_duration_seconds(path)
-    if suffix == ".mp3":
-        return mp3_duration_seconds(path)
+    :return: The extension of the format (one of ``AUDIO_FORMATS``), None when not supported.
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return ".wav"
+    if head[:4] == b"fLaC":
+        return ".flac"
+    if head[:4] == b"OggS":
+        # The first page holds the identification header of the codec
+        return ".opus" if head[28:36] == b"OpusHead" else ".ogg"
+    if head[4:8] == b"ftyp" and head[8:12] in _MP4_AUDIO_BRANDS:
+        return ".m4a"
+    if head[:3] == b"ID3":
+        return ".mp3"
+    # MPEG audio frame sync; layer bits 00 are ADTS (raw AAC), not MP3
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0 and head[1] & 0x06:
+        return ".mp3"
     return None
+
+
+def probe_audio(path: str) -> AudioInfo | None:
+    """
+    Reads the duration, sample rate and channels of an audio file from its headers (and, for
+    Ogg, its last page), without decoding or reading the whole file. Blocking.
+
+    :return: None when the format is not recognized.
+    """
+    import mutagen
+    from mutagen.oggopus import OggOpus
+
+    audio = mutagen.File(path)
+    if audio is None or audio.info is None:
+        return None
+    sample_rate = getattr(audio.info, "sample_rate", None)
+    if isinstance(audio, OggOpus):
+        # Opus is always decoded at 48 kHz, whatever the rate of the original input
+        sample_rate = 48000
+    return AudioInfo(
+        duration_seconds=float(audio.info.length),
+        sample_rate=sample_rate,
+        channels=getattr(audio.info, "channels", None),
+    )
+
+
+def get_duration_seconds(path: str) -> float | None:
+    info = probe_audio(path)
+    return info.duration_seconds if info else None
+
+
+class _ArraySink:
+    """
+    Decoded samples in a preallocated float32 array, grown when the estimated length falls
+    short.
+    """
+
+    def __init__(self, channels: int):
+        import numpy as np
+
+        self._buffer = np.empty((0, channels), dtype=np.float32)
+        self._length = 0
+
+    def reserve(self, samples: int) -> None:
+        if samples > len(self._buffer):
+            self._buffer.resize((samples, self._buffer.shape[1]), refcheck=False)
+
+    def write(self, chunk: np.ndarray) -> None:
+        end = self._length + len(chunk)
+        if end > len(self._buffer):
+            self.reserve(max(end, 2 * len(self._buffer)))
+        self._buffer[self._length : end] = chunk
+        self._length = end
+
+    def reset(self) -> None:
+        self._length = 0
+
+    def result(self) -> np.ndarray:
+        self._buffer.resize((self._length, self._buffer.shape[1]), refcheck=False)
+        return self._buffer
+
+
+class _FileSink:
+    """
+    Decoded samples written to a file as raw little endian float32, chunk by chunk.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self.samples = 0
+
+    def reserve(self, samples: int) -> None:
+        pass
+
+    def write(self, chunk: np.ndarray) -> None:
+        self._file.write(chunk.astype("<f4", copy=False).tobytes())
+        self.samples += len(chunk)
+
+    def reset(self) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        self.samples = 0
+
+
+_Sink = _ArraySink | _FileSink
+
+
+def _decode_av(path: str, sample_rate: int, channels: int, sink: _Sink) -> None:
+    import av
+
+    layout = "mono" if channels == 1 else "stereo"
+    try:
+        with av.open(path, metadata_errors="ignore") as container:
+            if not container.streams.audio:
+                raise RuntimeError(f"Failed to load audio: no audio stream in {path}")
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base is not None:
+                seconds = float(stream.duration * stream.time_base)
+            else:
+                seconds = (container.duration or 0) / av.time_base
+            # Rounding of the resampler: a few samples more at most
+            sink.reserve(int(seconds * sample_rate) + sample_rate // 10)
+
+            resampler = av.AudioResampler(format="flt", layout=layout, rate=sample_rate)
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    sink.write(resampled.to_ndarray().reshape(-1, channels))
+            # Samples buffered by the resampler
+            for resampled in resampler.resample(None):
+                sink.write(resampled.to_ndarray().reshape(-1, channels))
+    except av.FFmpegError as e:
+        raise RuntimeError(f"Failed to load audio: {e}") from e
+
+
+def _decode_ffmpeg(path: str, sample_rate: int, channels: int, sink: _Sink) -> None:
+    import numpy as np
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        "-i",
+        path,
+        "-f",
+        "f32le",
+        "-ac",
+        str(channels),
+        "-acodec",
+        "pcm_f32le",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    frame = 4 * channels
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise RuntimeError("Failed to load audio: ffmpeg is not installed") from e
+    with proc:
+        pending = b""
+        while chunk := proc.stdout.read(_PIPE_CHUNK):
+            data = pending + chunk if pending else chunk
+            usable = len(data) // frame * frame
+            sink.write(np.frombuffer(data[:usable], "<f4").reshape(-1, channels))
+            pending = data[usable:]
+        stderr = proc.stderr.read()
+    if proc.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {stderr.decode(errors='replace')}")
+
+
+def _decode(path: str, sample_rate: int, channels: int, sink: _Sink, decoder: str) -> None:
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown audio decoder: {decoder}")
+    if decoder != "ffmpeg":
+        try:
+            _decode_av(path, sample_rate, channels, sink)
+            return
+        except ImportError:
+            if decoder == "av":
+                raise
+        except RuntimeError as e:
+            if decoder == "av":
+                raise
+            # Codecs missing from the libraries bundled with PyAV, e.g.
+            log.warning("PyAV failed to decode, retrying with ffmpeg", path=path, error=str(e))
+            sink.reset()
+    _decode_ffmpeg(path, sample_rate, channels, sink)
+
+
+def decode_audio(
+    path: str | Path, sample_rate: int = SAMPLE_RATE, channels: int = 1, decoder: str = "auto"
+) -> np.ndarray:
+    """
+    Decodes and resamples an audio file into float32 samples in [-1, 1].
+
+    :param channels: 1 mixes the channels down, 2 keeps (or duplicates) two channels.
+    :param decoder: "av" decodes in process with PyAV, in chunks, into an array preallocated
+        from the duration of the stream. "ffmpeg" reads the output of an ffmpeg subprocess
+        in chunks. "auto" uses PyAV when installed and falls back to ffmpeg.
+    :return: Array of shape (samples,) for mono, (samples, channels) otherwise.
+    :raises RuntimeError: The file cannot be decoded.
+    """
+    sink = _ArraySink(channels)
+    _decode(str(path), sample_rate, channels, sink, decoder)
+    audio = sink.result()
+    return audio[:, 0] if channels == 1 else audio
+
+
+def decode_audio_to_file(
+    path: str | Path,
+    destination: str | Path,
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1,
+    decoder: str = "auto",
+) -> int:
+    """
+    Decodes an audio file like ``decode_audio``, streaming the samples to ``destination`` as
+    raw little endian float32 (channels interleaved) instead of holding them in memory.
+    Returns the number of samples per channel.
+    """
+    with open(destination, "wb") as f:
+        sink = _FileSink(f)
+        _decode(str(path), sample_rate, channels, sink, decoder)
+    return sink.samples
@@ -1,7 +1,45 @@
 import functools
+import random
+import time
 
+from src.metrics import STAGE_RETRIES
+
+
+class FatalError(Exception):
+    """
+    An error that retrying cannot fix, e.g. an audio file that cannot be decoded.
+    """
+
+
+# Errors worth retrying: out of memory and CUDA runtime errors, I/O and network errors
+RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (RuntimeError, MemoryError, OSError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, FatalError):
+        return False
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, jitter: bool = False) -> float:
+    """
+    Returns the delay before retry number ``attempt`` (from 0): ``base * 2**attempt`` capped
+    at ``cap``, optionally randomized ("full jitter") to spread out simultaneous retries.
+    """
+    delay = min(base * 2**attempt, cap)
+    return random.uniform(0, delay) if jitter else delay
+
+
+def retry(max_retries: int = 2, backoff: float = 1.0, max_backoff: float = 30.0):
+    """
+    Retries the decorated function on retryable errors with exponential backoff;
+    other errors are raised immediately.
+
+    :param max_retries: Total number of attempts.
+    :param backoff: Delay (seconds) before the first retry, doubled on every retry.
+    :param max_backoff: Upper bound of the delay.
+    """
 
-def retry(max_retries: int = 2):
     def decorator_retry(func):
         @functools.wraps(func)
         def wrapper_retry(*args, **kwargs):
@@ -10,7 +48,12 @@ def retry(max_retries: int = 2):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
+                    if not is_retryable(e):
+                        raise
                     last_exception = e
+                    if attempt + 1 < max_retries:
+                        STAGE_RETRIES.labels(func.__name__.lstrip("_")).inc()
+                        time.sleep(backoff_delay(attempt, backoff, max_backoff))
             raise last_exception
 
         return wrapper_retry
@@ -0,0 +1,62 @@
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(
+    seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+    seed: int = 0,
+    channels: int = 1,
+    silence_ratio: float = 0.3,
+) -> np.ndarray:
+    """
+    Generates deterministic speech-like audio: voiced "syllables" (harmonics of a drifting
+    pitch with a ~4 Hz envelope) grouped into phrases separated by pauses, over low noise.
+
+    Used where real recordings are not needed: benchmarks, calibration and warm-up.
+
+    :param seconds: Duration of the audio.
+    :param sample_rate: Sample rate of the audio.
+    :param seed: Seed of the generator; the same seed always produces the same audio.
+    :param channels: Number of channels; every channel talks in different phrases.
+    :param silence_ratio: Approximate share of pauses between phrases.
+    :return: float32 array of shape (samples,) for mono, (samples, channels) otherwise.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    out = np.zeros((total, channels), dtype=np.float32)
+
+    for channel in range(channels):
+        position = 0
+        while position < total:
+            phrase = int(rng.uniform(1.5, 6.0) * sample_rate)
+            pause = int(phrase * silence_ratio / max(1 - silence_ratio, 1e-3))
+            pause = int(rng.uniform(0.5, 1.5) * pause)
+            end = min(position + phrase, total)
+            t = np.arange(end - position) / sample_rate
+
+            pitch = rng.uniform(90, 220) * (1 + 0.1 * np.sin(2 * np.pi * 0.5 * t))
+            phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+            voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+            envelope = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t), 0, None) ** 2
+            out[position:end, channel] = 0.3 * voiced * envelope
+
+            position = end + pause
+
+    out += rng.normal(0, 0.003, size=out.shape).astype(np.float32)
+    return out[:, 0] if channels == 1 else out
+
+
+def write_wav(path: str, audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    Writes float audio in [-1, 1] as a 16-bit PCM WAV file.
+    """
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
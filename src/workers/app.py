@@ -26,6 +26,8 @@ celery_app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     worker_prefetch_multiplier=1,
+    # Pool processes load and warm up the models before reporting up (4 seconds by default)
+    worker_proc_alive_timeout=settings.WORKER_STARTUP_TIMEOUT,
     broker_transport_options={"visibility_timeout": settings.TASK_TIME_LIMIT + 600},
 )
 
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass
+
+from src.metrics import BATCH_SIZE_CHANGES
+from src.workers import log
+
+# Upper bounds (seconds of audio) of the duration buckets; longer audio falls in the last one
+DURATION_BUCKETS = (60, 300, 900, 1800)
+
+
+@dataclass
+class _BucketState:
+    current: int
+    largest_safe: int = 0  # largest batch size that succeeded, 0 if none yet
+    smallest_failed: int | None = None  # smallest batch size that ran out of memory
+    successes: int = 0  # successes in a row at the current size
+
+
+class AdaptiveBatchSize:
+    """
+    Chooses the ASR batch size per (model, audio duration bucket).
+
+    Every bucket starts at the configured size. Out of memory errors halve it, and after
+    ``probe_after`` successes in a row it is doubled again, up to the configured size but below
+    the smallest size that ran out of memory in the bucket. The largest size known to succeed
+    is remembered per bucket, so a failed probe falls back to it instead of halving blindly.
+    """
+
+    def __init__(self, initial: int, min_size: int = 1, probe_after: int = 20):
+        """
+        :param initial: Configured batch size, also the upper bound of probing.
+        :param min_size: Smallest batch size to degrade to.
+        :param probe_after: Successes in a row before trying a larger batch size.
+        """
+        self._initial = max(initial, min_size)
+        self._min_size = min_size
+        self._probe_after = probe_after
+        self._buckets: dict[tuple[str, int], _BucketState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def initial(self) -> int:
+        return self._initial
+
+    @staticmethod
+    def bucket_of(audio_seconds: float) -> int:
+        """
+        Returns the upper bound of the duration bucket the audio falls in.
+        """
+        index = bisect.bisect_left(DURATION_BUCKETS, audio_seconds)
+        return DURATION_BUCKETS[min(index, len(DURATION_BUCKETS) - 1)]
+
+    def _state(self, model: str, audio_seconds: float) -> _BucketState:
+        key = (model, self.bucket_of(audio_seconds))
+        if key not in self._buckets:
+            self._buckets[key] = _BucketState(current=self._initial)
+        return self._buckets[key]
+
+    def get(self, model: str, audio_seconds: float) -> int:
+        """
+        Returns the batch size to use for the next run.
+        """
+        with self._lock:
+            return self._state(model, audio_seconds).current
+
+    def on_success(self, model: str, audio_seconds: float, batch_size: int) -> None:
+        """
+        Records a successful run; probes a larger batch size after enough of them.
+        """
+        with self._lock:
+            state = self._state(model, audio_seconds)
+            state.largest_safe = max(state.largest_safe, batch_size)
+            if batch_size != state.current:
+                return
+            state.successes += 1
+            largest = self._initial
+            if state.smallest_failed is not None:
+                # Never probe a size known to run out of memory
+                largest = min(largest, state.smallest_failed - 1)
+            if state.current >= largest or state.successes < self._probe_after:
+                return
+
+            state.current = min(state.current * 2, largest)
+            state.successes = 0
+            BATCH_SIZE_CHANGES.labels("up").inc()
+            log.info(
+                "Probing a larger batch size",
+                model=model,
+                bucket=self.bucket_of(audio_seconds),
+                batch_size=state.current,
+            )
+
+    def on_out_of_memory(self, model: str, audio_seconds: float, batch_size: int) -> int | None:
+        """
+        Records an out of memory error and returns the smaller batch size to retry with,
+        or None when already at the minimum.
+        """
+        with self._lock:
+            state = self._state(model, audio_seconds)
+            state.successes = 0
+            if state.smallest_failed is None or batch_size < state.smallest_failed:
+                state.smallest_failed = batch_size
+            if batch_size <= self._min_size:
+                state.current = self._min_size
+                return None
+
+            smaller = max(batch_size // 2, self._min_size)
+            if 0 < state.largest_safe < batch_size:
+                # A failed probe goes back to the size known to work
+                smaller = max(state.largest_safe, smaller)
+            state.current = smaller
+            BATCH_SIZE_CHANGES.labels("down").inc()
+            log.warning(
+                "Out of memory, reducing the batch size",
+                model=model,
+                bucket=self.bucket_of(audio_seconds),
+                batch_size=batch_size,
+                new_batch_size=smaller,
+            )
+            return smaller
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Returns the state of every bucket, keyed by ``model/bucket``.
+        """
+        with self._lock:
+            return {
+                f"{model}/{bucket}": {
+                    "current": state.current,
+                    "largest_safe": state.largest_safe,
+                    "smallest_failed": state.smallest_failed,
+                }
+                for (model, bucket), state in self._buckets.items()
+            }
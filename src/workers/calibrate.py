@@ -0,0 +1,313 @@
+"""
+Calibration of the runtime profile of a host.
+
+Transcribes synthetic audio with every candidate compute type, CPU thread count and batch
+size, and keeps the fastest configuration that fits in memory. The result is saved as a JSON
+profile, applied to the settings at worker startup (``RUNTIME_PROFILE``), so the calibration
+runs once per host. Settings set explicitly in the environment take precedence.
+
+Usage::
+
+    python -m src.workers.calibrate --output /srv/transcribe/runtime-profile.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from src.config import settings
+from src.utils.synthetic import speech_like
+from src.workers import log
+from src.workers.memory import read_memory
+
+COMPUTE_TYPES = {
+    "cpu": ("int8", "int8_float32", "float32"),
+    "cuda": ("float16", "int8_float16", "int8"),
+}
+BATCH_SIZES = {"cpu": (1, 2, 4, 8), "cuda": (1, 2, 4, 8, 16, 32)}
+
+# Share of the memory of the host the ASR model of a worker process may use
+MEMORY_BUDGET = 0.8
+
+
+def host_fingerprint(device: str) -> dict:
+    """
+    Describes the hardware a profile was calibrated on; a profile is only applied on the
+    same hardware.
+    """
+    host = {
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "memory_gb": round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**30),
+        "gpu": None,
+    }
+    if device.startswith("cuda"):
+        import torch
+
+        if torch.cuda.is_available():
+            host["gpu"] = torch.cuda.get_device_name(0)
+    return host
+
+
+def thread_candidates(concurrency: int) -> list[int]:
+    """
+    Returns the CPU thread counts to try for one task: its share of the cores, and halves of it.
+    """
+    cores = max((os.cpu_count() or 1) // concurrency, 1)
+    return sorted({max(cores // 2**i, 1) for i in range(3)}, reverse=True)
+
+
+@dataclass
+class RuntimeProfile:
+    host: dict
+    device: str
+    model: str
+    concurrency: int
+    compute_type: str
+    batch_size: int
+    cpu_threads: int
+    rtf: float
+    created_at: str
+    measurements: list[dict] = field(default_factory=list)
+
+    def matches(self, device: str, model: str, concurrency: int) -> bool:
+        """
+        Tells whether the profile was calibrated for this host and worker configuration.
+        """
+        if (self.device, self.model, self.concurrency) != (device, model, concurrency):
+            return False
+        return self.host == host_fingerprint(device)
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> RuntimeProfile | None:
+        try:
+            return cls(**json.loads(Path(path).read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            log.warning("Ignoring unreadable runtime profile", path=str(path), error=str(e))
+            return None
+
+
+def _memory_used_mb(device: str) -> float:
+    """
+    Returns the memory used by the model: the RSS of the process on CPU, the memory in use on
+    the GPU otherwise (CTranslate2 allocates outside of the PyTorch allocator).
+    """
+    if device.startswith("cuda"):
+        import torch
+
+        free, total = torch.cuda.mem_get_info()
+        return (total - free) / 2**20
+    memory = read_memory()
+    return memory["rss"] / 2**20 if memory else 0.0
+
+
+def calibrate(
+    model: str,
+    device: str,
+    concurrency: int = 1,
+    compute_types: list[str] | None = None,
+    thread_counts: list[int] | None = None,
+    batch_sizes: list[int] | None = None,
+    max_memory_mb: float | None = None,
+    chunk_size: int = settings.CHUNK_SIZE,
+    download_root: str = settings.DOWNLOAD_ROOT,
+) -> RuntimeProfile:
+    """
+    Measures every candidate configuration and returns the fastest one that fits in memory.
+
+    Every batch size transcribes ``batch_size`` chunks of audio, so every run is one full
+    batch and runs are compared by real-time factor.
+
+    :param model: ASR model to calibrate.
+    :param device: Device to calibrate ("cpu" or "cuda").
+    :param concurrency: Tasks run at once by the worker, which split the cores.
+    :param compute_types: Compute types to try (all the device supports by default).
+    :param thread_counts: CPU threads per task to try.
+    :param batch_sizes: Batch sizes to try, in increasing order.
+    :param max_memory_mb: Memory a configuration may use; by default a share of the memory of
+        the host (CPU) divided between the tasks, unlimited on GPU (out of memory errors).
+    :param chunk_size: Chunk size (in seconds) of the worker.
+    :param download_root: Directory of the models.
+    """
+    from whisperx.asr import load_model
+
+    from src.workers.speech_transcriber import SAMPLE_RATE, is_out_of_memory
+
+    kind = "cuda" if device.startswith("cuda") else "cpu"
+    compute_types = compute_types or list(COMPUTE_TYPES[kind])
+    # CPU threads barely matter on GPU
+    thread_counts = thread_counts or thread_candidates(concurrency)[: 3 if kind == "cpu" else 1]
+    batch_sizes = sorted(batch_sizes or BATCH_SIZES[kind])
+    if max_memory_mb is None and kind == "cpu":
+        memory_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+        max_memory_mb = memory_mb * MEMORY_BUDGET / concurrency
+
+    measurements: list[dict] = []
+    for compute_type in compute_types:
+        for threads in thread_counts:
+            log.info("Calibrating", model=model, compute_type=compute_type, cpu_threads=threads)
+            try:
+                pipeline = load_model(
+                    whisper_arch=model,
+                    device=device,
+                    compute_type=compute_type,
+                    download_root=download_root,
+                    threads=threads,
+                )
+            except ValueError as e:
+                # Compute type not supported by the device
+                log.warning("Skipping compute type", compute_type=compute_type, error=str(e))
+                break
+
+            # The first run is slower (memory allocation, lazy initialization)
+            pipeline.transcribe(
+                speech_like(chunk_size), language="en", batch_size=1, chunk_size=chunk_size
+            )
+            for batch_size in batch_sizes:
+                audio = speech_like(chunk_size * batch_size, seed=batch_size)
+                measurement = {
+                    "compute_type": compute_type,
+                    "cpu_threads": threads,
+                    "batch_size": batch_size,
+                }
+                measurements.append(measurement)
+                try:
+                    start = time.perf_counter()
+                    pipeline.transcribe(
+                        audio, language="en", batch_size=batch_size, chunk_size=chunk_size
+                    )
+                    elapsed = time.perf_counter() - start
+                except (RuntimeError, MemoryError) as e:
+                    if not is_out_of_memory(e):
+                        raise
+                    measurement["fits"] = False
+                    break
+                memory_mb = _memory_used_mb(device)
+                measurement.update(
+                    rtf=round(elapsed / (len(audio) / SAMPLE_RATE), 4),
+                    memory_mb=round(memory_mb, 1),
+                    fits=max_memory_mb is None or memory_mb <= max_memory_mb,
+                )
+                log.debug("Calibration run", **measurement)
+                if not measurement["fits"]:
+                    break
+
+            del pipeline
+            gc.collect()
+            if kind == "cuda":
+                import torch
+
+                torch.cuda.empty_cache()
+
+    fitting = [m for m in measurements if m.get("fits")]
+    if not fitting:
+        raise RuntimeError("No configuration fits in memory")
+    best = min(fitting, key=lambda m: m["rtf"])
+    log.info("Calibration complete", model=model, **best)
+    return RuntimeProfile(
+        host=host_fingerprint(device),
+        device=device,
+        model=model,
+        concurrency=concurrency,
+        compute_type=best["compute_type"],
+        batch_size=best["batch_size"],
+        cpu_threads=best["cpu_threads"],
+        rtf=best["rtf"],
+        created_at=datetime.now(timezone.utc).isoformat(),
+        measurements=measurements,
+    )
+
+
+def apply_profile(profile: RuntimeProfile) -> dict:
+    """
+    Overrides the settings not set explicitly (environment or ``.env``) with the profile.
+    Returns the applied values.
+    """
+    values = {"COMPUTE_TYPE": profile.compute_type, "BATCH_SIZE": profile.batch_size}
+    if profile.device == "cpu":
+        values["ASR_INTRA_THREADS"] = profile.cpu_threads
+    applied = {
+        name: value for name, value in values.items() if name not in settings.model_fields_set
+    }
+    for name, value in applied.items():
+        setattr(settings, name, value)
+    return applied
+
+
+def load_profile(concurrency: int) -> None:
+    """
+    Applies the runtime profile at worker startup, calibrating first when the profile is
+    missing or was calibrated for other hardware and ``CALIBRATE_ON_START`` is set.
+
+    The calibration runs in a fresh process, so nothing it loads stays in the worker.
+    """
+    path = settings.RUNTIME_PROFILE
+    model = settings.WORKER_MODELS[0]
+    profile = RuntimeProfile.load(path)
+    if profile is None or not profile.matches(settings.DEVICE, model, concurrency):
+        if not settings.CALIBRATE_ON_START:
+            log.warning("No runtime profile for this host, using the settings", path=path)
+            return
+        log.info("Calibrating the runtime profile...", path=path)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            profile = pool.submit(calibrate, model, settings.DEVICE, concurrency).result()
+        profile.save(path)
+
+    applied = apply_profile(profile)
+    log.info("Runtime profile applied", path=path, **applied)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from src.logging import configure as configure_logging
+
+    configure_logging()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--model", default=settings.WORKER_MODELS[0])
+    parser.add_argument("--device", default=settings.DEVICE)
+    parser.add_argument("--concurrency", type=int, default=1, help="Tasks the worker runs at once")
+    parser.add_argument("--compute-type", nargs="+")
+    parser.add_argument("--threads", nargs="+", type=int)
+    parser.add_argument("--batch-size", nargs="+", type=int)
+    parser.add_argument("--max-memory-mb", type=float)
+    parser.add_argument("--output", type=Path, default=settings.RUNTIME_PROFILE)
+    args = parser.parse_args(argv)
+    if args.output is None:
+        parser.error("--output is required when RUNTIME_PROFILE is not set")
+
+    profile = calibrate(
+        args.model,
+        args.device,
+        concurrency=args.concurrency,
+        compute_types=args.compute_type,
+        thread_counts=args.threads,
+        batch_sizes=args.batch_size,
+        max_memory_mb=args.max_memory_mb,
+    )
+    profile.save(args.output)
+    print(json.dumps({k: v for k, v in asdict(profile).items() if k != "measurements"}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
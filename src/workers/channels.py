@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def join_tracks(tracks: list[np.ndarray], gap: int) -> tuple[np.ndarray, list[int]]:
+    """
+    Concatenates tracks with ``gap`` samples of silence between them, so they are transcribed
+    in a single call and share inference batches.
+
+    The gap must be longer than the ASR chunk size, so that no chunk spans two tracks.
+
+    :return: The joined audio and the sample offset of every track in it.
+    """
+    offsets, parts, position = [], [], 0
+    silence = np.zeros(gap, dtype=np.float32)
+    for track in tracks:
+        offsets.append(position)
+        parts.extend((track, silence))
+        position += len(track) + gap
+    return np.concatenate(parts[:-1]), offsets
+
+
+def split_tracks(
+    segments: list[dict], offsets: list[int], lengths: list[int], sample_rate: int
+) -> list[list[dict]]:
+    """
+    Splits segments of joined tracks by the track they start in, moving their timestamps
+    (and those of their words) back to the timeline of that track. Segments starting in the
+    silence between tracks are dropped.
+    """
+    starts = [offset / sample_rate for offset in offsets]
+    tracks: list[list[dict]] = [[] for _ in offsets]
+    for segment in segments:
+        index = max(i for i, start in enumerate(starts) if i == 0 or segment["start"] >= start)
+        shift, duration = starts[index], lengths[index] / sample_rate
+        if segment["start"] - shift >= duration:
+            continue
+        for item in (segment, *segment.get("words", ())):
+            for key in ("start", "end"):
+                if item.get(key) is not None:
+                    item[key] = round(min(max(item[key] - shift, 0.0), duration), 3)
+        tracks[index].append(segment)
+    return tracks
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.workers import log
+
+
+class TaskCheckpoints:
+    """
+    Outputs of the completed pipeline stages of one task, so that a retried task resumes from
+    the last completed stage instead of starting over.
+
+    The decoded audio is stored as ``audio.npy``, every other stage as ``<stage>.json``. Files
+    are written to a temporary name and renamed, so a crash never leaves a partial checkpoint.
+    """
+
+    def __init__(self, directory: Path):
+        self._dir = directory
+
+    def _write(self, path: Path, write) -> None:
+        tmp = path.with_name(f".{path.name}.tmp")
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            write(tmp)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            # Checkpoints only save work; failing to write one must not fail the task
+            tmp.unlink(missing_ok=True)
+            log.warning("Failed to write checkpoint", path=str(path), error=str(e))
+
+    def save_audio(self, audio: np.ndarray) -> None:
+        def write(tmp: Path) -> None:
+            with tmp.open("wb") as f:
+                np.save(f, audio)
+
+        self._write(self._dir / "audio.npy", write)
+
+    def load_audio(self) -> np.ndarray | None:
+        path = self._dir / "audio.npy"
+        if not path.exists():
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable checkpoint", path=str(path), error=str(e))
+            return None
+
+    def save(self, stage: str, data: Any) -> None:
+        self._write(self._dir / f"{stage}.json", lambda tmp: tmp.write_text(json.dumps(data)))
+
+    def load(self, stage: str) -> Any | None:
+        path = self._dir / f"{stage}.json"
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable checkpoint", path=str(path), error=str(e))
+            return None
+
+    def clear(self) -> None:
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+class CheckpointStore:
+    """
+    Local directory of task checkpoints, one subdirectory per task id.
+    """
+
+    def __init__(self, root: str | Path):
+        self._root = Path(root)
+
+    def for_task(self, task_id: str) -> TaskCheckpoints:
+        return TaskCheckpoints(self._root / task_id)
+
+    def purge(self, max_age: float) -> int:
+        """
+        Removes the checkpoints of tasks untouched for more than ``max_age`` seconds, left
+        behind by tasks that were never retried. Returns the number of removed tasks.
+        """
+        if not self._root.is_dir():
+            return 0
+        removed = 0
+        deadline = time.time() - max_age
+        for directory in self._root.iterdir():
+            try:
+                if directory.is_dir() and directory.stat().st_mtime < deadline:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-from typing import Optional
-from uuid import UUID
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import create_engine, select, update
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import cast, create_engine, func, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.orm import sessionmaker
 
 from src.config import settings
 from src.transcription.models import TranscriptionResultModel, TranscriptionTaskModel
 from src.workers import log
 
+if TYPE_CHECKING:
+    from src.workers.writer import PendingWrite
+
 _engine = None
 _SessionLocal: Optional[sessionmaker] = None
 
@@ -35,50 +39,49 @@ def dispose_db_sync() -> None:
         _engine = None
 
 
-def update_task_sync(task_id: UUID, **values) -> None:
-    global _SessionLocal
-    if _SessionLocal is None:
-        raise RuntimeError("DB not initialized: call init_db_sync() first")
-
-    try:
-        with _SessionLocal() as session:
-            stmt = (
-                update(TranscriptionTaskModel)
-                .where(TranscriptionTaskModel.id == task_id)
-                .values(**values)
-            )
-            session.execute(stmt)
-            session.commit()
-    except SQLAlchemyError as e:
-        log.error("Sync DB update failed", task_id=str(task_id), error=str(e))
-
+def write_batch_sync(writes: list[PendingWrite]) -> None:
+    """
+    Applies a batch of merged task writes in a single transaction.
 
-def save_transcription_result_sync(task_id: UUID, transcription_result: dict) -> None:
+    Results are upserted before the task rows are updated, so a task is never observed as
+    COMPLETED without its result. The duration of the upserts is stored with the task rows as
+    the ``result_write`` stage, in the same transaction (so without the commit).
+    """
     global _SessionLocal
     if _SessionLocal is None:
         raise RuntimeError("DB not initialized: call init_db_sync() first")
 
-    try:
-        with _SessionLocal() as session:
-            # Check if result already exists
-            stmt = select(TranscriptionResultModel).where(
-                TranscriptionResultModel.task_id == task_id
-            )
-            existing_result = session.execute(stmt).scalar_one_or_none()
+    with _SessionLocal() as session:
+        start = time.perf_counter()
+        for write in writes:
+            if write.result is not None:
+                stmt = insert(TranscriptionResultModel).values(
+                    task_id=write.task_id, transcription_result=write.result
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TranscriptionResultModel.task_id],
+                    set_={
+                        "transcription_result": stmt.excluded.transcription_result,
+                        "updated_at": datetime.now(timezone.utc),
+                    },
+                )
+                session.execute(stmt)
+        result_write = {"wall_s": round(time.perf_counter() - start, 3), "batch": len(writes)}
 
-            if existing_result:
-                # Update existing result
-                log.debug("Updating existing transcription result", task_id=str(task_id))
-                existing_result.transcription_result = transcription_result
-                session.commit()
-            else:
-                # Create new result
-                log.debug("Creating new transcription result", task_id=str(task_id))
-                result_model = TranscriptionResultModel(
-                    task_id=task_id, transcription_result=transcription_result
+        for write in writes:
+            values = dict(write.values)
+            timings = write.timings
+            if write.result is not None:
+                timings = {**(timings or {}), "result_write": result_write}
+            if timings:
+                # Shallow JSONB merge: stages recorded earlier are kept
+                values["timings"] = func.coalesce(
+                    TranscriptionTaskModel.timings, cast({}, JSONB)
+                ).op("||")(cast(timings, JSONB))
+            if values:
+                session.execute(
+                    update(TranscriptionTaskModel)
+                    .where(TranscriptionTaskModel.id == write.task_id)
+                    .values(**values)
                 )
-                session.add(result_model)
-                session.commit()
-    except SQLAlchemyError as e:
-        log.error("Failed to save transcription result", task_id=str(task_id), error=str(e))
-        raise
+        session.commit()
@@ -1,44 +1,45 @@
+import os
+import time
 from datetime import datetime, timezone
 from uuid import UUID
 
-from celery import Task
+from celery import Task, states
 
+from src.metrics import STAGE_RETRIES, TASK_WAIT, TASKS
+from src.ratelimit import get_task_quota
 from src.transcription.models import Status
 from src.workers import log
-from src.workers.db import save_transcription_result_sync, update_task_sync
+from src.workers.writer import get_writer
 
 
 class DBReportingTask(Task):
+    start_message = "Processing transcription..."
+
     def before_start(self, task_id, args, kwargs):
+        enqueued_at = self.request.get("enqueued_at")
+        if enqueued_at:
+            TASK_WAIT.observe(max(time.time() - enqueued_at, 0))
+
         try:
-            update_task_sync(
+            get_writer().submit(
                 UUID(task_id),
                 status=Status.IN_PROGRESS,
                 started_at=datetime.now(timezone.utc),
-                message="Processing transcription...",
+                message=self.start_message,
             )
         except Exception as e:
             log.error("before_start update failed", task_id=task_id, error=str(e))
 
     def on_success(self, retval, task_id, args, kwargs):
+        TASKS.labels(Status.COMPLETED.value).inc()
         try:
-            task_uuid = UUID(task_id)
-
-            # Update task metadata
-            update_task_sync(
-                task_uuid,
-                status=Status.COMPLETED,
-                completed_at=datetime.now(timezone.utc),
-                message="Completed successfully",
-            )
+            transcription_result = None
+            timings = None
 
-            # Save transcription result separately if it exists
             if retval and isinstance(retval, dict) and "result" in retval:
                 transcription_result = retval.get("result")
-                if transcription_result:
-                    save_transcription_result_sync(task_uuid, transcription_result)
-                    log.debug("Transcription result saved", task_id=task_id)
-                else:
+                timings = retval.get("timings")
+                if not transcription_result:
                     log.warning("No transcription result in retval", task_id=task_id)
             else:
                 log.warning(
@@ -47,12 +48,49 @@ class DBReportingTask(Task):
                     retval_type=type(retval).__name__,
                 )
 
+            # The result is written in the same transaction as the status update
+            get_writer().submit(
+                UUID(task_id),
+                result=transcription_result or None,
+                timings=timings,
+                status=Status.COMPLETED,
+                completed_at=datetime.now(timezone.utc),
+                message="Completed successfully",
+            )
+
         except Exception as e:
             log.error("on_success update failed", task_id=task_id, error=str(e))
+        get_task_quota().release(task_id)
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        STAGE_RETRIES.labels("task").inc()
+        try:
+            get_writer().submit(
+                UUID(task_id),
+                status=Status.IN_PROGRESS,
+                message=f"Retrying after error: {exc}",
+            )
+        except Exception as e:
+            log.error("on_retry update failed", task_id=task_id, error=str(e))
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        if status not in states.READY_STATES:
+            # Retried: the upload and the checkpoints are needed to resume
+            return
+        from src.workers.state import get_checkpoints
+
+        get_checkpoints().for_task(task_id).clear()
+        # Uploads enqueued before the blob store; blobs are shared by duplicate uploads and
+        # purged by age instead
+        try:
+            os.remove(kwargs["audio_file"])
+        except (KeyError, FileNotFoundError):
+            pass
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
+        TASKS.labels(Status.FAILED.value).inc()
         try:
-            update_task_sync(
+            get_writer().submit(
                 UUID(task_id),
                 status=Status.FAILED,
                 completed_at=datetime.now(timezone.utc),
@@ -60,3 +98,19 @@ class DBReportingTask(Task):
             )
         except Exception as e:
             log.error("on_failure update failed", task_id=task_id, error=str(e))
+        get_task_quota().release(task_id)
+
+
+class PreprocessingTask(DBReportingTask):
+    """
+    Reports the pre-processing stage of a task, which then continues as a transcription task
+    with the same id: only failures end the task.
+    """
+
+    start_message = "Preprocessing audio..."
+
+    def on_success(self, retval, task_id, args, kwargs):
+        pass
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        pass
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+
+from src.metrics import PROCESS_MEMORY
+from src.workers import log
+
+
+def read_memory(pid: int | str = "self") -> dict[str, int] | None:
+    """
+    Reads the resident (RSS), proportional (PSS) and shared memory of a process in bytes.
+
+    PSS divides every shared page by the number of processes mapping it, so the PSS of the
+    pool processes adds up to the memory they really use, while their RSS counts the models
+    shared copy-on-write once per process. Returns None where ``/proc`` is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared"}
+    memory = {"rss": 0, "pss": 0, "shared": 0}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in fields:
+            # Values are in kB
+            memory[fields[name]] += int(value.split()[0]) * 1024
+    return memory
+
+
+def report_memory(role: str) -> None:
+    """
+    Exports and logs the memory of the current process.
+
+    :param role: "main" for the process the pool is forked from, "child" for pool processes.
+    """
+    memory = read_memory()
+    if memory is None:
+        return
+    for kind, value in memory.items():
+        PROCESS_MEMORY.labels(role, kind).set(value)
+    log.debug(
+        "Process memory",
+        role=role,
+        pid=os.getpid(),
+        **{f"{kind}_mb": round(value / 2**20, 1) for kind, value in memory.items()},
+    )
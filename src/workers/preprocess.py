@@ -0,0 +1,82 @@
+"""
+Pre-processing of uploads into raw PCM, on CPU workers (``WORKER_ROLE=preprocess``).
+
+Uploads are decoded and resampled once to the input format of the models: 16 kHz float32
+samples in [-1, 1], little endian, mono or (channel split) two interleaved channels. The
+artifact is stored in the blob store next to the upload, so ASR workers memory-map it instead
+of running ffmpeg. It is keyed by the digest of the upload, so duplicate uploads are decoded
+once.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.config import settings
+from src.utils.media import SAMPLE_RATE, decode_audio_to_file
+from src.utils.retry import FatalError
+
+PCM_SUFFIX = ".f32"
+_DTYPE = np.dtype("<f4")
+
+
+def pcm_key(audio_key: str, channels: int) -> str:
+    """
+    Returns the key of the PCM artifact of an upload.
+    """
+    digest = Path(audio_key).stem
+    return f"pcm/{digest[:2]}/{digest}.{channels}ch{PCM_SUFFIX}"
+
+
+def is_pcm(audio_file: str | Path) -> bool:
+    return str(audio_file).endswith(PCM_SUFFIX)
+
+
+def pcm_channels(audio_file: str | Path) -> int:
+    # e.g. "<digest>.2ch.f32"
+    return int(Path(audio_file).suffixes[-2].removeprefix(".").removesuffix("ch"))
+
+
+def pcm_seconds(size: int, channels: int) -> float:
+    """
+    Returns the exact duration of a PCM artifact of ``size`` bytes.
+    """
+    return size / _DTYPE.itemsize / channels / SAMPLE_RATE
+
+
+def decode_to_pcm(audio_file: str | Path, channels: int, directory: str | Path) -> Path:
+    """
+    Decodes and resamples an audio file, streaming the samples to a new temporary PCM file
+    in ``directory``.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="pcm_", suffix=PCM_SUFFIX, dir=directory)
+    os.close(fd)
+    try:
+        try:
+            decode_audio_to_file(
+                audio_file, path, SAMPLE_RATE, channels=channels, decoder=settings.AUDIO_DECODER
+            )
+        except RuntimeError as e:
+            # The file cannot be decoded, retrying would not help
+            raise FatalError(str(e)) from e
+    except BaseException:
+        os.remove(path)
+        raise
+    return Path(path)
+
+
+def load_pcm(audio_file: str | Path) -> np.ndarray:
+    """
+    Memory-maps a PCM artifact; pages are read from disk (or the page cache) on access.
+    """
+    channels = pcm_channels(audio_file)
+    if os.path.getsize(audio_file) == 0:
+        # Empty files cannot be mapped
+        return np.zeros((0,) if channels == 1 else (0, channels), dtype=_DTYPE)
+    audio = np.memmap(audio_file, dtype=_DTYPE, mode="r")
+    return audio if channels == 1 else audio.reshape(-1, channels)
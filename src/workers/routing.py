@@ -0,0 +1,168 @@
+"""
+Model-affinity routing.
+
+Workers consume the default queue plus one queue per ASR model they preload
+(``WORKER_MODELS``). They advertise in Redis the queues they consume and the models they have
+loaded: one sorted set per queue or model, holding worker ids scored by their last heartbeat.
+The producer sends a task to the queue of its model when a live worker consumes it, and to
+the default queue otherwise, where any worker picks it up and loads the model on demand
+(a cold start).
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from typing import Callable
+
+from redis import Redis, RedisError
+from redis.asyncio import Redis as AsyncRedis
+
+from src.config import settings
+from src.metrics import TASK_ROUTES
+from src.workers import log
+
+_KEY_PREFIX = "speech:workers"
+
+
+def model_queue(default_queue: str, model: str) -> str:
+    return f"{default_queue}.{model}"
+
+
+def _key(kind: str, name: str) -> str:
+    return f"{_KEY_PREFIX}:{kind}:{name}"
+
+
+class ModelAdvertiser:
+    """
+    Periodically publishes the models loaded by this worker process and the model queues it
+    consumes.
+    """
+
+    def __init__(
+        self,
+        loaded_models: Callable[[], dict[str, list[str]]],
+        interval: float,
+        ttl: float,
+    ):
+        """
+        :param loaded_models: Returns the advertised names by kind: loaded models ("asr",
+            "align", "diarization") and the models whose queues are consumed ("queue").
+        :param interval: Seconds between heartbeats.
+        :param ttl: Seconds after which a worker without heartbeat is considered gone.
+        """
+        self._loaded_models = loaded_models
+        self._interval = interval
+        self._ttl = ttl
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._client = Redis.from_url(settings.REDIS_URL, socket_timeout=2)
+        self._advertised: set[str] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="model-advertiser", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+        try:
+            with self._client.pipeline() as pipe:
+                for key in self._advertised:
+                    pipe.zrem(key, self._worker_id)
+                pipe.execute()
+        except RedisError as e:
+            log.warning("Failed to withdraw model advertisement", error=str(e))
+        self._client.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.heartbeat()
+            self._stop.wait(self._interval)
+
+    def heartbeat(self) -> None:
+        now = time.time()
+        keys = {_key(kind, name) for kind, names in self._loaded_models().items() for name in names}
+        try:
+            with self._client.pipeline() as pipe:
+                for key in keys:
+                    pipe.zadd(key, {self._worker_id: now})
+                    pipe.zremrangebyscore(key, "-inf", now - self._ttl)
+                    pipe.expire(key, int(self._ttl) * 2)
+                for key in self._advertised - keys:
+                    # Evicted since the last heartbeat
+                    pipe.zrem(key, self._worker_id)
+                pipe.execute()
+            self._advertised = keys
+        except RedisError as e:
+            log.warning("Failed to advertise loaded models", error=str(e))
+
+
+class ModelRouter:
+    """
+    Chooses the queue of a task on the producer side, caching the warm lookups briefly.
+    """
+
+    def __init__(self, default_queue: str, ttl: float, cache_ttl: float):
+        """
+        :param default_queue: Queue consumed by every worker.
+        :param ttl: Seconds after which a worker without heartbeat is considered gone.
+        :param cache_ttl: Seconds a warm lookup is reused for.
+        """
+        self._default_queue = default_queue
+        self._ttl = ttl
+        self._cache_ttl = cache_ttl
+        self._cache: dict[str, tuple[float, bool]] = {}
+        self._client: AsyncRedis | None = None
+
+    async def _is_warm(self, model: str) -> bool:
+        cached = self._cache.get(model)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        if self._client is None:
+            self._client = AsyncRedis.from_url(settings.REDIS_URL, socket_timeout=1)
+        try:
+            warm = await self._client.zcount(_key("queue", model), time.time() - self._ttl, "+inf")
+        except RedisError as e:
+            # Routing is an optimization, the default queue always works
+            log.warning("Failed to look up warm workers", model=model, error=str(e))
+            warm = 0
+        self._cache[model] = (time.monotonic() + self._cache_ttl, warm > 0)
+        return warm > 0
+
+    async def queue_for(self, model: str) -> str:
+        """
+        Returns the queue of the model if a worker has it warm, the default queue otherwise.
+        """
+        if await self._is_warm(model):
+            TASK_ROUTES.labels("warm").inc()
+            return model_queue(self._default_queue, model)
+        TASK_ROUTES.labels("fallback").inc()
+        log.info("No warm worker for the model, using the default queue", model=model)
+        return self._default_queue
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_ROUTER: ModelRouter | None = None
+
+
+def get_router() -> ModelRouter:
+    global _ROUTER
+    if _ROUTER is None:
+        from src.workers.app import celery_app
+
+        _ROUTER = ModelRouter(
+            default_queue=celery_app.conf.task_default_queue,
+            ttl=settings.WORKER_HEARTBEAT_TTL,
+            cache_ttl=settings.ROUTING_CACHE_TTL,
+        )
+    return _ROUTER
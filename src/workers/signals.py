@@ -1,30 +1,224 @@
+import gc
+import os
+import time
+from pathlib import Path
+
 import structlog
 from celery.signals import (
+    celeryd_after_setup,
+    task_postrun,
+    worker_init,
     worker_process_init,
     worker_process_shutdown,
+    worker_shutdown,
 )
 
+from src.config import settings
+from src.metrics import build_registry, clear_multiproc_dir, mark_process_dead
+from src.storage import get_store
+from src.workers.checkpoints import CheckpointStore
 from src.workers.db import dispose_db_sync, init_db_sync
+from src.workers.memory import report_memory
+from src.workers.routing import ModelAdvertiser, model_queue
+from src.workers.writer import get_writer, stop_writer
 
 log = structlog.get_logger()
 
+_advertiser: ModelAdvertiser | None = None
+# Set in the main process when tasks run in threads of the main process (--pool threads)
+_threaded = False
+_last_blob_purge = float("-inf")
+# Seconds between purges of expired blobs by a worker process
+_BLOB_PURGE_INTERVAL = 3600
 
-@worker_process_init.connect
-def _proc_init(**_):
-    from src.transcription.enums import Model
+
+def _mark_ready() -> None:
+    if settings.WORKER_READY_FILE:
+        path = Path(settings.WORKER_READY_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{os.getpid()}\n")
+
+
+def _mark_not_ready() -> None:
+    if settings.WORKER_READY_FILE:
+        Path(settings.WORKER_READY_FILE).unlink(missing_ok=True)
+
+
+def _purge_blobs() -> None:
+    global _last_blob_purge
+    if time.monotonic() - _last_blob_purge < _BLOB_PURGE_INTERVAL:
+        return
+    _last_blob_purge = time.monotonic()
+    try:
+        purged = get_store().purge(settings.STORAGE_MAX_AGE)
+    except OSError as e:
+        log.warning("Failed to purge expired blobs", error=str(e))
+        return
+    if purged:
+        log.info("Purged expired blobs", blobs=purged)
+
+
+def _is_preprocessing() -> bool:
+    return settings.WORKER_ROLE == "preprocess"
+
+
+def _is_threaded(pool_cls) -> bool:
+    name = pool_cls if isinstance(pool_cls, str) else getattr(pool_cls, "__module__", "")
+    return name.rsplit(".", 1)[-1] in ("thread", "threads")
+
+
+@celeryd_after_setup.connect
+def _subscribe_model_queues(sender, instance, **_):
+    queues = instance.app.amqp.queues
+    if _is_preprocessing():
+        queues.select([settings.PREPROCESS_QUEUE])
+        log.info("Consuming the preprocessing queue", queue=settings.PREPROCESS_QUEUE)
+        return
+    # Besides the default queue, consume the queues of the preloaded models
+    for model in settings.WORKER_MODELS:
+        queues.select_add(model_queue(instance.app.conf.task_default_queue, model))
+    log.info("Consuming model queues", models=settings.WORKER_MODELS)
+
+
+def _share_models() -> None:
+    """
+    Loads the models in the main worker process, so the pool processes forked from it share
+    them copy-on-write instead of loading a copy each.
+    """
     from src.workers.state import get_transcriber
 
+    if settings.DEVICE != "cpu":
+        # A CUDA context does not survive fork
+        log.warning("Models are only shared on CPU", device=settings.DEVICE)
+        return
+
+    log.info("Loading shared models...")
+    # ASR models run on CTranslate2 thread pools, which do not survive fork either, so every
+    # pool process loads its own (see _proc_init). Align and diarization models are shared.
+    get_transcriber(preload=[])
+    # Keeps the garbage collector of the pool processes from writing to (and so copying)
+    # the pages of every object created so far
+    gc.freeze()
+    report_memory("main")
+    log.info("Shared models loaded")
+
+
+@worker_init.connect
+def _worker_init(sender=None, **_):
+    from prometheus_client import start_http_server
+
+    from src.workers.state import set_pool_size
+
+    global _threaded
+
+    # Left behind by a worker that did not shut down cleanly
+    _mark_not_ready()
+
+    purged = CheckpointStore(settings.CHECKPOINT_DIR).purge(settings.CHECKPOINT_MAX_AGE)
+    if purged:
+        log.info("Purged stale checkpoints", tasks=purged)
+    _purge_blobs()
+
+    _threaded = _is_threaded(getattr(sender, "pool_cls", "prefork"))
+    pool_size = getattr(sender, "concurrency", None) or 1
+    set_pool_size(pool_size, threaded=_threaded)
+
+    if settings.RUNTIME_PROFILE and not _is_preprocessing():
+        from src.workers.calibrate import load_profile
+
+        # Before any model is loaded, in the main process so the pool inherits the settings
+        load_profile(pool_size)
+
+    if settings.WORKER_METRICS_PORT is not None:
+        # Runs in the main process before the pool is started, so no child has written yet
+        clear_multiproc_dir()
+        start_http_server(settings.WORKER_METRICS_PORT, registry=build_registry())
+        log.info("Metrics exporter started", port=settings.WORKER_METRICS_PORT)
+
+    if _threaded:
+        # No pool processes: the threads share the models of the main process
+        _init_resources()
+    elif settings.SHARE_MODELS and not _is_preprocessing():
+        _share_models()
+
+
+def _init_resources() -> None:
+    global _advertiser
+
     log.info("Initializing resources...")
     init_db_sync()
-    get_transcriber(preload=[Model.TURBO])
+    get_writer()
+    if _is_preprocessing():
+        # No models (nor PyTorch) on preprocessing workers
+        _mark_ready()
+        log.info("Initialization complete")
+        return
+
+    import torch
+
+    from src.transcription.enums import Model
+    from src.workers.state import cpu_threads, get_transcriber
+
+    if settings.DEVICE == "cpu":
+        # Tasks split the cores instead of each starting a thread per core
+        torch.set_num_threads(cpu_threads())
+    preload = [Model(model) for model in settings.WORKER_MODELS]
+    if settings.LANGUAGE_DETECTION_MODEL:
+        preload.append(Model(settings.LANGUAGE_DETECTION_MODEL))
+    preload = list(dict.fromkeys(preload))
+    transcriber = get_transcriber(preload=preload)
+    # No-op unless the transcriber was inherited from the main process (SHARE_MODELS)
+    transcriber.preload_asr(preload)
+
+    _advertiser = ModelAdvertiser(
+        lambda: {**transcriber.loaded_models(), "queue": settings.WORKER_MODELS},
+        interval=settings.WORKER_HEARTBEAT_INTERVAL,
+        ttl=settings.WORKER_HEARTBEAT_TTL,
+    )
+    _advertiser.start()
+    report_memory("main" if _threaded else "child")
+
+    if settings.WORKER_WARMUP:
+        log.info("Warming up...")
+        log.info("Warm-up complete", seconds=round(transcriber.warm_up(), 3))
+    # Pool processes take tasks once they return from here: the first warm one makes the
+    # worker ready
+    _mark_ready()
     log.info("Initialization complete")
 
 
-@worker_process_shutdown.connect
-def _proc_shutdown(**_):
-    from src.workers.state import cleanup_transcriber
+@worker_process_init.connect
+def _proc_init(**_):
+    _init_resources()
+
 
+@task_postrun.connect
+def _task_postrun(**_):
+    report_memory("main" if _threaded else "child")
+    _purge_blobs()
+
+
+def _cleanup_resources() -> None:
     log.info("Cleaning up resources...")
+    if _advertiser is not None:
+        _advertiser.stop()
+    stop_writer()
     dispose_db_sync()
-    cleanup_transcriber()
+    if not _is_preprocessing():
+        from src.workers.state import cleanup_transcriber
+
+        cleanup_transcriber()
+    mark_process_dead(os.getpid())
     log.info("Shutdown complete")
+
+
+@worker_process_shutdown.connect
+def _proc_shutdown(**_):
+    _cleanup_resources()
+
+
+@worker_shutdown.connect
+def _worker_shutdown(**_):
+    _mark_not_ready()
+    if _threaded:
+        _cleanup_resources()
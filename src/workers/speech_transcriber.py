@@ -1,21 +1,60 @@
+import copy
 import gc
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable
 
+import numpy as np
 import torch
 from numpy import ndarray
 from whisperx.alignment import align, load_align_model
-from whisperx.asr import FasterWhisperPipeline, load_model
-from whisperx.audio import load_audio
+from whisperx.asr import FasterWhisperPipeline, WhisperModel, load_model
 from whisperx.diarize import DiarizationPipeline, assign_word_speakers
 from whisperx.types import AlignedTranscriptionResult, SingleSegment, TranscriptionResult
 
+from src.metrics import (
+    COLD_STARTS,
+    MODEL_CACHE,
+    MODEL_LOADS,
+    OOM_ERRORS,
+    REAL_TIME_FACTOR,
+    VAD_SKIPPED_SECONDS,
+    WARMUP_DURATION,
+)
 from src.transcription.enums import Language, Model
-from src.utils.retry import retry
+from src.utils.media import decode_audio
+from src.utils.retry import FatalError, retry
+from src.utils.synthetic import speech_like
 from src.workers import log
+from src.workers.batching import AdaptiveBatchSize
+from src.workers.channels import join_tracks, split_tracks
+from src.workers.checkpoints import TaskCheckpoints
+from src.workers.preprocess import is_pcm, load_pcm
+from src.workers.timings import StageTimings
+from src.workers.vad import SpeechMap, detect_speech
+
+SAMPLE_RATE = 16000
+# Audio of the warm-up: a few seconds, a single ASR chunk
+WARM_UP_SECONDS = 5.0
+
+
+def is_out_of_memory(error: BaseException) -> bool:
+    """
+    Tells whether the error was caused by running out of (GPU or host) memory.
+    """
+    if isinstance(error, (torch.cuda.OutOfMemoryError, MemoryError)):
+        return True
+    return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
 
 
 class SpeechTranscriber:
     """
     Handles speech transcription, alignment, and speaker diarization using WhisperX.
+
+    ``transcribe`` can be called from several threads at once: the models are loaded once and
+    shared, and every thread gets its own view of the ASR pipelines.
     """
 
     def __init__(
@@ -27,6 +66,18 @@ class SpeechTranscriber:
         chunk_size: int,
         init_asr_models: list[Model] | None = None,
         hf_token: str | None = None,
+        init_align_languages: list[Language] | None = None,
+        init_diarization: bool = True,
+        min_batch_size: int = 1,
+        batch_probe_after: int = 20,
+        vad_filter: bool = False,
+        language_model: Model | None = None,
+        language_windows: int = 3,
+        language_window_seconds: float = 30.0,
+        cpu_threads: int = 4,
+        asr_workers: int = 1,
+        audio_decoder: str = "auto",
+        concurrent_tasks: int = 1,
     ):
         """
         Initializes the SpeechTranscription with device configuration
@@ -36,9 +87,25 @@ class SpeechTranscriber:
         :param compute_type: Compute type for inference (e.g., "float32", "int8").
         :param download_root: Directory for downloading and caching models.
         :param init_asr_models: Optional list of asr models to preload at startup.
-        :param batch_size: Batch size for inference.
+        :param batch_size: Initial and largest batch size for inference.
         :param chunk_size: Chunk size (in seconds) for audio splitting.
         :param hf_token: Optional Hugging Face token for private diarization model access.
+        :param init_align_languages: Languages of the align models to preload (all if None).
+        :param init_diarization: Whether to preload the diarization pipeline.
+        :param min_batch_size: Smallest batch size to degrade to on out of memory errors.
+        :param batch_probe_after: Successes in a row before trying a larger batch size again.
+        :param vad_filter: Whether to remove silence before ASR, alignment and diarization.
+        :param language_model: ASR model detecting the language when it is not given, before
+            transcription (None leaves detection to the transcribing model).
+        :param language_windows: Number of audio windows the language is detected on.
+        :param language_window_seconds: Duration of every language detection window; Whisper
+            pads shorter windows to 30 seconds.
+        :param cpu_threads: Threads of every ASR batch on CPU (CTranslate2 intra threads).
+        :param asr_workers: ASR batches a model runs in parallel (CTranslate2 inter threads),
+            one per concurrent ``transcribe`` call.
+        :param audio_decoder: Decoder of audio files ("auto", "av" or "ffmpeg", see
+            ``decode_audio``).
+        :param concurrent_tasks: Tasks transcribed at once in threads of this process.
         """
         self.__asr_cache: dict[str, FasterWhisperPipeline] = {}
         self.__align_cache: dict[str, tuple] = {}
@@ -47,21 +114,55 @@ class SpeechTranscriber:
         self._device = device
         self._compute_type = compute_type
         self._download_root = download_root
-        self._batch_size = batch_size
+        self._batch_sizes = AdaptiveBatchSize(
+            initial=batch_size, min_size=min_batch_size, probe_after=batch_probe_after
+        )
         self._chunk_size = chunk_size
         self._hf_token = hf_token
+        self._vad_filter = vad_filter
+        self._language_model = language_model
+        self._language_windows = language_windows
+        self._language_window_seconds = language_window_seconds
+        self._cpu_threads = cpu_threads
+        self._asr_workers = asr_workers
+        self._audio_decoder = audio_decoder
+        self._concurrent_tasks = concurrent_tasks
 
-        self._load_models(init_asr_models)
+        # Guards the model caches; loading happens under it, so a model is loaded only once
+        self._cache_lock = threading.RLock()
+        # The diarization pipeline keeps per call state, so it runs one call at a time
+        self._diar_lock = threading.Lock()
+        self._thread_local = threading.local()
 
-    def _load_models(self, asr_models: list[Model] | None) -> None:
+        # Align models loaded in the background while ASR runs
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="align-prefetch")
+        self._prefetching: dict[str, Future] = {}
+
+        self._load_models(init_asr_models, init_align_languages, init_diarization)
+
+    def _load_models(
+        self,
+        asr_models: list[Model] | None,
+        align_languages: list[Language] | None,
+        diarization: bool,
+    ) -> None:
         """
-        Preloads specified ASR models into cache.
+        Preloads specified models into cache (the turbo ASR model if ``asr_models`` is None).
         """
-        for lang in Language.values():
-            self._load_align(lang_code=lang)
-        self._load_diar()
-        for model in asr_models or [Model.TURBO]:
-            self._load_asr(model)
+        for lang in align_languages if align_languages is not None else list(Language):
+            self._load_align(lang_code=lang.value)
+        if diarization:
+            self._load_diar()
+        self.preload_asr(asr_models if asr_models is not None else [Model.TURBO])
+
+    def preload_asr(self, models: list[Model]) -> None:
+        """
+        Loads the ASR models that are not in cache yet.
+        """
+        with self._cache_lock:
+            for model in models:
+                if model.value not in self.__asr_cache:
+                    self._load_asr(model)
 
     def _load_asr(self, model_name: Model) -> None:
         """
@@ -70,12 +171,26 @@ class SpeechTranscriber:
         model = model_name.value
         log.debug("Loading ASR model", model_name=model)
         try:
+            whisper_model = None
+            if self._asr_workers > 1:
+                # One copy of the weights serving several batches at once
+                whisper_model = WhisperModel(
+                    model,
+                    device=self._device,
+                    compute_type=self._compute_type,
+                    download_root=self._download_root,
+                    cpu_threads=self._cpu_threads,
+                    num_workers=self._asr_workers,
+                )
             self.__asr_cache[model] = load_model(
                 whisper_arch=model,
                 device=self._device,
                 compute_type=self._compute_type,
                 download_root=self._download_root,
+                threads=self._cpu_threads,
+                model=whisper_model,
             )
+            MODEL_LOADS.labels("asr", model).inc()
             log.debug("Loaded ASR model", model_name=model)
         except Exception as e:
             log.error("Failed to load ASR model", model_name=model, error=str(e))
@@ -93,6 +208,7 @@ class SpeechTranscriber:
                 model_dir=self._download_root,
             )
             self.__align_cache[lang_code] = (align_model, metadata)
+            MODEL_LOADS.labels("align", lang_code).inc()
             log.debug("Align model loaded", lang_code=lang_code)
         except Exception as e:
             log.error("Failed to load align model", lang_code=lang_code, error=str(e))
@@ -111,6 +227,7 @@ class SpeechTranscriber:
                 use_auth_token=self._hf_token,
                 device=self._device,
             )
+            MODEL_LOADS.labels("diarization", model_name).inc()
             log.debug("Diarization pipeline loaded", model_name=model_name)
         except Exception as e:
             log.error("Failed to load diarization pipeline", model_name=model_name, error=str(e))
@@ -120,18 +237,59 @@ class SpeechTranscriber:
         """
         Retrieves the ASR model from cache or loads it if not present.
         """
-        if model.value not in self.__asr_cache:
-            self._load_asr(model)
-        return self.__asr_cache[model.value]
+        with self._cache_lock:
+            if model.value not in self.__asr_cache:
+                MODEL_CACHE.labels("asr", "miss").inc()
+                COLD_STARTS.labels("asr", model.value).inc()
+                self._load_asr(model)
+            else:
+                MODEL_CACHE.labels("asr", "hit").inc()
+            pipeline = self.__asr_cache[model.value]
+        return self._thread_pipeline(model.value, pipeline)
+
+    def _thread_pipeline(
+        self, model: str, pipeline: FasterWhisperPipeline
+    ) -> FasterWhisperPipeline:
+        """
+        Returns the view of the current thread of a cached ASR pipeline.
+
+        The pipeline keeps the state of the last call in attributes (e.g. the tokenizer of the
+        last language), so every thread uses a shallow copy, sharing the model weights.
+        """
+        views = self._thread_local.__dict__.setdefault("asr", {})
+        view = views.get(model)
+        if view is None or view[0] is not pipeline:
+            view = views[model] = (pipeline, copy.copy(pipeline))
+        return view[1]
 
     def _get_align(self, lang_code: str):
         """
         Retrieves the alignment model for the specified language code from cache or loads it
         if not present.
         """
-        if lang_code not in self.__align_cache:
-            self._load_align(lang_code=lang_code)
-        return self.__align_cache[lang_code]
+        prefetching = self._prefetching.get(lang_code)
+        if prefetching is not None:
+            # A failed prefetch is retried (and raised) by the load below
+            wait([prefetching])
+        with self._cache_lock:
+            self._prefetching.pop(lang_code, None)
+            if lang_code not in self.__align_cache:
+                MODEL_CACHE.labels("align", "miss").inc()
+                COLD_STARTS.labels("align", lang_code).inc()
+                self._load_align(lang_code=lang_code)
+            else:
+                MODEL_CACHE.labels("align", "hit").inc()
+            return self.__align_cache[lang_code]
+
+    def _prefetch_align(self, lang_code: str) -> None:
+        """
+        Starts loading the alignment model in the background if it is not cached.
+        """
+        with self._cache_lock:
+            if lang_code in self.__align_cache or lang_code in self._prefetching:
+                return
+            log.debug("Prefetching align model", lang_code=lang_code)
+            self._prefetching[lang_code] = self._prefetcher.submit(self._load_align, lang_code)
 
     def _get_diar(
         self, model_name: str = "pyannote/speaker-diarization-3.1"
@@ -139,24 +297,68 @@ class SpeechTranscriber:
         """
         Retrieves the diarization model from cache or loads it if not present.
         """
-        if self.__diar_cache is None:
-            self._load_diar(model_name)
-        return self.__diar_cache
+        with self._cache_lock:
+            if self.__diar_cache is None:
+                MODEL_CACHE.labels("diarization", "miss").inc()
+                COLD_STARTS.labels("diarization", model_name).inc()
+                self._load_diar(model_name)
+            else:
+                MODEL_CACHE.labels("diarization", "hit").inc()
+            return self.__diar_cache
 
-    @staticmethod
-    def _load_audio(audio_file: str) -> ndarray:
+    def _load_audio(self, audio_file: str) -> ndarray:
         """
-        Loads audio file into a numpy array.
+        Loads audio file into a numpy array; PCM artifacts are memory-mapped, not decoded.
         """
+        if is_pcm(audio_file):
+            return load_pcm(audio_file)
         log.debug("Loading audio file", audio_file=audio_file)
         try:
-            audio = load_audio(file=audio_file)
+            audio = decode_audio(audio_file, SAMPLE_RATE, decoder=self._audio_decoder)
             log.debug("Loaded audio file", audio_file=audio_file)
         except RuntimeError as e:
             log.error("Failed to load audio file", audio_file=audio_file, error=str(e))
-            raise e
+            # The file cannot be decoded, retrying would not help
+            raise FatalError(f"Failed to load audio: {e}") from e
+        return audio
+
+    def _load_channels(self, audio_file: str) -> ndarray:
+        """
+        Loads a stereo audio file into a (samples, 2) numpy array.
+        """
+        if is_pcm(audio_file):
+            return load_pcm(audio_file)
+        log.debug("Loading audio file channels", audio_file=audio_file)
+        try:
+            audio = decode_audio(audio_file, SAMPLE_RATE, channels=2, decoder=self._audio_decoder)
+        except RuntimeError as e:
+            log.error("Failed to load audio file", audio_file=audio_file, error=str(e))
+            raise FatalError(f"Failed to load audio: {e}") from e
         return audio
 
+    def _detect_language(self, audio: ndarray) -> Language | None:
+        """
+        Detects the language with the language model on a few windows spread over the audio,
+        by majority vote. Returns None if detection fails or finds an unsupported language.
+        """
+        window = int(self._language_window_seconds * SAMPLE_RATE)
+        starts = [0]
+        if len(audio) > window:
+            starts = np.linspace(0, len(audio) - window, self._language_windows).astype(int)
+        try:
+            detector = self._get_asr(self._language_model)
+            votes = Counter(detector.detect_language(audio[s : s + window]) for s in starts)
+        except Exception as e:
+            log.warning("Language detection failed", error=str(e))
+            return None
+
+        code, count = votes.most_common(1)[0]
+        log.debug("Detected language", language=code, votes=count, windows=len(starts))
+        if code not in Language.values():
+            log.info("Detected language is not supported", language=code)
+            return None
+        return Language(code)
+
     @retry()
     def _transcribe(
         self,
@@ -164,36 +366,55 @@ class SpeechTranscriber:
         audio_file: str,
         model: Model,
         language: Language | None,
+        timings: StageTimings | None = None,
     ) -> TranscriptionResult:
         """
         Transcribes the given audio using the specified ASR model and language.
+
+        Out of memory errors are retried in place with smaller batches, keeping the models
+        loaded; only when the smallest batch size fails too are the models dropped.
         """
         asr = self._get_asr(model)
+        audio_seconds = len(audio) / SAMPLE_RATE
+        batch_size = self._batch_sizes.get(model.value, audio_seconds)
 
-        log.debug(
-            "Transcribing...",
-            model=model.value,
-            language=language.value,
-            batch_size=self._batch_size,
-            chuck_size=self._chunk_size,
-        )
-        try:
-            result = asr.transcribe(
-                audio=audio,
+        while True:
+            log.debug(
+                "Transcribing...",
+                model=model.value,
                 language=language.value if language else None,
-                batch_size=self._batch_size,
-                chunk_size=self._chunk_size,
+                batch_size=batch_size,
+                chuck_size=self._chunk_size,
             )
-            log.debug("Transcribed audio file %s", audio_file)
-        except RuntimeError as e:
-            log.error("Transcription runtime error", audio_file=audio_file, error=str(e))
-            self.clean()
-            raise e
-        except Exception as e:
-            log.error("Transcribing failed", audio_file=audio_file, error=str(e))
-            raise e
+            try:
+                result = asr.transcribe(
+                    audio=audio,
+                    language=language.value if language else None,
+                    batch_size=batch_size,
+                    chunk_size=self._chunk_size,
+                )
+                log.debug("Transcribed audio file %s", audio_file)
+            except (RuntimeError, MemoryError) as e:
+                if is_out_of_memory(e):
+                    OOM_ERRORS.labels("asr").inc()
+                    smaller = self._batch_sizes.on_out_of_memory(
+                        model.value, audio_seconds, batch_size
+                    )
+                    if smaller is not None:
+                        self._free_memory()
+                        batch_size = smaller
+                        continue
+                log.error("Transcription runtime error", audio_file=audio_file, error=str(e))
+                self._drop_models()
+                raise e
+            except Exception as e:
+                log.error("Transcribing failed", audio_file=audio_file, error=str(e))
+                raise e
 
-        return result
+            self._batch_sizes.on_success(model.value, audio_seconds, batch_size)
+            if timings is not None:
+                timings.add("asr", batch=batch_size)
+            return result
 
     @retry()
     def _align(
@@ -211,9 +432,13 @@ class SpeechTranscriber:
                 audio,
                 device=self._device,
             )
-        except RuntimeError as e:
+        except (RuntimeError, MemoryError) as e:
             log.warning("Alignment failed", error=str(e))
-            self.clean()
+            if is_out_of_memory(e):
+                OOM_ERRORS.labels("align").inc()
+                self._free_memory()
+            else:
+                self._drop_models()
             raise e
         except Exception as e:
             log.warning("Alignment failed (fallback to raw segments)", error=str(e))
@@ -232,13 +457,18 @@ class SpeechTranscriber:
             num_speakers=num_speakers,
         )
         try:
-            diar_segments = diarization_model(audio, num_speakers=num_speakers)
+            with self._diar_lock:
+                diar_segments = diarization_model(audio, num_speakers=num_speakers)
             result = assign_word_speakers(diar_segments, transcription_result)
             self._clean_cuda()
             return result
-        except RuntimeError as e:
+        except (RuntimeError, MemoryError) as e:
             log.warning("Diarization failed", error=str(e))
-            self.clean()
+            if is_out_of_memory(e):
+                OOM_ERRORS.labels("diarize").inc()
+                self._free_memory()
+            else:
+                self._drop_models()
             raise e
         except Exception as e:
             log.warning("Diarization failed", error=str(e))
@@ -252,36 +482,244 @@ class SpeechTranscriber:
         recognition_mode: bool,
         num_speakers: int | None,
         align_mode: bool,
+        timings: StageTimings | None = None,
+        checkpoints: TaskCheckpoints | None = None,
+        channel_split: bool = False,
+        on_language: Callable[[Language], None] | None = None,
     ) -> list[SingleSegment]:
         """
         Transcribes the given audio file, optionally performing speaker diarization.
+
+        :param timings: Optional collector of per-stage wall time and peak memory.
+        :param checkpoints: Optional checkpoints of the task; completed stages are loaded from
+            them instead of being run again, and the output of every stage run is saved.
+        :param channel_split: Transcribe the channels of a stereo recording separately, one
+            speaker per channel, instead of diarizing the mixdown.
+        :param on_language: Called with the language as soon as it is detected, before
+            transcription.
         """
-        audio = self._load_audio(audio_file)
+        if timings is None:
+            timings = self.new_timings()
+        start = time.perf_counter()
 
-        transcription_result = self._transcribe(
-            audio=audio,
-            audio_file=audio_file,
-            model=model,
-            language=language,
-        )
+        audio = checkpoints.load_audio() if checkpoints else None
+        if audio is None:
+            with timings.stage("load_audio"):
+                audio = (
+                    self._load_channels(audio_file)
+                    if channel_split
+                    else self._load_audio(audio_file)
+                )
+            if checkpoints and not is_pcm(audio_file):
+                # PCM artifacts are checkpoints already
+                checkpoints.save_audio(audio)
+        else:
+            log.info("Resuming from checkpoint", stage="load_audio", audio_file=audio_file)
+        audio_seconds = len(audio) / SAMPLE_RATE
+        timings.add("load_audio", audio_s=audio_seconds)
 
-        if align_mode:
-            align_result = self._align(
-                segments=transcription_result["segments"],
-                audio=audio,
-                language=transcription_result["language"],
+        # One track per channel in channel split mode, the mixdown otherwise
+        tracks = [audio]
+        if audio.ndim == 2:
+            tracks = [audio[:, 0], audio[:, 1]]
+            if np.array_equal(tracks[0], tracks[1]):
+                log.warning("Channels are identical, transcribing as mono", audio_file=audio_file)
+                tracks = [tracks[0]]
+
+        # Deterministic, so a resumed task compacts its checkpointed audio the same way
+        speech_maps: list[SpeechMap | None] = [None] * len(tracks)
+        if self._vad_filter:
+            with timings.stage("vad"):
+                speech_maps = [
+                    SpeechMap.build(detect_speech(track, SAMPLE_RATE), len(track), SAMPLE_RATE)
+                    for track in tracks
+                ]
+                tracks = [m.compact(track) for m, track in zip(speech_maps, tracks, strict=True)]
+            skipped_seconds = sum(m.skipped_seconds for m in speech_maps)
+            timings.add("vad", skipped_s=skipped_seconds)
+            VAD_SKIPPED_SECONDS.inc(skipped_seconds)
+            log.debug("Removed silence", audio_file=audio_file, skipped_s=round(skipped_seconds, 3))
+            if not any(m.regions for m in speech_maps):
+                log.info("No speech detected", audio_file=audio_file)
+                timings.add("total", wall_s=time.perf_counter() - start)
+                return []
+
+        offsets = [0]
+        if len(tracks) > 1:
+            # Longer than a chunk, so no ASR chunk spans both channels
+            audio, offsets = join_tracks(tracks, gap=(self._chunk_size + 1) * SAMPLE_RATE)
+        else:
+            audio = tracks[0]
+
+        transcription_result, aligned = None, False
+        if checkpoints and align_mode:
+            transcription_result = checkpoints.load("align")
+            aligned = transcription_result is not None
+        if checkpoints and transcription_result is None:
+            transcription_result = checkpoints.load("asr")
+
+        if transcription_result is None and language is None and self._language_model:
+            with timings.stage("detect_language"):
+                language = self._detect_language(audio)
+            if language is not None and on_language is not None:
+                on_language(language)
+        if transcription_result is None and language is not None and align_mode:
+            self._prefetch_align(language.value)
+
+        if transcription_result is None:
+            with timings.stage("asr"):
+                transcription_result = self._transcribe(
+                    audio=audio,
+                    audio_file=audio_file,
+                    model=model,
+                    language=language,
+                    timings=timings,
+                )
+            if checkpoints:
+                checkpoints.save("asr", transcription_result)
+        else:
+            log.info(
+                "Resuming from checkpoint",
+                stage="align" if aligned else "asr",
+                audio_file=audio_file,
             )
 
+        if align_mode and not aligned:
+            with timings.stage("align"):
+                align_result = self._align(
+                    segments=transcription_result["segments"],
+                    audio=audio,
+                    language=transcription_result["language"],
+                )
+
             if align_result:
                 transcription_result["segments"] = [
                     SingleSegment(start=seg["start"], end=seg["end"], text=seg["text"].strip())
                     for seg in align_result["segments"]
                 ]
+            if checkpoints:
+                checkpoints.save("align", transcription_result)
+
+        if len(tracks) > 1:
+            # The channel is the speaker, no diarization needed
+            segments = []
+            for channel, track_segments in enumerate(
+                split_tracks(
+                    transcription_result["segments"],
+                    offsets,
+                    [len(track) for track in tracks],
+                    SAMPLE_RATE,
+                )
+            ):
+                if speech_maps[channel] is not None:
+                    speech_maps[channel].restore(track_segments)
+                for segment in track_segments:
+                    segment["speaker"] = f"SPEAKER_{channel:02d}"
+                segments.extend(track_segments)
+            segments.sort(key=lambda segment: segment["start"])
+        else:
+            if recognition_mode:
+                with timings.stage("diarize"):
+                    transcription_result = self._diarize(transcription_result, audio, num_speakers)
+            segments = transcription_result["segments"]
+            if speech_maps[0] is not None:
+                speech_maps[0].restore(segments)
 
-        if recognition_mode:
-            transcription_result = self._diarize(transcription_result, audio, num_speakers)
+        elapsed = time.perf_counter() - start
+        timings.add("total", wall_s=elapsed)
+        if audio_seconds > 0:
+            timings.add("total", rtf=elapsed / audio_seconds)
+            REAL_TIME_FACTOR.labels(model.value).observe(elapsed / audio_seconds)
 
-        return transcription_result["segments"]
+        return segments
+
+    def loaded_models(self) -> dict[str, list[str]]:
+        """
+        Returns the names of the models in cache by kind.
+        """
+        return {
+            "asr": list(self.__asr_cache),
+            "align": list(self.__align_cache),
+            "diarization": ["pyannote/speaker-diarization-3.1"] if self.__diar_cache else [],
+        }
+
+    def warm_up(self) -> float:
+        """
+        Runs the cached models once on a few seconds of synthetic audio, so that lazy
+        allocations and thread pool start-up are not paid by the first task. Every ASR model is
+        run, but a single align model (English, or the first one cached). Failures are logged,
+        the models are still used by tasks.
+
+        :return: Duration of the warm-up in seconds.
+        """
+        with self._cache_lock:
+            asr_models = dict(self.__asr_cache)
+            align_models = dict(self.__align_cache)
+            diarization = self.__diar_cache
+
+        start = time.perf_counter()
+        audio = speech_like(WARM_UP_SECONDS)
+        segments = [{"text": "warm up", "start": 0.0, "end": WARM_UP_SECONDS}]
+        for model, pipeline in asr_models.items():
+            result = self._warm_up_stage(
+                "asr",
+                model,
+                self._thread_pipeline(model, pipeline).transcribe,
+                audio=audio,
+                language=Language.EN.value,
+                batch_size=1,
+                chunk_size=self._chunk_size,
+            )
+            if result and result["segments"]:
+                segments = result["segments"]
+        if align_models:
+            lang_code = (
+                Language.EN.value if Language.EN.value in align_models else next(iter(align_models))
+            )
+            align_model, metadata = align_models[lang_code]
+            self._warm_up_stage(
+                "align",
+                lang_code,
+                align,
+                segments,
+                align_model,
+                metadata,
+                audio,
+                device=self._device,
+            )
+        if diarization is not None:
+            self._warm_up_stage("diarize", "pyannote/speaker-diarization-3.1", diarization, audio)
+        self._clean_cuda()
+
+        elapsed = time.perf_counter() - start
+        WARMUP_DURATION.labels("total", "").observe(elapsed)
+        return elapsed
+
+    @staticmethod
+    def _warm_up_stage(stage: str, model: str, run: Callable, *args, **kwargs):
+        """
+        Runs one warm-up inference and records its duration.
+        """
+        start = time.perf_counter()
+        try:
+            result = run(*args, **kwargs)
+        except Exception as e:
+            log.warning("Warm-up failed", stage=stage, model=model, error=str(e))
+            return None
+        elapsed = time.perf_counter() - start
+        WARMUP_DURATION.labels(stage, model).observe(elapsed)
+        log.debug("Warmed up", stage=stage, model=model, seconds=round(elapsed, 3))
+        return result
+
+    def new_timings(self) -> StageTimings:
+        """
+        Creates a stage timings collector matching the device of the transcriber.
+        """
+        return StageTimings(
+            cuda=self._device.startswith("cuda") and torch.cuda.is_available(),
+            # Peaks are of the whole process and device, mixing concurrent tasks
+            peak_memory=self._concurrent_tasks == 1,
+        )
 
     def _clean_cuda(self) -> None:
         """
@@ -290,14 +728,39 @@ class SpeechTranscriber:
         if self._device.startswith("cuda") and torch.cuda.is_available():
             torch.cuda.empty_cache()
 
+    def _free_memory(self) -> None:
+        """
+        Releases unreferenced memory (e.g. after an out of memory error) but keeps the models.
+        """
+        gc.collect()
+        self._clean_cuda()
+
+    def _drop_models(self) -> None:
+        """
+        Drops the models after a runtime error, as it may leave them in a broken state.
+
+        When tasks run in threads, the models are shared by the other tasks, so only the
+        pipeline views of the current thread are dropped.
+        """
+        if self._concurrent_tasks > 1:
+            self._thread_local.__dict__.pop("asr", None)
+            self._free_memory()
+        else:
+            self.clean()
+
     def clean(self) -> None:
         """
         Cleans up cached models and frees memory.
         """
         log.debug("Cleaning up resources...")
-        self.__asr_cache.clear()
-        self.__align_cache.clear()
-        self.__diar_cache = None
+        wait(list(self._prefetching.values()))
+        with self._cache_lock:
+            self._prefetching.clear()
+            self.__asr_cache.clear()
+            self.__align_cache.clear()
+            self.__diar_cache = None
+            # Drops the pipeline views of every thread
+            self._thread_local = threading.local()
         gc.collect()
         self._clean_cuda()
         log.debug("Cleanup complete")
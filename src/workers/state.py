@@ -1,13 +1,42 @@
 from __future__ import annotations
 
+import os
 import threading
 
 from src.config import settings
 from src.transcription.enums import Model
+from src.workers.checkpoints import CheckpointStore
 from src.workers.speech_transcriber import SpeechTranscriber
 
 _TRANSCRIBER: SpeechTranscriber | None = None
+_CHECKPOINTS = CheckpointStore(settings.CHECKPOINT_DIR)
 _LOCK = threading.Lock()
+_POOL_SIZE = 1
+_THREADED = False
+
+
+def set_pool_size(size: int, threaded: bool = False) -> None:
+    """
+    Records the number of pool processes (or threads), so they split the CPU cores between
+    them. Call in the main worker process before the pool is started.
+    """
+    global _POOL_SIZE, _THREADED
+    _POOL_SIZE = max(size, 1)
+    _THREADED = threaded
+
+
+def cpu_threads() -> int:
+    """
+    Returns the number of inference threads of a task.
+    """
+    return max((os.cpu_count() or 1) // _POOL_SIZE, 1)
+
+
+def concurrent_tasks() -> int:
+    """
+    Returns the number of tasks run at once by the transcriber of this process.
+    """
+    return _POOL_SIZE if _THREADED else 1
 
 
 def get_transcriber(
@@ -22,14 +51,30 @@ def get_transcriber(
                     device=settings.DEVICE,
                     compute_type=settings.COMPUTE_TYPE,
                     download_root=settings.DOWNLOAD_ROOT,
-                    init_asr_models=list(preload or []),
+                    init_asr_models=preload,
                     batch_size=settings.BATCH_SIZE,
+                    min_batch_size=settings.BATCH_SIZE_MIN,
+                    batch_probe_after=settings.BATCH_SIZE_PROBE_AFTER,
+                    vad_filter=settings.VAD_FILTER,
+                    language_model=Model(settings.LANGUAGE_DETECTION_MODEL)
+                    if settings.LANGUAGE_DETECTION_MODEL
+                    else None,
+                    language_windows=settings.LANGUAGE_DETECTION_WINDOWS,
+                    language_window_seconds=settings.LANGUAGE_DETECTION_WINDOW_SECONDS,
                     chunk_size=settings.CHUNK_SIZE,
+                    cpu_threads=settings.ASR_INTRA_THREADS or cpu_threads(),
+                    asr_workers=settings.ASR_INTER_THREADS or concurrent_tasks(),
+                    audio_decoder=settings.AUDIO_DECODER,
+                    concurrent_tasks=concurrent_tasks(),
                     hf_token=settings.HF_TOKEN,
                 )
     return _TRANSCRIBER
 
 
+def get_checkpoints() -> CheckpointStore:
+    return _CHECKPOINTS
+
+
 def cleanup_transcriber():
     global _TRANSCRIBER
     with _LOCK:
@@ -1,35 +1,97 @@
+from src.config import settings
+
 from .app import celery_app
-from .hooks import DBReportingTask
+from .hooks import DBReportingTask, PreprocessingTask
 
 
 @celery_app.task(
-    bind=True, name="transcribe_audio", base=DBReportingTask, max_retries=3, default_retry_delay=60
+    bind=True,
+    name="transcribe_audio",
+    base=DBReportingTask,
+    max_retries=settings.TASK_MAX_RETRIES,
 )
 def transcribe_audio(
     self,
     *,
-    audio_file: str,
     model: str,
     language: str | None,
     recognition_mode: bool,
     num_speakers: int | None,
     align_mode: bool,
+    channel_split: bool = False,
+    audio_key: str | None = None,
+    audio_file: str | None = None,
+    pcm_key: str | None = None,
+    audio_url: str | None = None,
 ) -> dict:
-    import os
+    """
+    :param audio_key: Key of the upload in the blob store.
+    :param audio_url: URL of the audio, downloaded into the blob store when not uploaded.
+    :param audio_file: Local path of the upload, in tasks enqueued before the blob store.
+    :param pcm_key: Key of the decoded upload when it was pre-processed, read instead of the
+        upload.
+    """
+    import time
+    from contextlib import ExitStack
+    from uuid import UUID
 
+    from ..ratelimit import get_task_quota
+    from ..storage.cache import get_blob_cache
     from ..transcription.enums import Language, Model
-    from .state import get_transcriber
+    from ..utils.retry import backoff_delay, is_retryable
+    from .state import get_checkpoints, get_transcriber
+    from .writer import get_writer
 
     transcriber = get_transcriber()
+    checkpoints = get_checkpoints().for_task(self.request.id)
 
-    segments = transcriber.transcribe(
-        audio_file=audio_file,
-        model=Model(model),
-        language=Language(language) if language else None,
-        recognition_mode=recognition_mode,
-        num_speakers=num_speakers,
-        align_mode=align_mode,
-    )
+    timings = transcriber.new_timings()
+    enqueued_at = self.request.get("enqueued_at")
+    if enqueued_at:
+        timings.add("queue_wait", wall_s=max(time.time() - enqueued_at, 0))
+
+    def on_language(detected: Language) -> None:
+        # Visible on the task while it is still being transcribed
+        get_writer().submit(UUID(self.request.id), language=detected)
+
+    try:
+        if audio_url and not audio_key:
+            with timings.stage("download"):
+                audio_key, size = _download_audio(audio_url)
+            get_writer().submit(UUID(self.request.id), file_size_bytes=size)
+        with ExitStack() as stack:
+            if pcm_key or audio_key:
+                with timings.stage("fetch_audio"):
+                    blob = get_blob_cache().fetch(pcm_key or audio_key)
+                    audio_file = str(stack.enter_context(blob))
+            segments = transcriber.transcribe(
+                audio_file=audio_file,
+                model=Model(model),
+                language=Language(language) if language else None,
+                recognition_mode=recognition_mode,
+                num_speakers=num_speakers,
+                align_mode=align_mode,
+                timings=timings,
+                checkpoints=checkpoints,
+                channel_split=channel_split,
+                on_language=on_language,
+            )
+    except Exception as e:
+        if is_retryable(e) and self.request.retries < self.max_retries:
+            # Resumes from the checkpoints of the stages completed so far
+            countdown = backoff_delay(
+                self.request.retries,
+                settings.TASK_RETRY_BACKOFF,
+                settings.TASK_RETRY_BACKOFF_MAX,
+                jitter=True,
+            )
+            raise self.retry(exc=e, countdown=countdown) from e
+        raise
+
+    # Audio of unknown duration at submission, e.g. submitted by URL
+    audio_s = timings.as_dict().get("load_audio", {}).get("audio_s")
+    if audio_s is not None:
+        get_task_quota().charge(self.request.id, audio_s)
 
     result = [
         {
@@ -44,11 +106,115 @@ def transcribe_audio(
         for i, segment in enumerate(segments)
     ]
 
-    try:
-        os.remove(audio_file)
-    except FileNotFoundError:
-        pass
-
     return {
         "result": result,
+        "timings": timings.as_dict(),
     }
+
+
+@celery_app.task(
+    bind=True,
+    name="preprocess_audio",
+    base=PreprocessingTask,
+    max_retries=settings.TASK_MAX_RETRIES,
+)
+def preprocess_audio(
+    self,
+    *,
+    asr_queue: str,
+    audio_key: str | None = None,
+    audio_url: str | None = None,
+    **task_kwargs,
+) -> None:
+    """
+    Decodes an upload to PCM (see ``src.workers.preprocess``), records its exact duration
+    and enqueues its transcription with the same task id on ``asr_queue``.
+
+    :param audio_url: URL of the audio, downloaded into the blob store when not uploaded.
+    :param task_kwargs: Arguments of the transcription task.
+    """
+    import time
+    from uuid import UUID
+
+    from ..ratelimit import get_task_quota
+    from ..storage import BlobNotFoundError, get_store
+    from ..storage.cache import get_blob_cache
+    from ..utils.retry import backoff_delay, is_retryable
+    from .preprocess import decode_to_pcm, pcm_key, pcm_seconds
+    from .timings import StageTimings
+    from .writer import get_writer
+
+    timings = StageTimings()
+    enqueued_at = self.request.get("enqueued_at")
+    if enqueued_at:
+        timings.add("preprocess_wait", wall_s=max(time.time() - enqueued_at, 0))
+
+    channels = 2 if task_kwargs.get("channel_split") else 1
+    store = get_store()
+    try:
+        if audio_url and not audio_key:
+            with timings.stage("download"):
+                audio_key, size = _download_audio(audio_url)
+            get_writer().submit(UUID(self.request.id), file_size_bytes=size)
+        key = pcm_key(audio_key, channels)
+        with timings.stage("preprocess"):
+            try:
+                # Keyed by content: decoded already for a duplicate upload
+                size = store.size(key)
+            except BlobNotFoundError:
+                with get_blob_cache().fetch(audio_key) as audio:
+                    path = decode_to_pcm(audio, channels, settings.STORAGE_CACHE_DIR)
+                try:
+                    store.put_file(key, path)
+                    size = path.stat().st_size
+                finally:
+                    path.unlink(missing_ok=True)
+    except Exception as e:
+        if is_retryable(e) and self.request.retries < self.max_retries:
+            countdown = backoff_delay(
+                self.request.retries,
+                settings.TASK_RETRY_BACKOFF,
+                settings.TASK_RETRY_BACKOFF_MAX,
+                jitter=True,
+            )
+            raise self.retry(exc=e, countdown=countdown) from e
+        raise
+
+    duration = pcm_seconds(size, channels)
+    timings.add("preprocess", audio_s=duration)
+    get_task_quota().charge(self.request.id, duration)
+    get_writer().submit(
+        UUID(self.request.id),
+        duration_seconds=round(duration, 3),
+        timings=timings.as_dict(),
+        message="Preprocessed, queued for transcription",
+    )
+    transcribe_audio.apply_async(
+        kwargs={**task_kwargs, "audio_key": audio_key, "pcm_key": key},
+        task_id=self.request.id,
+        queue=asr_queue,
+        headers={"enqueued_at": time.time()},
+    )
+
+
+def _download_audio(audio_url: str) -> tuple[str, int]:
+    """
+    Downloads audio submitted by URL into the blob store, keeping it in the blob cache.
+
+    :return: The key of the audio in the blob store and its size in bytes.
+    """
+    from pathlib import Path
+
+    from ..storage import content_key
+    from ..storage.cache import get_blob_cache
+    from ..utils.download import download
+
+    # In the cache directory, so that the cache takes the file over without a copy
+    path, digest, suffix = download(audio_url, Path(settings.STORAGE_CACHE_DIR) / "downloads")
+    try:
+        size = path.stat().st_size
+        key = content_key(digest, suffix)
+        get_blob_cache().put(key, path)
+    finally:
+        path.unlink(missing_ok=True)
+    return key, size
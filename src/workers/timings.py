@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import resource
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from src.metrics import observe_stage
+
+_PROC_SELF = Path("/proc/self")
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size of the process (Linux only).
+    """
+    try:
+        (_PROC_SELF / "clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        for line in (_PROC_SELF / "status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is the peak of the whole process lifetime (in KiB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimings:
+    """
+    Records wall time and peak memory of the stages of a single task.
+
+    The result is a flat mapping of stage name to measurements, e.g.
+    ``{"asr": {"wall_s": 12.3, "peak_rss_mb": 2048.0}}``, stored on the task as is.
+    """
+
+    def __init__(self, cuda: bool = False, peak_memory: bool = True):
+        """
+        :param cuda: Also record the peak of allocated CUDA memory.
+        :param peak_memory: Record peak memory; the peaks are of the whole process (and CUDA
+            device), so only meaningful when the process runs a single task at a time.
+        """
+        self._cuda = cuda and peak_memory
+        self._peak_memory = peak_memory
+        self._stages: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measures the enclosed block as stage ``name``; also observed by the stage metrics.
+        """
+        can_reset = self._peak_memory and _reset_peak_rss()
+        if self._cuda:
+            import torch
+
+            torch.cuda.reset_peak_memory_stats()
+
+        start = time.perf_counter()
+        try:
+            with observe_stage(name):
+                yield
+        finally:
+            values = {"wall_s": time.perf_counter() - start}
+            if can_reset:
+                values["peak_rss_mb"] = _peak_rss_mb()
+            if self._cuda:
+                import torch
+
+                values["peak_gpu_mb"] = torch.cuda.max_memory_allocated() / 2**20
+            self.add(name, **values)
+
+    def add(self, name: str, **values: float) -> None:
+        self._stages.setdefault(name, {}).update(
+            {key: round(value, 3) for key, value in values.items()}
+        )
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        return {name: dict(values) for name, values in self._stages.items()}
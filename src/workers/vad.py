@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+
+import numpy as np
+
+FRAME_SECONDS = 0.03
+# Frames whose energy is computed at once, bounding the float64 copy of the audio (~2 minutes)
+_BLOCK_FRAMES = 4096
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int,
+    margin_db: float = 12.0,
+    min_speech: float = 0.25,
+    min_silence: float = 0.5,
+    padding: float = 0.2,
+    min_db: float = -60.0,
+) -> list[tuple[int, int]]:
+    """
+    Energy based voice activity detection.
+
+    A frame is speech when its energy is ``margin_db`` above the noise floor (estimated from
+    the quietest frames), but never needs to be more than 20 dB below the loudest frames, so
+    audio without pauses is kept whole. Frames quieter than ``min_db`` are never speech.
+
+    :param audio: Mono audio.
+    :param sample_rate: Sample rate of the audio.
+    :param margin_db: Energy above the noise floor for a frame to count as speech.
+    :param min_speech: Shorter speech regions are dropped (clicks, noise bursts).
+    :param min_silence: Shorter pauses do not split speech regions.
+    :param padding: Seconds kept around every speech region, so word edges are not cut.
+    :param min_db: Absolute energy (dBFS) below which a frame is silence.
+    :return: Sorted, non-overlapping ``(start, end)`` sample ranges of speech.
+    """
+    frame = max(int(FRAME_SECONDS * sample_rate), 1)
+    frames = len(audio) // frame
+    if frames == 0:
+        return []
+
+    framed = audio[: frames * frame].reshape(frames, frame)
+    energy = np.empty(frames)
+    for start in range(0, frames, _BLOCK_FRAMES):
+        block = framed[start : start + _BLOCK_FRAMES].astype(np.float64)
+        energy[start : start + _BLOCK_FRAMES] = np.square(block, out=block).mean(axis=1)
+    db = 10 * np.log10(energy + 1e-10)
+    floor, loud = np.percentile(db, 10), np.percentile(db, 95)
+    speech = db > max(min(floor + margin_db, loud - 20), min_db)
+
+    # Frame runs of speech as [start, end) frame indices
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    runs = list(zip(edges[::2].tolist(), edges[1::2].tolist(), strict=True))
+
+    merged: list[list[int]] = []
+    for start, end in runs:
+        if merged and (start - merged[-1][1]) * FRAME_SECONDS < min_silence:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pad = int(padding * sample_rate)
+    regions: list[tuple[int, int]] = []
+    for start, end in merged:
+        if (end - start) * FRAME_SECONDS < min_speech:
+            continue
+        start, end = max(start * frame - pad, 0), min(end * frame + pad, len(audio))
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+@dataclass(frozen=True)
+class SpeechMap:
+    """
+    Maps the timeline of the compacted, speech-only audio back to the original audio.
+
+    Speech regions are concatenated with ``gap`` samples of silence between them, so words
+    on both sides of a removed pause are not glued together.
+    """
+
+    regions: tuple[tuple[int, int], ...]
+    compact_starts: tuple[int, ...]
+    total_samples: int
+    sample_rate: int
+    gap: int
+
+    @classmethod
+    def build(
+        cls,
+        regions: list[tuple[int, int]],
+        total_samples: int,
+        sample_rate: int,
+        gap: float = 0.2,
+    ) -> SpeechMap:
+        gap_samples = int(gap * sample_rate)
+        starts, position = [], 0
+        for start, end in regions:
+            starts.append(position)
+            position += end - start + gap_samples
+        return cls(tuple(regions), tuple(starts), total_samples, sample_rate, gap_samples)
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.regions) / self.sample_rate
+
+    @property
+    def skipped_seconds(self) -> float:
+        return self.total_samples / self.sample_rate - self.speech_seconds
+
+    def compact(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Returns the speech regions of ``audio`` joined by short silences.
+        """
+        silence = np.zeros(self.gap, dtype=audio.dtype)
+        parts = []
+        for start, end in self.regions:
+            parts.extend((audio[start:end], silence))
+        return np.concatenate(parts[:-1]) if parts else audio[:0]
+
+    def to_original(self, seconds: float, snap_forward: bool = False) -> float:
+        """
+        Converts a time of the compacted audio to the original timeline.
+
+        :param seconds: Time in the compacted audio.
+        :param snap_forward: Times inside a gap snap to the start of the next region instead
+            of the end of the preceding one (for start times).
+        """
+        if not self.regions:
+            return seconds
+        sample = int(round(seconds * self.sample_rate))
+        index = max(bisect.bisect_right(self.compact_starts, sample) - 1, 0)
+        start, end = self.regions[index]
+        original = start + sample - self.compact_starts[index]
+        if original > end:
+            if snap_forward and index + 1 < len(self.regions):
+                original = self.regions[index + 1][0]
+            else:
+                original = end
+        return original / self.sample_rate
+
+    def restore(self, segments: list[dict]) -> list[dict]:
+        """
+        Maps the timestamps of segments (and of their words, if aligned) back to the original
+        timeline, in place.
+        """
+        for segment in segments:
+            for item in (segment, *segment.get("words", ())):
+                for key in ("start", "end"):
+                    if item.get(key) is not None:
+                        item[key] = round(self.to_original(item[key], key == "start"), 3)
+        return segments
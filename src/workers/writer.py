@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.config import settings
+from src.metrics import observe_stage
+from src.workers import log
+from src.workers.db import write_batch_sync
+
+_STOP = object()
+
+
+@dataclass
+class PendingWrite:
+    """
+    All not yet persisted changes for one task: column values, an optional result and
+    stage timings to merge into the ones already stored.
+    """
+
+    task_id: UUID
+    values: dict[str, Any] = field(default_factory=dict)
+    result: list[dict] | None = None
+    timings: dict[str, dict] | None = None
+
+    def merge(self, other: PendingWrite) -> None:
+        self.values.update(other.values)
+        if other.result is not None:
+            self.result = other.result
+        if other.timings:
+            self.timings = {**(self.timings or {}), **other.timings}
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (OperationalError, InterfaceError, PoolTimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class DBWriter:
+    """
+    Persists task status transitions and results from a background thread, so the task
+    hooks never wait for the database.
+
+    Writes are merged per task while they wait in the queue and applied in batches.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int,
+        retry_backoff: float,
+    ):
+        """
+        :param batch_size: Maximum number of tasks written in one transaction.
+        :param flush_interval: Time (in seconds) to wait for more writes before flushing.
+        :param max_retries: Number of retries of a batch on transient database errors.
+        :param retry_backoff: Base delay (in seconds) between retries, doubled every attempt.
+        """
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        log.debug("DB writer started")
+
+    def submit(
+        self,
+        task_id: UUID,
+        *,
+        result: list[dict] | None = None,
+        timings: dict[str, dict] | None = None,
+        **values,
+    ) -> None:
+        """
+        Queues changes of a task row (and optionally its result) without blocking.
+        """
+        self._queue.put(
+            PendingWrite(task_id=task_id, values=values, result=result, timings=timings)
+        )
+
+    def flush(self) -> None:
+        """
+        Blocks until every write submitted so far has been processed.
+        """
+        self._queue.join()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Flushes pending writes and stops the writer thread.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.error("DB writer did not stop in time", pending=self._queue.qsize())
+        else:
+            log.debug("DB writer stopped")
+        self._thread = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not (stopping and self._queue.empty()):
+            item = self._queue.get()
+            items = [item]
+            deadline = time.monotonic() + self._flush_interval
+            while item is not _STOP and len(items) < self._batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                items.append(item)
+
+            batch: dict[UUID, PendingWrite] = {}
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif item.task_id in batch:
+                    batch[item.task_id].merge(item)
+                else:
+                    batch[item.task_id] = item
+
+            try:
+                if batch:
+                    self._write(list(batch.values()))
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write(self, writes: list[PendingWrite]) -> None:
+        attempt = 0
+        while True:
+            try:
+                with observe_stage("db_write"):
+                    write_batch_sync(writes)
+                log.debug("DB writer flushed batch", size=len(writes))
+                return
+            except Exception as e:
+                if _is_transient(e) and attempt < self._max_retries:
+                    delay = self._retry_backoff * 2**attempt
+                    attempt += 1
+                    log.warning(
+                        "DB writer batch failed, retrying",
+                        attempt=attempt,
+                        delay=delay,
+                        error=str(e),
+                    )
+                    time.sleep(delay)
+                    continue
+                if len(writes) > 1 and not _is_transient(e):
+                    # Isolate the offending write so the rest of the batch is not lost
+                    for write in writes:
+                        self._write([write])
+                    return
+                log.error(
+                    "DB writer dropped writes",
+                    task_ids=[str(write.task_id) for write in writes],
+                    error=str(e),
+                )
+                return
+
+
+_WRITER: DBWriter | None = None
+_LOCK = threading.Lock()
+
+
+def get_writer() -> DBWriter:
+    global _WRITER
+    if _WRITER is None:
+        with _LOCK:
+            if _WRITER is None:
+                _WRITER = DBWriter(
+                    batch_size=settings.DB_WRITER_BATCH_SIZE,
+                    flush_interval=settings.DB_WRITER_FLUSH_INTERVAL,
+                    max_retries=settings.DB_WRITER_MAX_RETRIES,
+                    retry_backoff=settings.DB_WRITER_RETRY_BACKOFF,
+                )
+                _WRITER.start()
+    return _WRITER
+
+
+def stop_writer() -> None:
+    global _WRITER
+    with _LOCK:
+        if _WRITER is not None:
+            try:
+                _WRITER.stop(timeout=settings.DB_WRITER_SHUTDOWN_TIMEOUT)
+            finally:
+                _WRITER = None
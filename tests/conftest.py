@@ -0,0 +1,120 @@
+import io
+import os
+import wave
+
+import pytest
+from sqlalchemy import event
+
+# Importing the workers loads the application settings, which require connection
+# parameters. Nothing connects to them.
+for _name, _value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """
+    The tables on a SQLite database.
+    """
+    from advanced_alchemy.base import UUIDAuditBase
+    from advanced_alchemy.config import EngineConfig
+    from advanced_alchemy.extensions.fastapi import AsyncSessionConfig, SQLAlchemyAsyncConfig
+    from sqlalchemy.pool import NullPool
+
+    import src.database.models  # noqa: F401
+
+    config = SQLAlchemyAsyncConfig(
+        connection_string=f"sqlite+aiosqlite:///{tmp_path}/db.sqlite",
+        session_config=AsyncSessionConfig(expire_on_commit=False),
+        engine_config=EngineConfig(poolclass=NullPool, connect_args={"timeout": 30}),
+    )
+
+    @event.listens_for(config.get_engine().sync_engine, "connect")
+    def _wal(connection, _):
+        # Concurrent requests write from several connections
+        connection.execute("PRAGMA journal_mode=WAL")
+
+    async with config.get_engine().begin() as connection:
+        await connection.run_sync(UUIDAuditBase.metadata.create_all)
+    yield config
+    await config.get_engine().dispose()
+
+
+@pytest.fixture
+async def api_key(db):
+    from src.api_keys.models import ApiKeyModel
+    from src.users.models import UserModel
+
+    async with db.get_session() as session:
+        user = UserModel(company_name="test")
+        session.add(user)
+        await session.flush()
+        api_key = ApiKeyModel(key_hash="hash", key_prefix="prefix", user_id=user.id)
+        session.add(api_key)
+        await session.commit()
+    return api_key
+
+
+@pytest.fixture
+async def client(db, api_key, tmp_path, monkeypatch):
+    """
+    A client of the API authenticated with ``api_key``, storing blobs under ``tmp_path``.
+    """
+    import httpx
+
+    from src import storage
+    from src.main import app
+    from src.security.dependencies import get_api_key
+    from src.transcription.dependencies import provide_transcription_task_service
+    from src.transcription.services import TranscriptionTaskService
+    from src.uploads.dependencies import provide_upload_session_service
+    from src.uploads.services import UploadSessionService
+
+    monkeypatch.setattr(storage.settings, "STORAGE_BACKEND", "local")
+    monkeypatch.setattr(storage.settings, "STORAGE_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(storage.settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(storage, "_STORE", None)
+
+    async def transcription_task_service():
+        async with TranscriptionTaskService.new(config=db) as service:
+            yield service
+
+    async def upload_session_service():
+        async with UploadSessionService.new(config=db) as service:
+            yield service
+
+    app.dependency_overrides[get_api_key] = lambda: api_key
+    app.dependency_overrides[provide_transcription_task_service] = transcription_task_service
+    app.dependency_overrides[provide_upload_session_service] = upload_session_service
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def wav():
+    """
+    One second of silent stereo WAV.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as audio:
+        audio.setnchannels(2)
+        audio.setsampwidth(2)
+        audio.setframerate(16000)
+        audio.writeframes(bytes(4 * 16000))
+    return buffer.getvalue()
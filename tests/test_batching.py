@@ -0,0 +1,76 @@
+from src.workers.batching import AdaptiveBatchSize
+
+MODEL = "turbo"
+SHORT = 30.0  # seconds of audio, in the first duration bucket
+LONG = 1200.0
+
+
+def test_out_of_memory_halves_the_batch_size():
+    batch_sizes = AdaptiveBatchSize(initial=16)
+
+    assert batch_sizes.on_out_of_memory(MODEL, SHORT, 16) == 8
+    assert batch_sizes.get(MODEL, SHORT) == 8
+    assert batch_sizes.on_out_of_memory(MODEL, SHORT, 8) == 4
+    assert batch_sizes.get(MODEL, SHORT) == 4
+
+
+def test_out_of_memory_at_the_minimum_gives_up():
+    batch_sizes = AdaptiveBatchSize(initial=4, min_size=2)
+
+    assert batch_sizes.on_out_of_memory(MODEL, SHORT, 4) == 2
+    assert batch_sizes.on_out_of_memory(MODEL, SHORT, 2) is None
+    assert batch_sizes.get(MODEL, SHORT) == 2
+
+
+def test_probes_up_after_successes_in_a_row():
+    batch_sizes = AdaptiveBatchSize(initial=16, probe_after=3)
+    batch_sizes.on_out_of_memory(MODEL, SHORT, 16)
+
+    for _ in range(2):
+        batch_sizes.on_success(MODEL, SHORT, 8)
+    assert batch_sizes.get(MODEL, SHORT) == 8
+
+    batch_sizes.on_success(MODEL, SHORT, 8)
+    probed = batch_sizes.get(MODEL, SHORT)
+    assert 8 < probed < 16
+
+
+def test_never_probes_a_size_that_ran_out_of_memory():
+    batch_sizes = AdaptiveBatchSize(initial=16, probe_after=1)
+    batch_sizes.on_out_of_memory(MODEL, SHORT, 16)
+
+    for _ in range(10):
+        batch_sizes.on_success(MODEL, SHORT, batch_sizes.get(MODEL, SHORT))
+    assert batch_sizes.get(MODEL, SHORT) == 15
+
+
+def test_failed_probe_falls_back_to_the_largest_safe_size():
+    batch_sizes = AdaptiveBatchSize(initial=16, probe_after=1)
+    batch_sizes.on_out_of_memory(MODEL, SHORT, 16)
+    batch_sizes.on_out_of_memory(MODEL, SHORT, 8)
+    batch_sizes.on_success(MODEL, SHORT, 4)
+    batch_sizes.on_success(MODEL, SHORT, 4)
+    assert batch_sizes.get(MODEL, SHORT) == 7
+
+    # Halving 7 would give 3, below the size known to work
+    assert batch_sizes.on_out_of_memory(MODEL, SHORT, 7) == 4
+
+
+def test_successes_at_another_size_do_not_probe():
+    batch_sizes = AdaptiveBatchSize(initial=16, probe_after=1)
+    batch_sizes.on_out_of_memory(MODEL, SHORT, 16)
+
+    # E.g. a run started before the batch size changed
+    batch_sizes.on_success(MODEL, SHORT, 16)
+    assert batch_sizes.get(MODEL, SHORT) == 8
+
+
+def test_buckets_are_independent():
+    batch_sizes = AdaptiveBatchSize(initial=16)
+
+    batch_sizes.on_out_of_memory(MODEL, LONG, 16)
+
+    assert batch_sizes.get(MODEL, LONG) == 8
+    assert batch_sizes.get(MODEL, SHORT) == 16
+    assert batch_sizes.get("small", LONG) == 16
+    assert batch_sizes.snapshot()[f"{MODEL}/60"]["smallest_failed"] is None
@@ -0,0 +1,59 @@
+import pytest
+
+from src.storage.base import BlobStore
+from src.storage.cache import BlobCache
+
+
+class FakeStore(BlobStore):
+    """Remote store of blobs of 10 bytes, counting downloads."""
+
+    def __init__(self):
+        self.downloads: list[str] = []
+
+    def put_file(self, key, path):
+        pass
+
+    def size(self, key):
+        return 10
+
+    def read_range(self, key, start, length):
+        return b"x" * max(min(length, 10 - start), 0)
+
+    def delete(self, key):
+        pass
+
+    def purge(self, max_age):
+        return 0
+
+    def download(self, key, destination, chunk_size=2**20):
+        self.downloads.append(key)
+        super().download(key, destination, chunk_size)
+
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+
+def test_a_blob_is_downloaded_once(store, tmp_path):
+    cache = BlobCache(store, tmp_path, max_bytes=100)
+
+    with cache.fetch("a") as first:
+        assert first.read_bytes() == b"x" * 10
+    with cache.fetch("a") as second:
+        assert second == first
+
+    assert store.downloads == ["a"]
+
+
+def test_a_blob_in_use_is_not_evicted(store, tmp_path):
+    cache = BlobCache(store, tmp_path, max_bytes=15)
+
+    with cache.fetch("a") as in_use:
+        with cache.fetch("b") as other:
+            # Over the limit, but both still read
+            assert cache.evict() == 0
+        # The least recently used blob is in use: the other one goes
+        assert cache.evict() == 1
+        assert in_use.exists()
+        assert not other.exists()
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from src.utils.synthetic import SAMPLE_RATE, speech_like
+from src.workers.channels import join_tracks, split_tracks
+
+
+@pytest.fixture
+def stereo() -> np.ndarray:
+    return speech_like(4, channels=2)
+
+
+def test_tracks_are_joined_with_silence_between_them(stereo):
+    tracks = [stereo[:, 0], stereo[:, 1]]
+    gap = 2 * SAMPLE_RATE
+
+    audio, offsets = join_tracks(tracks, gap)
+
+    assert offsets == [0, 6 * SAMPLE_RATE]
+    assert len(audio) == 10 * SAMPLE_RATE
+    assert np.array_equal(audio[: 4 * SAMPLE_RATE], tracks[0])
+    assert not audio[4 * SAMPLE_RATE : 6 * SAMPLE_RATE].any()
+    assert np.array_equal(audio[6 * SAMPLE_RATE :], tracks[1])
+
+
+def test_segments_are_split_back_to_their_track():
+    # Two 4 second tracks, joined with 2 seconds of silence
+    offsets, lengths = [0, 6 * SAMPLE_RATE], [4 * SAMPLE_RATE] * 2
+    segments = [
+        {"text": "left", "start": 0.5, "end": 1.5},
+        # Ends past its track
+        {"text": "left", "start": 3.5, "end": 4.5},
+        # Starts in the silence between the tracks
+        {"text": "noise", "start": 5.0, "end": 5.5},
+        {
+            "text": "right",
+            "start": 6.25,
+            "end": 7.0,
+            "words": [{"word": "right", "start": 6.25, "end": None}],
+        },
+    ]
+
+    left, right = split_tracks(segments, offsets, lengths, SAMPLE_RATE)
+
+    assert left == [
+        {"text": "left", "start": 0.5, "end": 1.5},
+        {"text": "left", "start": 3.5, "end": 4.0},
+    ]
+    assert right == [
+        {
+            "text": "right",
+            "start": 0.25,
+            "end": 1.0,
+            "words": [{"word": "right", "start": 0.25, "end": None}],
+        }
+    ]
+
+
+def _transcriber():
+    pytest.importorskip("whisperx")
+    from src.workers.batching import AdaptiveBatchSize
+    from src.workers.speech_transcriber import SpeechTranscriber
+
+    transcriber = SpeechTranscriber.__new__(SpeechTranscriber)
+    transcriber._device = "cpu"
+    transcriber._concurrent_tasks = 1
+    transcriber._vad_filter = False
+    transcriber._language_model = None
+    transcriber._chunk_size = 10
+    transcriber._batch_sizes = AdaptiveBatchSize(initial=4)
+    return transcriber
+
+
+def _transcribe(transcriber, stereo):
+    from src.transcription.enums import Model
+
+    transcriber._load_channels = lambda audio_file: stereo
+    return transcriber.transcribe(
+        audio_file="a.wav",
+        model=Model.TURBO,
+        language=None,
+        recognition_mode=False,
+        num_speakers=None,
+        align_mode=False,
+        channel_split=True,
+    )
+
+
+def test_every_channel_is_a_speaker(stereo):
+    transcriber = _transcriber()
+    joined = []
+
+    class Pipeline:
+        def transcribe(self, audio, language, batch_size, chunk_size):
+            joined.append(audio)
+            # The right channel starts after the left one and a gap longer than a chunk
+            right = 4 + chunk_size + 1
+            segments = [
+                {"text": "left", "start": 2.0, "end": 3.0},
+                {"text": "right", "start": right + 0.5, "end": right + 1.5},
+                {"text": "right", "start": right + 2.5, "end": right + 3.5},
+            ]
+            return {"segments": segments, "language": "en"}
+
+    transcriber._get_asr = lambda model: Pipeline()
+
+    segments = _transcribe(transcriber, stereo)
+
+    # Both channels in a single call
+    assert len(joined) == 1
+    assert len(joined[0]) == (4 + 11 + 4) * SAMPLE_RATE
+    # Ordered by time across channels
+    assert segments == [
+        {"text": "right", "start": 0.5, "end": 1.5, "speaker": "SPEAKER_01"},
+        {"text": "left", "start": 2.0, "end": 3.0, "speaker": "SPEAKER_00"},
+        {"text": "right", "start": 2.5, "end": 3.5, "speaker": "SPEAKER_01"},
+    ]
+
+
+def test_identical_channels_are_transcribed_as_mono(stereo):
+    transcriber = _transcriber()
+    joined = []
+
+    class Pipeline:
+        def transcribe(self, audio, language, batch_size, chunk_size):
+            joined.append(audio)
+            return {"segments": [{"text": "both", "start": 0.5, "end": 1.5}], "language": "en"}
+
+    transcriber._get_asr = lambda model: Pipeline()
+    mono = np.stack([stereo[:, 0], stereo[:, 0]], axis=1)
+
+    segments = _transcribe(transcriber, mono)
+
+    assert np.array_equal(joined[0], stereo[:, 0])
+    assert segments == [{"text": "both", "start": 0.5, "end": 1.5}]
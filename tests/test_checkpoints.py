@@ -0,0 +1,157 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from celery import states
+
+from src.utils.retry import FatalError, is_retryable, retry
+from src.workers.checkpoints import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(tmp_path / "checkpoints")
+
+
+def test_stages_round_trip(store):
+    checkpoints = store.for_task("task")
+    audio = np.arange(10, dtype=np.float32)
+
+    checkpoints.save_audio(audio)
+    checkpoints.save("asr", {"segments": [], "language": "en"})
+
+    assert np.array_equal(checkpoints.load_audio(), audio)
+    assert checkpoints.load("asr") == {"segments": [], "language": "en"}
+    assert checkpoints.load("align") is None
+
+
+def test_a_stage_that_cannot_be_saved_is_skipped(store):
+    checkpoints = store.for_task("task")
+
+    checkpoints.save("asr", {"not json": object()})
+
+    assert checkpoints.load("asr") is None
+
+
+def test_an_unreadable_checkpoint_is_ignored(store, tmp_path):
+    checkpoints = store.for_task("task")
+    checkpoints.save("asr", {})
+    (tmp_path / "checkpoints" / "task" / "asr.json").write_text("{")
+
+    assert checkpoints.load("asr") is None
+
+
+def test_stale_checkpoints_are_purged(store, tmp_path):
+    store.for_task("stale").save("asr", {})
+    store.for_task("recent").save("asr", {})
+    old = time.time() - 7200
+    os.utime(tmp_path / "checkpoints" / "stale", (old, old))
+
+    assert store.purge(max_age=3600) == 1
+    assert store.for_task("stale").load("asr") is None
+    assert store.for_task("recent").load("asr") == {}
+
+
+class Flaky:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def stage(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "done"
+
+
+def test_retryable_errors_are_retried():
+    flaky = Flaky(OSError("network"), RuntimeError("CUDA error"))
+
+    assert retry(max_retries=3, backoff=0)(flaky.stage)() == "done"
+    assert flaky.calls == 3
+
+
+@pytest.mark.parametrize("error", [FatalError("bad audio"), ValueError("bug")])
+def test_other_errors_are_raised_at_once(error):
+    flaky = Flaky(error)
+
+    with pytest.raises(type(error)):
+        retry(max_retries=3, backoff=0)(flaky.stage)()
+    assert flaky.calls == 1
+    assert not is_retryable(error)
+
+
+def test_the_last_error_is_raised_after_the_last_attempt():
+    flaky = Flaky(OSError("first"), OSError("second"), OSError("third"))
+
+    with pytest.raises(OSError, match="second"):
+        retry(max_retries=2, backoff=0)(flaky.stage)()
+    assert flaky.calls == 2
+
+
+def test_a_retried_task_resumes_from_the_last_saved_stage(store):
+    pytest.importorskip("whisperx")
+    from src.transcription.enums import Model
+    from src.workers.batching import AdaptiveBatchSize
+    from src.workers.speech_transcriber import SAMPLE_RATE, SpeechTranscriber
+
+    calls = []
+
+    class Pipeline:
+        def transcribe(self, audio, language, batch_size, chunk_size):
+            calls.append("asr")
+            return {"segments": [{"text": " hello ", "start": 0.0, "end": 1.0}], "language": "en"}
+
+    def load_audio(audio_file):
+        calls.append("load_audio")
+        return np.zeros(SAMPLE_RATE * 2, dtype=np.float32)
+
+    def align(segments, audio, language):
+        calls.append("align")
+        if calls.count("align") == 1:
+            raise FatalError("align failed")
+        return {"segments": segments}
+
+    transcriber = SpeechTranscriber.__new__(SpeechTranscriber)
+    transcriber._device = "cpu"
+    transcriber._concurrent_tasks = 1
+    transcriber._vad_filter = False
+    transcriber._language_model = None
+    transcriber._chunk_size = 10
+    transcriber._batch_sizes = AdaptiveBatchSize(initial=4)
+    transcriber._get_asr = lambda model: Pipeline()
+    transcriber._load_audio = load_audio
+    transcriber._align = align
+
+    def transcribe():
+        return transcriber.transcribe(
+            audio_file="a.wav",
+            model=Model.TURBO,
+            language=None,
+            recognition_mode=False,
+            num_speakers=None,
+            align_mode=True,
+            checkpoints=store.for_task("task"),
+        )
+
+    with pytest.raises(FatalError):
+        transcribe()
+    segments = transcribe()
+
+    # Neither decoded nor transcribed again
+    assert calls == ["load_audio", "asr", "align", "align"]
+    assert segments == [{"text": "hello", "start": 0.0, "end": 1.0}]
+
+
+@pytest.mark.parametrize(("status", "kept"), [(states.RETRY, True), (states.SUCCESS, False)])
+def test_checkpoints_are_removed_once_the_task_ends(store, monkeypatch, status, kept):
+    pytest.importorskip("whisperx")
+    from src.workers.hooks import DBReportingTask
+
+    monkeypatch.setattr("src.workers.state._CHECKPOINTS", store)
+    store.for_task("task").save("asr", {})
+
+    DBReportingTask().after_return(status, None, "task", (), {}, None)
+
+    assert (store.for_task("task").load("asr") is not None) == kept
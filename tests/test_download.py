@@ -0,0 +1,113 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils.download import download
+from src.utils.retry import FatalError, is_retryable
+
+AUDIO = b"RIFF\0\0\0\0WAVEfmt " + bytes(2000)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves the audio, or one failure per path."""
+
+    def do_GET(self):
+        if self.path == "/audio.wav":
+            self._send(200, AUDIO)
+        elif self.path == "/redirect":
+            port = self.server.server_address[1]
+            self.send_response(302)
+            self.send_header("Location", f"http://localhost:{port}/audio.wav")
+            self.end_headers()
+        elif self.path == "/large":
+            self._send(200, AUDIO, length=10**9)
+        elif self.path == "/streamed":
+            # No Content-Length: the body ends with the connection
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(AUDIO)
+        elif self.path == "/truncated":
+            self._send(200, AUDIO[:100], length=len(AUDIO))
+        elif self.path == "/unavailable":
+            self._send(503, b"")
+        else:
+            self._send(404, b"")
+
+    def _send(self, status, body, length=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body) if length is None else length))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr("src.utils.download.settings.URL_ALLOWED_HOSTS", ["127.0.0.1"])
+    monkeypatch.setattr("src.utils.download.settings.URL_MAX_BYTES", 1000 + len(AUDIO))
+    monkeypatch.setattr("src.utils.download.settings.URL_TIMEOUT", 5.0)
+
+
+def _downloads(directory):
+    return [path for path in directory.iterdir() if path.name.startswith(".download_")]
+
+
+def test_download(server, tmp_path):
+    path, digest, suffix = download(f"{server}/audio.wav", tmp_path)
+
+    assert path.read_bytes() == AUDIO
+    assert len(digest) == 64
+    assert suffix == ".wav"
+
+
+def test_a_host_not_allowed_is_refused(server, tmp_path):
+    with pytest.raises(FatalError, match="not allowed"):
+        download(server.replace("127.0.0.1", "localhost") + "/audio.wav", tmp_path)
+
+
+def test_a_redirect_to_a_host_not_allowed_is_fatal(server, tmp_path):
+    with pytest.raises(FatalError, match="Redirected"):
+        download(f"{server}/redirect", tmp_path)
+    assert _downloads(tmp_path) == []
+
+
+@pytest.mark.parametrize("path", ["/large", "/streamed"])
+def test_audio_over_the_limit_is_refused(server, tmp_path, monkeypatch, path):
+    monkeypatch.setattr("src.utils.download.settings.URL_MAX_BYTES", 1000)
+
+    with pytest.raises(FatalError, match="larger than"):
+        download(f"{server}{path}", tmp_path)
+    assert _downloads(tmp_path) == []
+
+
+def test_a_truncated_body_is_retryable(server, tmp_path):
+    with pytest.raises(ConnectionError, match="interrupted") as error:
+        download(f"{server}/truncated", tmp_path)
+    assert is_retryable(error.value)
+    assert _downloads(tmp_path) == []
+
+
+def test_a_transient_status_is_retryable(server, tmp_path):
+    with pytest.raises(OSError) as error:
+        download(f"{server}/unavailable", tmp_path)
+    assert is_retryable(error.value)
+    assert _downloads(tmp_path) == []
+
+
+def test_a_missing_file_is_fatal(server, tmp_path):
+    with pytest.raises(FatalError, match="HTTP 404"):
+        download(f"{server}/missing", tmp_path)
+    assert _downloads(tmp_path) == []
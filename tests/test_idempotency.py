@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from src.transcription.models import TranscriptionTaskModel
+from src.transcription.services import TranscriptionTaskService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _count_tasks(db) -> int:
+    async with db.get_session() as session:
+        return await session.scalar(select(func.count()).select_from(TranscriptionTaskModel))
+
+
+def _submit(client, wav, key, **form):
+    return client.post(
+        "/transcribe",
+        files={"file": ("a.wav", wav)},
+        data=form,
+        headers={"Idempotency-Key": key},
+    )
+
+
+async def test_a_retry_with_the_same_key_returns_the_first_task(client, db, wav):
+    first = await _submit(client, wav, "key")
+    retry = await _submit(client, wav, "key")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["task_id"] == first.json()["task_id"]
+    assert await _count_tasks(db) == 1
+
+
+async def test_the_same_key_for_another_request_is_refused(client, db, wav):
+    await _submit(client, wav, "key")
+    other = await _submit(client, wav, "key", align_mode="true")
+
+    assert other.status_code == 422
+    assert other.json()["detail"] == "Idempotency-Key already used for another request"
+    assert await _count_tasks(db) == 1
+
+
+async def test_other_keys_create_other_tasks(client, db, wav):
+    first = await _submit(client, wav, "first")
+    second = await _submit(client, wav, "second")
+
+    assert first.json()["task_id"] != second.json()["task_id"]
+    assert await _count_tasks(db) == 2
+
+
+async def test_concurrent_claims_of_a_key_let_one_through(db, api_key):
+    async with (
+        TranscriptionTaskService.new(config=db) as first,
+        TranscriptionTaskService.new(config=db) as second,
+    ):
+        assert await first._claim_idempotency_key(api_key.id, "key", "fingerprint") is None
+
+        # The second request looked the key up before the first one inserted it
+        async def not_found(**kwargs):
+            return None
+
+        second.idempotency_repository.get_one_or_none = not_found
+        # The insert breaks the unique constraint, in a savepoint
+        with pytest.raises(HTTPException) as error:
+            await second._claim_idempotency_key(api_key.id, "key", "fingerprint")
+
+    assert error.value.status_code == 409
+    assert error.value.headers == {"Retry-After": "1"}
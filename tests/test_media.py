@@ -0,0 +1,32 @@
+import pytest
+
+from src.utils.media import sniff_format
+
+
+def _ftyp(brand: bytes) -> bytes:
+    return b"\0\0\0\x18ftyp" + brand + b"\0\0\0\0" + brand + b"\0" * 40
+
+
+@pytest.mark.parametrize("brand", [b"M4A ", b"M4B ", b"mp42", b"isom"])
+def test_mp4_audio_brands_are_m4a(brand):
+    assert sniff_format(_ftyp(brand)) == ".m4a"
+
+
+@pytest.mark.parametrize("brand", [b"heic", b"qt  ", b"3gp4", b"avif"])
+def test_other_iso_media_files_are_rejected(brand):
+    assert sniff_format(_ftyp(brand)) is None
+
+
+@pytest.mark.parametrize(
+    ("head", "suffix"),
+    [
+        (b"RIFF\0\0\0\0WAVEfmt ", ".wav"),
+        (b"fLaC\0\0\0\x22", ".flac"),
+        (b"OggS" + b"\0" * 24 + b"OpusHead", ".opus"),
+        (b"ID3\x04\0", ".mp3"),
+        (b"\xff\xfb\x90\x00", ".mp3"),
+        (b"\xff\xf1\x50\x80", None),
+    ],
+)
+def test_sniff_format(head, suffix):
+    assert sniff_format(head) == suffix
@@ -0,0 +1,72 @@
+from contextlib import nullcontext
+
+import pytest
+from sqlalchemy import select
+
+from src.transcription.models import TaskOutboxModel
+from src.transcription.outbox import OutboxRelay
+from src.workers.app import celery_app
+
+pytestmark = pytest.mark.anyio
+
+
+class Broker:
+    """Records the published tasks, or fails to publish them."""
+
+    def __init__(self):
+        self.failing = True
+        self.published: list[str] = []
+
+    def send_task(self, name, task_id, queue, kwargs, headers, producer):
+        if self.failing:
+            raise ConnectionError("Broker unavailable")
+        self.published.append(task_id)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = Broker()
+    monkeypatch.setattr(celery_app, "producer_or_acquire", lambda: nullcontext())
+    monkeypatch.setattr(celery_app, "send_task", broker.send_task)
+    monkeypatch.setattr("src.transcription.outbox.settings.MODEL_ROUTING", False)
+    # Failed publishes are due again at once
+    monkeypatch.setattr("src.transcription.outbox.settings.OUTBOX_RETRY_BACKOFF", 0)
+    return broker
+
+
+async def _outbox(db) -> list[TaskOutboxModel]:
+    async with db.get_session() as session:
+        return list((await session.execute(select(TaskOutboxModel))).scalars())
+
+
+async def test_failed_publishes_are_retried_then_removed(client, db, wav, broker):
+    task_ids = set()
+    for _ in range(3):
+        response = await client.post("/transcribe", files={"file": ("a.wav", wav)})
+        task_ids.add(response.json()["task_id"])
+    relay = OutboxRelay(db, batch_size=10, poll_interval=1.0)
+
+    assert await relay.relay_once() == 0
+    rows = await _outbox(db)
+    assert {str(row.task_id) for row in rows} == task_ids
+    assert all(row.attempts == 1 for row in rows)
+    assert all(row.last_error == "Broker unavailable" for row in rows)
+
+    broker.failing = False
+    assert await relay.relay_once() == 3
+    assert set(broker.published) == task_ids
+    assert await _outbox(db) == []
+    assert await relay.relay_once() == 0
+
+
+async def test_rows_waiting_for_a_retry_are_not_published(client, db, wav, broker, monkeypatch):
+    monkeypatch.setattr("src.transcription.outbox.settings.OUTBOX_RETRY_BACKOFF", 60)
+    await client.post("/transcribe", files={"file": ("a.wav", wav)})
+    relay = OutboxRelay(db, batch_size=10, poll_interval=1.0)
+    await relay.relay_once()
+
+    broker.failing = False
+
+    assert await relay.relay_once() == 0
+    assert broker.published == []
+    assert len(await _outbox(db)) == 1
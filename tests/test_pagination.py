@@ -0,0 +1,88 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.transcription.enums import Model
+from src.transcription.models import Status, TranscriptionTaskModel
+from src.transcription.services import _decode_cursor, _encode_cursor
+
+CREATED_AT = datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_a_cursor_round_trips():
+    task_id = uuid4()
+
+    assert _decode_cursor(_encode_cursor(CREATED_AT, task_id)) == (CREATED_AT, task_id)
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        _encode_cursor(CREATED_AT, uuid4())[:-4],
+        _b64(f"{CREATED_AT.isoformat()}"),
+        _b64(f"{CREATED_AT.isoformat()},{uuid4()},extra"),
+        _b64(f"{CREATED_AT.isoformat()},not-a-uuid"),
+        _b64(f"yesterday,{uuid4()}"),
+        # Without a time zone, comparisons with the column would be off
+        _b64(f"{CREATED_AT.replace(tzinfo=None).isoformat()},{uuid4()}"),
+        base64.urlsafe_b64encode(b"\xff\xfe,\x00").decode(),
+    ],
+)
+def test_a_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+@pytest.fixture
+async def tasks(db, api_key) -> list[UUID]:
+    """
+    Tasks of the API key, three of them created at the same time, newest first.
+    """
+    created_at = [CREATED_AT + timedelta(seconds=1)] + [CREATED_AT] * 3
+    created_at += [CREATED_AT - timedelta(seconds=1)]
+    rows = [
+        TranscriptionTaskModel(
+            id=uuid4(),
+            api_key_id=api_key.id,
+            status=Status.PENDING,
+            model=Model.TURBO,
+            created_at=created,
+        )
+        for created in created_at
+    ]
+    async with db.get_session() as session:
+        session.add_all(rows)
+        await session.commit()
+    rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+    return [str(row.id) for row in rows]
+
+
+@pytest.mark.anyio
+async def test_pages_neither_skip_nor_repeat_tasks_created_at_the_same_time(client, tasks):
+    listed, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = (await client.get("/transcribe", params=params)).json()
+        listed += [task["task_id"] for task in page["tasks"]]
+        pages += 1
+        cursor = page.get("next_cursor")
+        if cursor is None:
+            break
+
+    assert listed == tasks
+    assert pages == 3
+
+
+@pytest.mark.anyio
+async def test_the_listing_rejects_a_tampered_cursor(client, tasks):
+    response = await client.get("/transcribe", params={"cursor": "not a cursor"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Invalid cursor"
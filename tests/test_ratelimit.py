@@ -0,0 +1,190 @@
+from uuid import uuid4
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from src.ratelimit import Admission, Limits, RateLimiter, TaskQuota  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+# One audio second per wall clock second
+AUDIO_PER_HOUR = 3600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("src.ratelimit.time.time", clock)
+    return clock
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "src.ratelimit.AsyncRedis.from_url",
+        lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server),
+    )
+    monkeypatch.setattr(
+        "src.ratelimit.Redis.from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server)
+    )
+    return server
+
+
+@pytest.fixture
+async def limiter(server):
+    limiter = RateLimiter(task_ttl=60)
+    yield limiter
+    await limiter.close()
+
+
+def _limits(audio_seconds_per_hour=None, max_concurrent_tasks=None) -> Limits:
+    return Limits(
+        audio_seconds_per_hour=audio_seconds_per_hour, max_concurrent_tasks=max_concurrent_tasks
+    )
+
+
+async def test_the_bucket_refills_over_time(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR)
+    admission = await limiter.acquire(key, limits, uuid4(), AUDIO_PER_HOUR)
+    assert admission.exceeded is None
+    assert admission.tokens == 0
+
+    clock.now += 10
+    admission = await limiter.acquire(key, limits, uuid4(), 4)
+
+    assert admission.exceeded is None
+    assert admission.tokens == pytest.approx(6)
+
+
+async def test_audio_over_the_allowance_is_refused_until_refilled(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR)
+    await limiter.acquire(key, limits, uuid4(), AUDIO_PER_HOUR - 30)
+
+    admission = await limiter.acquire(key, limits, uuid4(), 100)
+
+    assert admission.exceeded == "audio"
+    assert admission.retry_after == pytest.approx(70)
+    assert admission.headers()["Retry-After"] == "70"
+    clock.now += 70
+    assert (await limiter.acquire(key, limits, uuid4(), 100)).exceeded is None
+
+
+async def test_audio_longer_than_the_bucket_goes_through_a_full_bucket(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR)
+
+    admission = await limiter.acquire(key, limits, uuid4(), 2 * AUDIO_PER_HOUR)
+    assert admission.exceeded is None
+    assert admission.tokens == -AUDIO_PER_HOUR
+
+    # The debt holds back the next submissions
+    admission = await limiter.acquire(key, limits, uuid4(), 1)
+    assert admission.exceeded == "audio"
+    assert admission.retry_after == pytest.approx(AUDIO_PER_HOUR + 1)
+
+
+async def test_concurrent_tasks_are_limited_until_released(limiter, clock):
+    key, limits = uuid4(), _limits(max_concurrent_tasks=2)
+    first, second = uuid4(), uuid4()
+    assert (await limiter.acquire(key, limits, first, None)).exceeded is None
+    assert (await limiter.acquire(key, limits, second, None)).exceeded is None
+
+    admission = await limiter.acquire(key, limits, uuid4(), None)
+    assert admission.exceeded == "tasks"
+    assert admission.retry_after is None
+
+    await limiter.release(key, first)
+    assert (await limiter.acquire(key, limits, uuid4(), None)).exceeded is None
+
+
+async def test_tasks_stop_counting_after_their_ttl(limiter, clock):
+    key, limits = uuid4(), _limits(max_concurrent_tasks=1)
+    await limiter.acquire(key, limits, uuid4(), None)
+    assert (await limiter.acquire(key, limits, uuid4(), None)).exceeded == "tasks"
+
+    # The end of the first task was lost
+    clock.now += 61
+
+    assert (await limiter.acquire(key, limits, uuid4(), None)).exceeded is None
+
+
+async def test_the_audio_of_a_task_is_charged_once(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR)
+    task_id = uuid4()
+    # Duration unknown at submission, e.g. submitted by URL
+    await limiter.acquire(key, limits, task_id, None)
+    quota = TaskQuota()
+
+    quota.charge(str(task_id), 100)
+    quota.charge(str(task_id), 100)
+
+    admission = await limiter.acquire(key, limits, uuid4(), 0)
+    assert admission.tokens == pytest.approx(AUDIO_PER_HOUR - 100)
+
+
+async def test_audio_charged_at_submission_is_not_charged_again(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR)
+    task_id = uuid4()
+    await limiter.acquire(key, limits, task_id, 100)
+
+    TaskQuota().charge(str(task_id), 100)
+
+    admission = await limiter.acquire(key, limits, uuid4(), 0)
+    assert admission.tokens == pytest.approx(AUDIO_PER_HOUR - 100)
+
+
+async def test_a_released_task_is_not_charged(limiter, clock):
+    key, limits = uuid4(), _limits(AUDIO_PER_HOUR, max_concurrent_tasks=1)
+    task_id = uuid4()
+    await limiter.acquire(key, limits, task_id, None)
+    quota = TaskQuota()
+
+    quota.release(str(task_id))
+    quota.charge(str(task_id), 100)
+
+    admission = await limiter.acquire(key, limits, uuid4(), 0)
+    assert admission.exceeded is None
+    assert admission.tokens == pytest.approx(AUDIO_PER_HOUR)
+
+
+def test_headers():
+    admission = Admission(
+        limits=_limits(AUDIO_PER_HOUR), exceeded="audio", tokens=1800.4, retry_after=12.2
+    )
+
+    assert admission.headers() == {
+        "RateLimit-Limit": "3600",
+        "RateLimit-Remaining": "1800",
+        "RateLimit-Reset": "1800",
+        "Retry-After": "13",
+    }
+
+
+def test_headers_of_a_bucket_in_debt():
+    admission = Admission(
+        limits=_limits(AUDIO_PER_HOUR), exceeded=None, tokens=-100.0, retry_after=None
+    )
+
+    assert admission.headers() == {
+        "RateLimit-Limit": "3600",
+        "RateLimit-Remaining": "0",
+        "RateLimit-Reset": "3700",
+    }
+
+
+def test_no_headers_without_an_audio_limit():
+    admission = Admission(
+        limits=_limits(max_concurrent_tasks=1), exceeded="tasks", tokens=None, retry_after=None
+    )
+
+    assert admission.headers() == {}
@@ -0,0 +1,144 @@
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from src.storage.base import BlobNotFoundError, StorageError  # noqa: E402
+from src.storage.cache import BlobCache  # noqa: E402
+from src.storage.s3 import S3BlobStore  # noqa: E402
+
+CONTENT = b"RIFF" + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def store(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "test")
+    with moto.mock_aws():
+        store = S3BlobStore("speech", prefix="speech/", region="us-east-1")
+        store._client.create_bucket(Bucket="speech")
+        yield store
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "audio.wav"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def downloads(store, monkeypatch) -> list[str]:
+    downloads = []
+
+    def download(key, destination, chunk_size=2**20):
+        downloads.append(key)
+        S3BlobStore.download(store, key, destination, chunk_size)
+
+    monkeypatch.setattr(store, "download", download)
+    return downloads
+
+
+def test_a_blob_round_trips(store, audio, tmp_path):
+    store.put_file("audio/ab/abc.wav", audio)
+
+    assert store.size("audio/ab/abc.wav") == len(CONTENT)
+    assert store.read_range("audio/ab/abc.wav", 4, 8) == bytes(range(8))
+    assert store.local_path("audio/ab/abc.wav") is None
+    # Stored under the prefix
+    head = store._client.head_object(Bucket="speech", Key="speech/audio/ab/abc.wav")
+    assert head["ContentLength"] == len(CONTENT)
+
+    # Resumed from a partial download, in several ranged reads
+    partial = tmp_path / "partial"
+    partial.write_bytes(CONTENT[:100])
+    store.download("audio/ab/abc.wav", partial, chunk_size=300)
+    assert partial.read_bytes() == CONTENT
+
+
+def test_a_stored_blob_is_touched_not_uploaded_again(store, audio, monkeypatch):
+    store.put_file("audio/ab/abc.wav", audio)
+
+    def upload_file(*args, **kwargs):
+        raise AssertionError("Uploaded again")
+
+    monkeypatch.setattr(store._client, "upload_file", upload_file)
+    store.put_file("audio/ab/abc.wav", audio)
+
+    assert store.read_range("audio/ab/abc.wav", 0, len(CONTENT)) == CONTENT
+
+
+def test_a_missing_blob_is_not_found(store, audio):
+    store.put_file("audio/ab/abc.wav", audio)
+    store.delete("audio/ab/abc.wav")
+
+    with pytest.raises(BlobNotFoundError):
+        store.size("audio/ab/abc.wav")
+    with pytest.raises(BlobNotFoundError):
+        store.read_range("audio/ab/abc.wav", 0, 10)
+
+
+def test_other_failures_are_storage_errors(store):
+    missing = S3BlobStore("missing", region="us-east-1")
+
+    with pytest.raises(StorageError) as error:
+        missing.size("audio/ab/abc.wav")
+    assert not isinstance(error.value, BlobNotFoundError)
+
+
+def test_blobs_are_downloaded_once_to_the_cache(store, audio, downloads, tmp_path):
+    store.put_file("audio/ab/abc.wav", audio)
+    cache = BlobCache(store, tmp_path / "cache", max_bytes=10 * len(CONTENT))
+
+    with cache.fetch("audio/ab/abc.wav") as first:
+        assert first.read_bytes() == CONTENT
+    with cache.fetch("audio/ab/abc.wav") as second:
+        assert second == first
+
+    assert downloads == ["audio/ab/abc.wav"]
+    assert list((tmp_path / "cache").rglob("*.part")) == []
+
+
+def test_a_blob_put_through_the_cache_is_not_downloaded(store, audio, downloads, tmp_path):
+    cache = BlobCache(store, tmp_path / "cache", max_bytes=10 * len(CONTENT))
+
+    cached = cache.put("audio/ab/abc.wav", audio)
+
+    assert not audio.exists()
+    assert store.size("audio/ab/abc.wav") == len(CONTENT)
+    with cache.fetch("audio/ab/abc.wav") as path:
+        assert path == cached
+        assert path.read_bytes() == CONTENT
+    assert downloads == []
+
+
+def test_a_cached_blob_in_use_is_not_evicted(store, audio, downloads, tmp_path):
+    store.put_file("audio/ab/abc.wav", audio)
+    store.put_file("pcm/ab/abc.1ch.f32", audio)
+    # Room for one blob
+    cache = BlobCache(store, tmp_path / "cache", max_bytes=len(CONTENT))
+
+    with cache.fetch("audio/ab/abc.wav") as in_use:
+        # Over the limit once downloaded, but the blob in use is kept
+        with cache.fetch("pcm/ab/abc.1ch.f32") as other:
+            assert in_use.exists() and other.exists()
+        assert cache.evict() == 1
+        assert in_use.exists()
+        assert not other.exists()
+
+    # Evicted, so downloaded again
+    with cache.fetch("pcm/ab/abc.1ch.f32") as other:
+        assert other.read_bytes() == CONTENT
+    assert downloads == ["audio/ab/abc.wav", "pcm/ab/abc.1ch.f32", "pcm/ab/abc.1ch.f32"]
+
+
+def test_stale_uploads_and_pcm_are_purged(store, audio):
+    store.put_file("audio/ab/abc.wav", audio)
+    store.put_file("pcm/ab/abc.1ch.f32", audio)
+    # Not a blob of the store, even though under its prefix
+    store._client.put_object(Bucket="speech", Key="speech/other/keep", Body=b"x")
+
+    assert store.purge(max_age=3600) == 0
+    assert store.purge(max_age=-60) == 2
+
+    keys = [item["Key"] for item in store._client.list_objects_v2(Bucket="speech")["Contents"]]
+    assert keys == ["speech/other/keep"]
@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("whisperx")
+
+from src.transcription.enums import Model  # noqa: E402
+from src.workers.batching import AdaptiveBatchSize  # noqa: E402
+from src.workers.speech_transcriber import (  # noqa: E402
+    SAMPLE_RATE,
+    WARM_UP_SECONDS,
+    SpeechTranscriber,
+)
+
+
+class FakePipeline:
+    """ASR pipeline running out of memory above ``max_batch_size``."""
+
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.batch_sizes: list[int] = []
+
+    def transcribe(self, audio, language, batch_size, chunk_size):
+        self.batch_sizes.append(batch_size)
+        if batch_size > self.max_batch_size:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        return {"segments": [], "language": language or "en"}
+
+
+def _transcriber(
+    pipeline: FakePipeline, batch_size: int, min_batch_size: int = 1, concurrent_tasks: int = 1
+):
+    transcriber = SpeechTranscriber.__new__(SpeechTranscriber)
+    transcriber._concurrent_tasks = concurrent_tasks
+    transcriber._thread_local = threading.local()
+    transcriber._batch_sizes = AdaptiveBatchSize(initial=batch_size, min_size=min_batch_size)
+    transcriber._chunk_size = 10
+    transcriber._get_asr = lambda model: pipeline
+    transcriber.freed = 0
+    transcriber.cleaned = 0
+
+    def free_memory():
+        transcriber.freed += 1
+
+    def clean():
+        transcriber.cleaned += 1
+
+    transcriber._free_memory = free_memory
+    transcriber.clean = clean
+    return transcriber
+
+
+AUDIO = np.zeros(SAMPLE_RATE * 30, dtype=np.float32)
+
+
+def test_out_of_memory_is_retried_in_place_with_smaller_batches():
+    pipeline = FakePipeline(max_batch_size=4)
+    transcriber = _transcriber(pipeline, batch_size=16)
+
+    result = transcriber._transcribe(AUDIO, "a.wav", Model.TURBO, None)
+
+    assert result["segments"] == []
+    assert pipeline.batch_sizes == [16, 8, 4]
+    assert transcriber.freed == 2
+    # The models stay loaded
+    assert transcriber.cleaned == 0
+    # The next task of the bucket starts at the size that worked
+    transcriber._transcribe(AUDIO, "a.wav", Model.TURBO, None)
+    assert pipeline.batch_sizes[-1] == 4
+
+
+def test_out_of_memory_at_the_smallest_batch_drops_the_models(monkeypatch):
+    monkeypatch.setattr("src.utils.retry.time.sleep", lambda seconds: None)
+    pipeline = FakePipeline(max_batch_size=0)
+    transcriber = _transcriber(pipeline, batch_size=4, min_batch_size=2)
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        transcriber._transcribe(AUDIO, "a.wav", Model.TURBO, None)
+
+    assert transcriber.cleaned >= 1
+    assert set(pipeline.batch_sizes) == {4, 2}
+
+
+def test_runtime_error_in_threads_drops_only_the_views_of_the_thread(monkeypatch):
+    monkeypatch.setattr("src.utils.retry.time.sleep", lambda seconds: None)
+    pipeline = FakePipeline(max_batch_size=0)
+    transcriber = _transcriber(pipeline, batch_size=2, min_batch_size=2, concurrent_tasks=4)
+    transcriber._thread_local.asr = {Model.TURBO.value: (pipeline, pipeline)}
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        transcriber._transcribe(AUDIO, "a.wav", Model.TURBO, None)
+
+    # The models shared with the other threads stay loaded
+    assert transcriber.cleaned == 0
+    assert not hasattr(transcriber._thread_local, "asr")
+
+
+def test_warm_up_runs_a_short_clip_through_a_single_align_model(monkeypatch):
+    pipeline = FakePipeline(max_batch_size=16)
+    aligned = []
+    diarized = []
+    monkeypatch.setattr(
+        "src.workers.speech_transcriber.align",
+        lambda segments, model, metadata, audio, device: aligned.append((model, len(audio))),
+    )
+    transcriber = _transcriber(pipeline, batch_size=16)
+    transcriber._device = "cpu"
+    transcriber._cache_lock = threading.RLock()
+    transcriber._SpeechTranscriber__asr_cache = {Model.TURBO.value: pipeline}
+    transcriber._SpeechTranscriber__align_cache = {
+        "fr": ("fr-model", {}),
+        "en": ("en-model", {}),
+        "de": ("de-model", {}),
+    }
+    transcriber._SpeechTranscriber__diar_cache = lambda audio: diarized.append(len(audio))
+
+    transcriber.warm_up()
+
+    samples = int(WARM_UP_SECONDS * SAMPLE_RATE)
+    assert pipeline.batch_sizes == [1]
+    assert aligned == [("en-model", samples)]
+    assert diarized == [samples]
@@ -0,0 +1,26 @@
+from src.workers.timings import StageTimings
+
+
+def test_stage_records_wall_time():
+    timings = StageTimings()
+
+    with timings.stage("asr"):
+        pass
+    timings.add("asr", batch=8)
+
+    stage = timings.as_dict()["asr"]
+    assert stage["wall_s"] >= 0
+    assert stage["batch"] == 8
+
+
+def test_peak_memory_is_not_recorded_for_concurrent_tasks(monkeypatch):
+    resets = []
+    monkeypatch.setattr("src.workers.timings._reset_peak_rss", lambda: resets.append(1) or True)
+    timings = StageTimings(cuda=True, peak_memory=False)
+
+    with timings.stage("asr"):
+        pass
+
+    # The peaks of the process would mix the other tasks in
+    assert resets == []
+    assert set(timings.as_dict()["asr"]) == {"wall_s"}
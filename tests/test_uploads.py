@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from src.transcription.models import TranscriptionTaskModel
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create(client, size: int) -> str:
+    response = await client.post("/uploads", json={"size": size})
+    assert response.status_code == 201
+    return response.json()["upload_id"]
+
+
+def _put(client, upload_id: str, chunk: bytes, offset: int):
+    return client.put(
+        f"/uploads/{upload_id}", content=chunk, headers={"Upload-Offset": str(offset)}
+    )
+
+
+async def _count_tasks(db) -> int:
+    async with db.get_session() as session:
+        return await session.scalar(select(func.count()).select_from(TranscriptionTaskModel))
+
+
+async def test_an_upload_is_resumed_from_its_offset(client, wav):
+    upload_id = await _create(client, len(wav))
+
+    assert (await _put(client, upload_id, wav[:1000], 0)).json()["offset"] == 1000
+    # A chunk sent again after a lost response
+    conflict = await _put(client, upload_id, wav[:1000], 0)
+    assert conflict.status_code == 409
+    assert conflict.headers["Upload-Offset"] == "1000"
+
+    offset = (await client.get(f"/uploads/{upload_id}")).json()["offset"]
+    response = await _put(client, upload_id, wav[offset:], offset)
+    assert response.json()["offset"] == len(wav)
+
+    assert (await client.post(f"/uploads/{upload_id}/transcribe", json={})).status_code == 200
+    assert (await client.get(f"/uploads/{upload_id}")).status_code == 404
+
+
+async def test_an_incomplete_upload_is_not_transcribed(client, db, wav):
+    upload_id = await _create(client, len(wav))
+    await _put(client, upload_id, wav[:1000], 0)
+
+    response = await client.post(f"/uploads/{upload_id}/transcribe", json={})
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "1000"
+    assert await _count_tasks(db) == 0
+    # Still resumable
+    assert (await _put(client, upload_id, wav[1000:], 1000)).status_code == 200
+
+
+async def test_concurrent_completions_create_one_task(client, db, wav, tmp_path):
+    upload_id = await _create(client, len(wav))
+    await _put(client, upload_id, wav, 0)
+
+    responses = await asyncio.gather(
+        *(client.post(f"/uploads/{upload_id}/transcribe", json={}) for _ in range(4))
+    )
+
+    assert sorted(response.status_code for response in responses) == [200, 404, 404, 404]
+    assert await _count_tasks(db) == 1
+    assert list((tmp_path / "uploads").glob("*.part")) == []
+
+
+async def test_an_upload_is_restored_when_the_audio_cannot_be_stored(client, db, wav, monkeypatch):
+    from src.storage import get_store
+
+    upload_id = await _create(client, len(wav))
+    await _put(client, upload_id, wav, 0)
+
+    def unavailable(key, path):
+        raise OSError("Storage unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(get_store(), "put_file", unavailable)
+        response = await client.post(f"/uploads/{upload_id}/transcribe", json={})
+    assert response.status_code == 503
+    assert (await client.get(f"/uploads/{upload_id}")).json()["offset"] == len(wav)
+
+    assert (await client.post(f"/uploads/{upload_id}/transcribe", json={})).status_code == 200
+    assert await _count_tasks(db) == 1
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from src.workers.vad import SpeechMap, detect_speech
+
+SAMPLE_RATE = 16000
+
+
+def _tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _noise(seconds: float, amplitude: float = 1e-3) -> np.ndarray:
+    generator = np.random.default_rng(0)
+    return (amplitude * generator.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def _seconds(regions):
+    # Boundaries fall on 30 ms frames
+    return [(round(start / SAMPLE_RATE, 1), round(end / SAMPLE_RATE, 1)) for start, end in regions]
+
+
+def test_speech_is_found_between_pauses():
+    audio = np.concatenate([_noise(1), _tone(1), _noise(2), _tone(1), _noise(1)])
+
+    regions = detect_speech(audio, SAMPLE_RATE, padding=0.1)
+
+    assert _seconds(regions) == [(0.9, 2.1), (3.9, 5.1)]
+
+
+def test_short_pauses_do_not_split_speech():
+    audio = np.concatenate([_noise(1), _tone(1), _noise(0.3), _tone(1), _noise(1)])
+
+    regions = detect_speech(audio, SAMPLE_RATE, padding=0)
+
+    assert _seconds(regions) == [(1.0, 3.3)]
+
+
+def test_short_bursts_are_not_speech():
+    audio = np.concatenate([_noise(1), _tone(0.1), _noise(1), _tone(1), _noise(1)])
+
+    regions = detect_speech(audio, SAMPLE_RATE, padding=0)
+
+    assert _seconds(regions) == [(2.1, 3.1)]
+
+
+def test_audio_without_pauses_is_kept_whole():
+    audio = _tone(3) * np.linspace(0.5, 1.0, 3 * SAMPLE_RATE, dtype=np.float32)
+
+    assert detect_speech(audio, SAMPLE_RATE, padding=0) == [(0, len(audio))]
+
+
+def test_energies_do_not_depend_on_the_block_size(monkeypatch):
+    # Speech up to the end, in the last, partial block
+    audio = np.concatenate([_noise(1), _tone(1), _noise(2), _tone(1)])
+    regions = detect_speech(audio, SAMPLE_RATE)
+
+    # Blocks that do not divide the frames evenly
+    monkeypatch.setattr("src.workers.vad._BLOCK_FRAMES", 7)
+
+    assert detect_speech(audio, SAMPLE_RATE) == regions
+
+
+@pytest.mark.parametrize(
+    "audio", [np.zeros(3 * SAMPLE_RATE, np.float32), _noise(3, amplitude=1e-4), _noise(0)]
+)
+def test_silence_is_not_speech(audio):
+    assert detect_speech(audio, SAMPLE_RATE) == []
+
+
+def test_speech_of_a_channel_is_found_in_place():
+    stereo = np.stack([np.concatenate([_noise(1), _tone(1), _noise(1)]), _noise(3)], axis=1)
+
+    regions = detect_speech(stereo[:, 0], SAMPLE_RATE, padding=0)
+
+    assert _seconds(regions) == [(1.0, 2.0)]
+
+
+@pytest.fixture
+def speech_map():
+    # Speech from 1 s to 2 s and from 4 s to 5 s of 6 seconds, joined by 0.2 s of silence
+    return SpeechMap.build([(16000, 32000), (64000, 80000)], 6 * SAMPLE_RATE, SAMPLE_RATE)
+
+
+def test_speech_is_compacted(speech_map):
+    audio = np.arange(6 * SAMPLE_RATE, dtype=np.float32)
+
+    compact = speech_map.compact(audio)
+
+    assert len(compact) == 2 * SAMPLE_RATE + speech_map.gap
+    assert np.array_equal(compact[:SAMPLE_RATE], audio[16000:32000])
+    assert not compact[SAMPLE_RATE : SAMPLE_RATE + speech_map.gap].any()
+    assert np.array_equal(compact[-SAMPLE_RATE:], audio[64000:80000])
+    assert speech_map.speech_seconds == 2
+    assert speech_map.skipped_seconds == 4
+
+
+def test_timestamps_are_restored_to_the_original_timeline(speech_map):
+    segments = [
+        {
+            "start": 0.5,
+            "end": 1.1,
+            "words": [
+                {"word": "in", "start": 0.5, "end": 0.9},
+                {"word": "gap", "start": 1.1, "end": None},
+            ],
+        },
+        {"start": 1.3, "end": 2.2},
+    ]
+
+    speech_map.restore(segments)
+
+    assert segments == [
+        {
+            # An end in the gap stays with the region before it
+            "start": 1.5,
+            "end": 2.0,
+            "words": [
+                {"word": "in", "start": 1.5, "end": 1.9},
+                # A start in the gap moves to the next region
+                {"word": "gap", "start": 4.0, "end": None},
+            ],
+        },
+        {"start": 4.1, "end": 5.0},
+    ]
+
+
+def test_without_speech_timestamps_are_kept():
+    speech_map = SpeechMap.build([], SAMPLE_RATE, SAMPLE_RATE)
+
+    assert speech_map.compact(np.ones(SAMPLE_RATE, np.float32)).size == 0
+    assert speech_map.restore([{"start": 0.5, "end": 0.7}]) == [{"start": 0.5, "end": 0.7}]